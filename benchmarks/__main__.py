@@ -0,0 +1,107 @@
+"""
+Benchmarks of the editor's hot paths, run headless (under Xvfb on Linux),
+with a fresh home folder and no network access:
+
+    python -m benchmarks [--quick] [--only NAME ...] [--repeats N]
+                         [--output results.json] [--baseline FILE] [--save-baseline]
+    python -m benchmarks --trace FILE [--document FILE] [--speed N] [--preview]
+
+Results are written as JSON (see baseline.py) and compared with the
+baseline: the exit status is 1 if something got slower by more than
+--tolerance. Record the baseline on the reference machine with
+--save-baseline; results from another machine can't be compared. None
+is shipped, so nothing is compared until one is recorded.
+
+With --trace, an input trace recorded from Help -> Performance is replayed
+instead, and the keystroke to paint latency percentiles are reported.
+"""
+import argparse
+import os
+import sys
+
+from . import baseline, headless
+
+BASELINE: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+parser = argparse.ArgumentParser("python -m benchmarks", description="Benchmark textworker's hot paths.")
+parser.add_argument("--quick", action="store_true", help="small files and counts only (no 100 MB or 1 GB file)")
+parser.add_argument("--only", nargs="+", metavar="NAME", help="benchmarks to run: startup and/or a name from cases.BENCHMARKS")
+parser.add_argument("--repeats", type=int, default=5, help="runs of each benchmark (default: 5)")
+parser.add_argument("--output", default="bench_output.json", help="where to write the results")
+parser.add_argument("--baseline", default=BASELINE, help="results to compare with")
+parser.add_argument("--save-baseline", action="store_true", help="write the results as the baseline")
+parser.add_argument("--tolerance", type=float, default=baseline.TOLERANCE,
+                    help=f"slowdown ratio flagged as a regression (default: {baseline.TOLERANCE})")
+parser.add_argument("--trace", metavar="FILE", help="replay an input trace (only)")
+parser.add_argument("--document", metavar="FILE", help="file to replay the trace in (default: an empty tab)")
+parser.add_argument("--speed", type=float, default=1.0, help="replay speed, 0 for as fast as possible (default: 1)")
+parser.add_argument("--preview", action="store_true", help="replay with a Markdown preview of the document")
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    options = parser.parse_args(argv)
+
+    if headless.NeedsDisplay():
+        return headless.RunUnderXvfb(argv)
+    home = headless.Isolate()
+
+    from . import cases
+
+    names = [] if options.trace else options.only or ["startup", *cases.BENCHMARKS]
+    unknown = set(names) - {"startup", *cases.BENCHMARKS}
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    samples: dict[str, list[float]] = {}
+
+    def collect(results: cases.Samples):
+        for name, seconds in results:
+            samples.setdefault(name, []).append(seconds)
+            print(f"{name:28} {seconds * 1000:10.2f} ms", flush=True)
+
+    # Test files are made once per home folder (several GB with a given one)
+    directory = os.path.join(home, "files")
+    os.makedirs(directory, exist_ok=True)
+    if "startup" in names:
+        collect(cases.Startup(directory, options.repeats))
+
+    others = [name for name in names if name != "startup"]
+    if others or options.trace:
+        context = cases.Context(directory, options.repeats, options.quick)
+        for name in others:
+            collect(cases.BENCHMARKS[name](context))
+        if options.trace:
+            collect(cases.Replay(context, options.trace, options.document, options.speed, options.preview))
+
+    results = baseline.Results(samples, quick=options.quick, repeats=options.repeats,
+                               **({"trace": options.trace, "document": options.document, "speed": options.speed}
+                                  if options.trace else {}))
+    baseline.Save(results, options.output)
+    print(f"\nResults written to {options.output}")
+
+    if options.save_baseline:
+        baseline.Save(results, options.baseline)
+        print(f"Baseline written to {options.baseline}")
+        return 0
+
+    if not os.path.exists(options.baseline):
+        print(f"No baseline at {options.baseline}, record one with --save-baseline")
+        return 0
+
+    rows = baseline.Compare(results, baseline.Load(options.baseline), options.tolerance)
+    print(f"\n{'Benchmark':28} {'Baseline':>12} {'Now':>12} {'Change':>8}")
+    for name, before, after, regressed in rows:
+        change = (after / before - 1) * 100 if before else 0.0
+        print(f"{name:28} {before * 1000:9.2f} ms {after * 1000:9.2f} ms {change:+7.1f}%"
+              + ("  REGRESSION" if regressed else ""))
+
+    regressions = [row for row in rows if row[3]]
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) over {options.tolerance:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,49 @@
+"""
+Benchmark results as JSON, and their comparison with a baseline.
+
+    {"meta": {"python": ..., "platform": ..., "time": ...},
+     "results": {"open_1MB": {"unit": "s", "runs": 5, "median": 0.012,
+                              "min": ..., "max": ..., "samples": [...]}, ...}}
+"""
+import json
+import platform
+import statistics
+import sys
+import time
+
+TOLERANCE: float = 0.25 # Slower than the baseline by this much is a regression
+FLOOR: float = 0.002 # s, differences below this are noise whatever the ratio
+
+
+def Results(samples: dict[str, list[float]], **meta) -> dict:
+    return {"meta": {"python": sys.version, "platform": platform.platform(), "time": time.time(), **meta},
+            "results": {name: {"unit": "s", "runs": len(values), "median": statistics.median(values),
+                               "min": min(values), "max": max(values), "samples": values}
+                        for name, values in samples.items() if values}}
+
+
+def Load(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def Save(results: dict, path: str):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+        f.write("\n")
+
+
+def Compare(results: dict, baseline: dict, tolerance: float = TOLERANCE,
+            floor: float = FLOOR) -> list[tuple[str, float, float, bool]]:
+    """
+    (name, baseline median, median, regressed) for each benchmark in both.
+    """
+    rows = []
+    old = baseline.get("results", {})
+    for name, result in sorted(results.get("results", {}).items()):
+        if name not in old:
+            continue
+        before, after = old[name]["median"], result["median"]
+        regressed = after > before * (1 + tolerance) and after - before > floor
+        rows.append((name, before, after, regressed))
+    return rows
@@ -0,0 +1,366 @@
+"""
+The benchmarks. Each one is a generator of (name, seconds) samples, one
+per run; a benchmark may give several names (one per file size...).
+
+Everything but Startup runs in this process, in one main window (Context).
+"""
+import os
+import subprocess
+import sys
+import time
+
+from typing import Callable, Iterator
+
+Samples = Iterator[tuple[str, float]]
+
+SIZES: dict[str, int] = {"1KB": 1 << 10, "1MB": 1 << 20, "100MB": 100 << 20, "1GB": 1 << 30}
+QUICK_SIZES: list[str] = ["1KB", "1MB"]
+TIMEOUT: float = 600 # s, for anything waited for
+
+LINE = b"The quick brown fox jumps over the lazy dog, again and again and again. %08d\n"
+MARKDOWN = """# Section {0}
+
+Some *emphasis*, some **strong** text and `code`, with [a link](https://example.com).
+
+- First item
+- Second item, a bit longer than the first one
+
+```python
+def f(x):
+    return x * {0}
+```
+
+"""
+
+
+class Context:
+    """
+    A main window to benchmark, and files to feed it.
+    """
+
+    def __init__(this, directory: str, repeats: int, quick: bool):
+        import wx
+        from textworker import generic
+
+        generic.ready()
+        this.App = wx.App(0)
+        this.App.SetAppName("textworker")
+
+        from textworker.ui.mainwindow import MainFrame
+        this.Frame = MainFrame()
+        this.Frame.Show()
+        this.Notebook = this.Frame.notebook
+        this.Directory = directory
+        this.Repeats = repeats
+        this.Quick = quick
+        this.Pump(lambda: True)
+
+    def Pump(this, until: Callable[[], bool], timeout: float = TIMEOUT):
+        """
+        Handle events (CallAfter, timers, paints) until until() is true.
+        """
+        deadline = time.perf_counter() + timeout
+        while True:
+            this.App.Yield(True)
+            if until():
+                return
+            if time.perf_counter() > deadline:
+                raise TimeoutError("Benchmark step took too long")
+            time.sleep(0.0005)
+
+    def Reset(this):
+        """
+        Close every tab, and leave a new one. What the benchmarks typed is
+        thrown away first: closing a modified tab asks whether to save it,
+        and nobody would answer.
+        """
+        from textworker.ui.editor import Editor
+        from textworker.ui.hibernate import TabStub
+
+        for page in map(this.Notebook.GetPage, range(this.Notebook.GetPageCount())):
+            if isinstance(page, Editor):
+                page.SetSavePoint()
+            elif isinstance(page, TabStub):
+                page.DropScratch()
+
+        while this.Notebook.GetPageCount():
+            this.Notebook.DeletePage(0)
+        this.Notebook.AddTab()
+        this.Pump(lambda: True)
+
+    def Editor(this):
+        return this.Notebook.GetCurrentPage()
+
+    def Page(this, path: str):
+        from textworker.ui.editor import Editor
+
+        for page in map(this.Notebook.GetPage, range(this.Notebook.GetPageCount())):
+            if isinstance(page, Editor) and page.FileLoaded == path:
+                return page
+        return None
+
+    def File(this, size: str) -> str:
+        """
+        A text file of one of SIZES, made once.
+        """
+        path = os.path.join(this.Directory, f"text-{size}.txt")
+        if not os.path.exists(path):
+            block = b"".join(LINE % i for i in range((1 << 20) // len(LINE) + 1))
+            with open(path, "wb") as f:
+                left = SIZES[size]
+                while left > 0:
+                    f.write(block[:left])
+                    left -= len(block)
+        return path
+
+    def Sizes(this) -> list[str]:
+        return QUICK_SIZES if this.Quick else list(SIZES)
+
+
+"""
+Benchmarks
+"""
+
+def Startup(directory: str, repeats: int) -> Samples:
+    """
+    From starting the process to the main loop running, through
+    textworker.__main__.main. The files it imports are in the OS cache
+    after the first run: a really cold start needs the caches dropped.
+    """
+    for run in range(repeats):
+        start = time.perf_counter()
+        process = subprocess.Popen([sys.executable, "-m", "benchmarks.startup"], stdout=subprocess.PIPE,
+                                   cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        line = process.stdout.readline()
+        elapsed = time.perf_counter() - start
+        process.wait(TIMEOUT)
+        if line.strip() != b"ready":
+            raise RuntimeError(f"textworker did not start (exit status {process.returncode})")
+        yield "startup", elapsed
+
+
+def AddTabs(ctx: Context) -> Samples:
+    count = 20 if ctx.Quick else 200
+    for run in range(ctx.Repeats):
+        ctx.Reset()
+        start = time.perf_counter()
+        for i in range(count):
+            ctx.Notebook.AddTab()
+        ctx.Pump(lambda: True)
+        yield f"add_tab_x{count}", time.perf_counter() - start
+
+
+def OpenFiles(ctx: Context) -> Samples:
+    """
+    Tabber.OpenFile, until the file is in a tab (in large file mode for
+    the biggest ones).
+    """
+    for size in ctx.Sizes():
+        path = ctx.File(size)
+        for run in range(1 if SIZES[size] >= 1 << 30 else ctx.Repeats):
+            ctx.Reset()
+            start = time.perf_counter()
+            ctx.Notebook.OpenFile(path)
+            ctx.Pump(lambda: ctx.Page(path) is not None)
+            yield f"open_{size}", time.perf_counter() - start
+
+
+def Save(ctx: Context) -> Samples:
+    from textworker.ui.saver import Engine
+
+    for size in ["1MB"] if ctx.Quick else ["1MB", "100MB"]:
+        ctx.Reset()
+        editor = ctx.Editor()
+        with open(ctx.File(size), "rb") as f:
+            editor.LoadRaw(f.read())
+        target = os.path.join(ctx.Directory, f"saved-{size}.txt")
+
+        for run in range(ctx.Repeats):
+            done = []
+            start = time.perf_counter()
+            Engine.Save(editor, target, lambda path, error: done.append(error))
+            ctx.Pump(lambda: done)
+            if done[0]:
+                raise done[0]
+            yield f"save_{size}", time.perf_counter() - start
+
+
+def AutoSave(ctx: Context) -> Samples:
+    """
+    Editors made dirty at once with no auto save delay, until all are saved.
+    """
+    from textworker.ui import autosave
+
+    autosave.TOGGLE = True
+    count = 5 if ctx.Quick else 20
+    data = b"".join(LINE % i for i in range(1000))
+
+    for run in range(ctx.Repeats):
+        ctx.Reset()
+        editors = []
+        for i in range(count):
+            ctx.Notebook.AddTab()
+            editor = ctx.Editor()
+            editor.LoadRaw(data)
+            editor.FileLoaded = os.path.join(ctx.Directory, f"autosave-{run}-{i}.txt")
+            editor.Start("0")
+            editors.append(editor)
+
+        start = time.perf_counter()
+        for editor in editors:
+            editor.AddText("x")
+        ctx.Pump(lambda: not any(editor and editor.Tracker.Dirty for editor in editors))
+        yield f"autosave_x{count}", time.perf_counter() - start
+
+
+def Keystrokes(ctx: Context) -> Samples:
+    """
+    Typing in a 1 MB file, painting after each key; and switching between
+    dirty and clean (Tabber.OnEditorModify) by typing and undoing.
+    """
+    count = 200 if ctx.Quick else 2000
+    ctx.Reset()
+    editor = ctx.Editor()
+    with open(ctx.File("1MB"), "rb") as f:
+        editor.LoadRaw(f.read())
+    editor.FileLoaded = os.path.join(ctx.Directory, "typed.txt")
+    editor.Stop() # No auto save in between
+
+    for run in range(ctx.Repeats):
+        editor.GotoPos(editor.GetLength() // 2)
+        start = time.perf_counter()
+        for i in range(count):
+            editor.AddText("x")
+            editor.Update()
+        yield "keystroke", (time.perf_counter() - start) / count
+
+        editor.SetSavePoint()
+        start = time.perf_counter()
+        for i in range(count):
+            editor.AddText("x")
+            editor.Undo()
+        yield "dirty_toggle", (time.perf_counter() - start) / (2 * count)
+
+
+def Preview(ctx: Context) -> Samples:
+    """
+    Refreshing the Markdown preview after a change (see profiling.Counters).
+    """
+    try:
+        from textworker.ui.preview import MarkdownPreview
+    except ImportError as e:
+        print(f"Skipping the preview: {e}", file=sys.stderr)
+        return
+
+    from textworker.profiling import Counters
+
+    def renders() -> int:
+        timing = Counters.Timings.get("preview render")
+        return timing.Count if timing else 0
+
+    ctx.Reset()
+    editor = ctx.Editor()
+    editor.SetText("".join(MARKDOWN.format(i) for i in range(50 if ctx.Quick else 500)))
+    preview = MarkdownPreview(ctx.Notebook, editor)
+    ctx.Notebook.AddPage(preview, "Preview")
+    ctx.Pump(lambda: renders() > 0)
+
+    for run in range(ctx.Repeats):
+        editor.AppendText(MARKDOWN.format(f"added {run}"))
+        before = renders()
+        start = time.perf_counter()
+        preview.Render()
+        ctx.Pump(lambda: renders() > before)
+        yield "preview_refresh", time.perf_counter() - start
+
+
+def SettingsDialog(ctx: Context) -> Samples:
+    from textworker.ui.settings import SettingsDialog
+
+    for run in range(ctx.Repeats):
+        start = time.perf_counter()
+        dlg = SettingsDialog(ctx.Frame)
+        dlg.Show()
+        ctx.Pump(lambda: True)
+        yield "settings_dialog_open", time.perf_counter() - start
+        dlg.Destroy()
+
+
+def Replay(ctx: Context, path: str, document: str | None = None,
+           speed: float = 1.0, preview: bool = False) -> Samples:
+    """
+    An input trace (see textworker.trace) driven into document, at its
+    recorded pace times speed (0: as fast as possible). Yields the 50th
+    and 99th percentiles of keystroke to paint, once per run.
+    """
+    import wx
+    import wx.stc
+    from textworker import trace
+    from textworker.ui.inputtrace import Apply, Prepare
+
+    with open(path, "rb") as f:
+        header, events = trace.Read(f)
+
+    for run in range(ctx.Repeats):
+        ctx.Reset()
+        if document:
+            ctx.Notebook.OpenFile(document)
+            ctx.Pump(lambda: ctx.Page(document) is not None)
+            editor = ctx.Page(document)
+        else:
+            editor = ctx.Editor()
+        editor.Stop() # No auto save in between
+
+        if run == 0 and editor.GetLength() != header.get("length", 0):
+            print(f"Warning: the trace was recorded on {header.get('length', 0)} bytes, "
+                  f"replaying on {editor.GetLength()}", file=sys.stderr)
+
+        if preview:
+            from textworker.ui.preview import MarkdownPreview
+            ctx.Notebook.AddPage(MarkdownPreview(ctx.Notebook, editor), "Preview")
+            ctx.Notebook.SetSelection(ctx.Notebook.GetPageIndex(editor))
+
+        Prepare(editor, header)
+        ctx.Pump(lambda: True)
+
+        painted = []
+        def OnPainted(evt):
+            painted.append(time.perf_counter())
+            evt.Skip()
+        editor.Bind(wx.stc.EVT_STC_PAINTED, OnPainted)
+
+        latencies = []
+        start = time.perf_counter()
+        for event in events:
+            if speed:
+                due = start + event.Time / speed
+                ctx.Pump(lambda: time.perf_counter() >= due)
+
+            painted.clear()
+            keyed = time.perf_counter()
+            if Apply(editor, event):
+                editor.Update()
+                # Some keys (copying...) don't change what is shown
+                ctx.Pump(lambda: painted or time.perf_counter() - keyed > 1)
+                if painted:
+                    latencies.append(painted[0] - keyed)
+
+        editor.Unbind(wx.stc.EVT_STC_PAINTED, handler=OnPainted)
+        # What was typed is thrown away: closing the tab (Reset, or
+        # quitting after the last run) would ask to save over the document
+        editor.SetSavePoint()
+        if latencies:
+            latencies.sort()
+            yield "replay_p50", latencies[len(latencies) // 2]
+            yield "replay_p99", latencies[min(len(latencies) - 1, len(latencies) * 99 // 100)]
+
+
+BENCHMARKS: dict[str, Callable[[Context], Samples]] = {
+    "add_tab": AddTabs,
+    "open": OpenFiles,
+    "save": Save,
+    "autosave": AutoSave,
+    "keystroke": Keystrokes,
+    "preview": Preview,
+    "settings": SettingsDialog,
+}
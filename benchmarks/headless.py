@@ -0,0 +1,56 @@
+"""
+Running the benchmarks without a screen, a network or the user's settings.
+"""
+import atexit
+import os
+import shutil
+import socket
+import sys
+import tempfile
+
+
+def NeedsDisplay() -> bool:
+    return sys.platform.startswith("linux") and not os.environ.get("DISPLAY")
+
+
+def RunUnderXvfb(argv: list[str]) -> int:
+    """
+    Run the benchmarks again under a virtual X server.
+    """
+    if not shutil.which("xvfb-run"):
+        print("No display and no xvfb-run: install Xvfb, or set DISPLAY", file=sys.stderr)
+        return 2
+    os.execvp("xvfb-run", ["xvfb-run", "-a", "-s", "-screen 0 1280x1024x24",
+                           sys.executable, "-m", "benchmarks", *argv])
+
+
+def Isolate() -> str:
+    """
+    Use a fresh home folder (settings, session, logs) and no network.
+    Must run before textworker is imported: generic reads ~ on import.
+    Returns the home folder, which is removed at exit unless it was given
+    as $TEXTWORKER_BENCH_HOME.
+    """
+    home = os.environ.get("TEXTWORKER_BENCH_HOME")
+    if not home:
+        home = tempfile.mkdtemp(prefix="textworker-bench-")
+        atexit.register(shutil.rmtree, home, ignore_errors=True)
+    os.environ["HOME"] = os.environ["TEXTWORKER_BENCH_HOME"] = home
+    os.environ["GDK_BACKEND"] = "x11"
+    BlockNetwork()
+    return home
+
+
+def BlockNetwork():
+    """
+    Make every Internet connection fail (update checks...): a network
+    round trip would be measured instead of the editor.
+    """
+    connect = socket.socket.connect
+
+    def blocked(sock: socket.socket, address):
+        if sock.family in (socket.AF_INET, socket.AF_INET6):
+            raise OSError("Network access is disabled in benchmarks")
+        return connect(sock, address)
+
+    socket.socket.connect = blocked
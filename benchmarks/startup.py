@@ -0,0 +1,33 @@
+"""
+Started by the startup benchmark (see cases.Startup): runs
+textworker.__main__.main, prints "ready" once the event loop runs, and
+exits at once.
+"""
+import os
+import sys
+
+from benchmarks.headless import Isolate
+
+Isolate()
+
+import wx
+
+_MainLoop = wx.App.MainLoop
+
+
+def Ready():
+    print("ready", flush=True)
+    os._exit(0) # Nothing to clean up, it would only be measured
+
+
+def MainLoop(app: wx.App):
+    wx.CallAfter(Ready)
+    return _MainLoop(app)
+
+
+if __name__ == "__main__":
+    wx.App.MainLoop = MainLoop
+    sys.argv = ["textworker", "--no-splash", "yes"]
+
+    from textworker.__main__ import main
+    main()
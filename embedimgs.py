@@ -1,7 +1,9 @@
 from glob import glob
 from typing import Literal
 from wx.tools import img2py
+import base64
 import getopt
+import io
 import os
 import sys
 
@@ -11,7 +13,8 @@ __doc__ = "embedimgs [action] [value]\n" \
           "-d = Set application universal data path (Assets repository/data branch on Git repository) for splash screens and app icons\n" \
           "     (Must ends with a path separator else you will see exceptions being raised)" \
           "-h = Show this message\n" \
-          "-t = Target (icons/assets/splash)\n" \
+          "-t = Target (icons/assets/splash/atlas)\n" \
+          "     atlas packs every image into a single one, textworker/atlas.py (used instead of the others if present)\n" \
           "-a = Same as -d (but not that universal as this is used only on wx version) but for app assets\n" \
           "-s = Use icon and splash screen in (project) 'stable' variant\n\n" \
           "If needed, make .pngs from .svgs first by ImageMagick's convert or Inkscape (or whatever tool you want).\n"
@@ -43,6 +46,56 @@ def update(name: Literal["assets", "icons", "splash"]):
         img2py.img2py(f"{dataPath}{name}/" + f"{target}.png",
                       f"textworker/{name}.py", True, imgName="icon" if name == "icons" else "splash")
 
+def pack():
+    import wx
+
+    images = {}
+    for img in glob(pathname="*.png", root_dir=assetsPath):
+        images["assets." + img.removesuffix(".png")] = wx.Image(assetsPath + img)
+
+    target = projid + ".Devel" if not useStable else ""
+    for name, imgName in [("icons", "icon"), ("splash", "splash")]:
+        if os.path.isfile(f"{dataPath}{name}/{target}.png"):
+            images[f"{name}.{imgName}"] = wx.Image(f"{dataPath}{name}/{target}.png")
+
+    # Shelf packing, tallest images first
+    width = max([1024] + [img.GetWidth() for img in images.values()])
+    rects = {}
+    x = y = shelf = 0
+    for name, img in sorted(images.items(), key=lambda item: -item[1].GetHeight()):
+        w, h = img.GetWidth(), img.GetHeight()
+        if x + w > width:
+            x, y, shelf = 0, y + shelf, 0
+        rects[name] = (x, y, w, h)
+        x += w
+        shelf = max(shelf, h)
+    height = max(1, y + shelf)
+
+    # Copy the pixels row by row, alpha included
+    rgb = bytearray(width * height * 3)
+    alpha = bytearray(width * height)
+    for name, (x, y, w, h) in rects.items():
+        img = images[name]
+        if not img.HasAlpha(): img.InitAlpha()
+        data, imgAlpha = img.GetData(), img.GetAlpha()
+        for row in range(h):
+            start = (y + row) * width + x
+            rgb[start * 3:(start + w) * 3] = data[row * w * 3:(row + 1) * w * 3]
+            alpha[start:start + w] = imgAlpha[row * w:(row + 1) * w]
+
+    stream = io.BytesIO()
+    wx.Image(width, height, bytes(rgb), bytes(alpha)).SaveFile(stream, wx.BITMAP_TYPE_PNG)
+
+    remove_if_exists("textworker/atlas.py")
+    with open("textworker/atlas.py", "x") as f:
+        f.write("# Automatically generated by ../embedimgs.py -t atlas\n")
+        f.write("# All changes can be overwritten.\n\n")
+        f.write(f"data = {base64.b64encode(stream.getvalue())!r}\n\n")
+        f.write("rects = {\n")
+        for name, rect in rects.items():
+            f.write(f"    {name!r}: {rect!r},\n")
+        f.write("}\n")
+
 if __name__ == '__main__':
     try:
         opts, fileArgs = getopt.getopt(sys.argv[1:], "d:a:t:h")
@@ -57,6 +110,7 @@ if __name__ == '__main__':
             case "-d": dataPath = val
             case "-a": assetsPath = val
             case "-t":
-                if not val in ["icons", "assets", "splash"]:
-                    raise Exception("Unknown target: must be icons/assets/splash")
-                update(val)
\ No newline at end of file
+                if not val in ["icons", "assets", "splash", "atlas"]:
+                    raise Exception("Unknown target: must be icons/assets/splash/atlas")
+                if val == "atlas": pack()
+                else: update(val)
\ No newline at end of file
@@ -0,0 +1,12 @@
+from benchmarks.baseline import Compare, Results
+
+def test_compare():
+    before = Results({"open_1MB": [0.010, 0.012, 0.011], "startup": [0.5], "gone": [1.0]})
+    after = Results({"open_1MB": [0.020, 0.021, 0.019], "startup": [0.501], "new": [1.0]})
+    rows = {name: regressed for name, old, new, regressed in Compare(after, before)}
+    assert rows == {"open_1MB": True, "startup": False}
+
+def test_noise():
+    # Doubled, but by less than the floor
+    rows = Compare(Results({"keystroke": [0.0002]}), Results({"keystroke": [0.0001]}))
+    assert rows == [("keystroke", 0.0001, 0.0002, False)]
@@ -0,0 +1,38 @@
+import configparser
+import os
+
+from textworker.config import Option, Settings
+
+class Sample(Settings):
+    Size = Option("indentation", "size", 4)
+    Tabs = Option("indentation", "tabs", False)
+
+def make(path) -> Sample:
+    cfg = configparser.ConfigParser()
+    cfg.yes_values = ["yes", "True", True]
+    cfg.read_string("[indentation]\nsize = 8\ntabs = yes\n")
+    return Sample(cfg, str(path))
+
+def test_typed(tmp_path):
+    settings = make(tmp_path / "configs.ini")
+    assert settings.Size == 8 and settings.Tabs is True
+    assert settings.Get("indentation", "missing", 2) == 2
+
+    changes = []
+    settings.AddListener(lambda section, option: changes.append((section, option)))
+    settings.Size = 2
+    settings.Size = 2 # Unchanged, no notification
+    assert settings.Size == 2 and changes == [("indentation", "size")]
+
+def test_write(tmp_path):
+    path = tmp_path / "configs.ini"
+    settings = make(path)
+    settings.Tabs = False
+    assert not path.exists() # Not yet
+    settings.Flush()
+    assert "tabs = no" in path.read_text()
+
+    path.write_text("[indentation]\nsize = 3\n")
+    os.utime(path, ns=(0, 0))
+    assert settings.Refresh()
+    assert settings.Size == 3
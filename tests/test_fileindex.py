@@ -0,0 +1,17 @@
+from textworker.fileindex import IsIgnored, ParseIgnore, Walk
+
+def test_gitignore(tmp_path):
+    for path in ["src/main.py", "build/out.o", "a/b/c.log", "a/keep.log", "docs/x.txt",
+                 "docs/sub/y.txt", ".git/HEAD", "sub/secret.txt", "sub/ok.md"]:
+        (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / path).touch()
+    (tmp_path / ".gitignore").write_text("build/\n*.log\n!keep.log\n/docs/*.txt\n")
+    (tmp_path / "sub" / ".gitignore").write_text("secret.*\n")
+
+    files, dirs = Walk(str(tmp_path))
+    assert sorted(files) == [".gitignore", "a/keep.log", "docs/sub/y.txt",
+                             "src/main.py", "sub/.gitignore", "sub/ok.md"]
+    assert "build" not in dirs and ".git" not in dirs
+
+    chain = (("", ParseIgnore("**/tmp\n")),)
+    assert IsIgnored(chain, "tmp", True) and IsIgnored(chain, "a/b/tmp", False)
@@ -0,0 +1,28 @@
+import re
+
+from textworker.findfiles import Compile, RequiredLiteral, SearchFiles
+
+def test_literal():
+    assert RequiredLiteral(r"foo\d+barbaz") == b"barbaz"
+    assert RequiredLiteral(r"foo|bar") == b""
+    assert RequiredLiteral("Hello", re.IGNORECASE) == b""
+
+def test_search(tmp_path):
+    (tmp_path / "a.txt").write_text("one\ntwo needle\nNeedle three\n")
+    (tmp_path / "b.bin").write_bytes(b"\0needle")
+    paths = [str(tmp_path / "a.txt"), str(tmp_path / "b.bin")]
+
+    hits = SearchFiles(paths, *Compile("needle"))
+    assert [(line, start, length) for path, line, start, length, text in hits] == [(1, 4, 6), (2, 0, 6)]
+    assert hits[0][4] == "two needle"
+
+    assert len(SearchFiles(paths, *Compile("N[a-z]+", regex=True, case=True))) == 1
+
+def test_unicode(tmp_path):
+    (tmp_path / "a.txt").write_bytes("naïve ÉCOLE\n\xff école\n".encode("utf-8").replace(b"\xc3\xbf", b"\xff"))
+
+    hits = SearchFiles([str(tmp_path / "a.txt")], *Compile("école"))
+    assert [(line, start, length) for path, line, start, length, text in hits] == [(0, 7, 6), (1, 2, 6)]
+    assert hits[0][4] == "naïve ÉCOLE"
+
+    assert len(SearchFiles([str(tmp_path / "a.txt")], *Compile(r"\bna\w+", regex=True))) == 1
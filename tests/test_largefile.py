@@ -0,0 +1,41 @@
+from textworker.largefile import LargeDocument
+
+def test_largefile(tmp_path):
+    path = tmp_path / "large.txt"
+    path.write_bytes(b"".join(b"line %d\n" % i for i in range(10000)))
+
+    doc = LargeDocument(str(path))
+    doc.Index.Ready.wait()
+    assert doc.LineCount == 10001
+    assert doc.ReadLines(5000, 1)[2] == b"line 5000\n"
+
+    start, end, _ = doc.ReadLines(10, 2)
+    doc.Replace(start, end, b"replaced\n")
+    assert doc.LineCount == 10000
+    assert doc.ReadLines(10, 2)[2] == b"replaced\nline 12\n"
+
+    doc.Save()
+    assert not doc.Modified
+    assert path.read_bytes().count(b"\n") == 9999
+    doc.Close()
+
+
+def test_largefile_limits(tmp_path):
+    path = tmp_path / "long.txt"
+    path.write_bytes(b"short\n" + "é".encode() * 1000 + b"\nend\n")
+
+    doc = LargeDocument(str(path))
+    start, end, data = doc.ReadLines(0, 3, 100)
+    assert (start, end, data) == (0, 6, b"short\n")
+    start, end, data = doc.ReadLines(1, 2, 101)
+    assert end - start == 100 and data.decode() == "é" * 50
+
+    # Saving indexes the new file: no scan needed
+    doc.Index.Ready.wait()
+    doc.Replace(0, 6, b"a\nb\n")
+    assert doc.ReadLines(2, 1, 5000)[2] == "é".encode() * 1000 + b"\n"
+    assert doc.LineCount == 5
+    doc.Save()
+    assert doc.Index.Ready.is_set() and doc.LineCount == 5
+    assert doc.ReadLines(3, 1)[2] == b"end\n"
+    doc.Close()
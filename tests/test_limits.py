@@ -0,0 +1,19 @@
+from textworker import limits
+
+THRESHOLDS = limits.Thresholds(Large=1000, Huge=10000, LongLine=100, VeryLongLine=1000)
+
+def test_assess():
+    assert limits.Assess(999, 99, THRESHOLDS) == limits.NORMAL
+    assert limits.Assess(1000, 10, THRESHOLDS) == limits.LARGE
+    assert limits.Assess(500, 100, THRESHOLDS) == limits.LARGE
+    assert limits.Assess(10000, 0, THRESHOLDS) == limits.HUGE
+    assert limits.Assess(2000, 1000, THRESHOLDS) == limits.HUGE
+
+def test_long_line():
+    assert limits.FindLongLine(b"", 10) == 0
+    assert limits.FindLongLine(b"short\n" * 100, 10) == 0
+    assert limits.FindLongLine(b"ab\r\n" + b"x" * 9 + b"\rabc\n", 10) == 0
+    assert limits.FindLongLine(b"ab\r\n" + b"x" * 10 + b"\rabc\n", 10) == 10
+    assert limits.FindLongLine(b"a\n" * 50 + b"y" * 5000, 100) == 5000
+    assert limits.FindLongLine((b"z" * 150 + b"\n") * 20, 100) == 150
+    assert limits.FindLongLine((b"z" * 150 + b"\n") * 20, 200) == 0
@@ -0,0 +1,22 @@
+import logging
+
+from textworker import logs
+
+def test_rotated(tmp_path, monkeypatch):
+    monkeypatch.setattr(logs, "MAX_BYTES", 1000)
+    path = tmp_path / "logs" / "test.log"
+
+    logger = logging.getLogger("textworker.test_logs")
+    logger.propagate = False
+    handler = logs.Start(logger, str(path), logging.Formatter("%(message)s"))
+    try:
+        for i in range(500):
+            logger.warning(f"line {i:04}")
+    finally:
+        logs.Stop(handler)
+        logger.removeHandler(handler)
+
+    files = sorted(path.parent.iterdir())
+    assert len(files) == logs.BACKUPS + 1
+    assert all(file.stat().st_size <= 1000 for file in files)
+    assert path.read_text().splitlines()[-1] == "line 0499"
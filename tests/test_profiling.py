@@ -0,0 +1,23 @@
+import io
+import json
+
+from textworker.profiling import Counters, Export, OperationCounters
+
+def test_counters():
+    counters = OperationCounters()
+    for ms in range(1, 101):
+        counters.Add("save", ms / 1000)
+    done = counters.Started("open")
+    done("path", None) # As a callback
+
+    records = {record["name"]: record for record in counters.Records()}
+    assert records["save"]["count"] == 100 and records["open"]["count"] == 1
+    assert round(records["save"]["p50_ms"]) == 51 and round(records["save"]["max_ms"]) == 100
+
+def test_export():
+    Counters.Add("tab creation", 0.002)
+    out = io.StringIO()
+    Export(out)
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert records[0]["type"] == "meta"
+    assert any(record.get("name") == "tab creation" for record in records)
@@ -0,0 +1,17 @@
+import pytest
+
+from textworker.session import Decode, Encode, EncodeTab, SessionError
+
+def test_session():
+    state = {"caret": 120, "anchor": 100, "first_line": 7, "x_offset": 0, "zoom": 3, "wrap": 1}
+    data = Encode([EncodeTab("/tmp/a.txt", state), EncodeTab("/tmp/ä.md", {})], 1, "/tmp", "layout")
+
+    session = Decode(data)
+    assert session.Folder == "/tmp"
+    assert session.Perspective == "layout"
+    assert session.Selected == 1
+    assert session.Tabs[0] == ("/tmp/a.txt", state)
+    assert session.Tabs[1][0] == "/tmp/ä.md"
+
+    with pytest.raises(SessionError):
+        Decode(data[:-1])
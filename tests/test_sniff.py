@@ -0,0 +1,32 @@
+import codecs
+import io
+
+from textworker.sniff import Encoded, Read
+
+def test_encoding():
+    data, format = Read(io.BytesIO(codecs.BOM_UTF8 + "héllo\n".encode("utf-8")))
+    assert data == "héllo\n".encode("utf-8")
+    assert (format.Encoding, format.BOM) == ("utf-8", codecs.BOM_UTF8)
+
+    data, format = Read(io.BytesIO(codecs.BOM_UTF16_LE + "héllo\r\n".encode("utf-16-le")))
+    assert data == "héllo\r\n".encode("utf-8")
+    assert format.Encoding == "utf-16-le" and format.EOL == "\r\n"
+    assert b"".join(Encoded(data, format)) == codecs.BOM_UTF16_LE + "héllo\r\n".encode("utf-16-le")
+
+    data, format = Read(io.BytesIO("héllo\n".encode("latin-1")))
+    assert data == "héllo\n".encode("utf-8") and format.Encoding != "utf-8"
+
+    # Not UTF-8 after the sample: read again
+    data, format = Read(io.BytesIO(b"a" * 100000 + "é".encode("latin-1")))
+    assert data == b"a" * 100000 + "é".encode("utf-8") and format.Encoding != "utf-8"
+
+def test_layout():
+    spaces = b"def f():\n  if x:\n    pass\n  return\n"
+    data, format = Read(io.BytesIO(spaces))
+    assert (format.EOL, format.Tabs, format.Indent) == ("\n", False, 2)
+
+    data, format = Read(io.BytesIO(b"a {\r\tb;\r\t{\r\t\tc;\r\t}\r}"))
+    assert (format.EOL, format.Tabs) == ("\r", True)
+
+    data, format = Read(io.BytesIO(b"flat"))
+    assert (format.EOL, format.Tabs, format.Indent) == (None, None, None)
@@ -0,0 +1,27 @@
+import io
+import pytest
+
+from textworker import trace
+from textworker.trace import TraceEvent
+
+def test_roundtrip():
+    events = [TraceEvent(0.0, trace.CHAR, ord("a"), 0), TraceEvent(0.125, trace.KEY, 8, 2),
+              TraceEvent(1.5, trace.SCROLL, -3, 0), TraceEvent(2.0, trace.SELECT, 10, 4)]
+    f = io.BytesIO()
+    trace.Write(f, {"document": "a.txt", "length": 12}, events)
+
+    f.seek(0)
+    header, read = trace.Read(f)
+    assert header == {"document": "a.txt", "length": 12}
+    assert read == events
+
+def test_truncated():
+    f = io.BytesIO()
+    trace.Write(f, {}, [TraceEvent(i / 2, trace.CHAR, 65, 0) for i in range(3)])
+
+    header, events = trace.Read(io.BytesIO(f.getvalue()[:-5]))
+    assert len(events) == 2
+    assert events[-1].Time == 0.5
+
+    with pytest.raises(ValueError):
+        trace.Read(io.BytesIO(b"not a trace\n"))
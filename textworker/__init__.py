@@ -1,5 +1,13 @@
+import sys
+
+# Must come first to see every import
+if "--profile-startup" in sys.argv:
+    from textworker.profiling import Profiler
+    Profiler.Start()
+
 import gettext
 import locale
+import pathlib
 
 from libtextworker.general import test_import
 from libtextworker.versioning import *
@@ -13,7 +21,9 @@ if is_development_version(__version__):
 else:
     branch = "stable"
 
-from textworker.generic import currPath
+# Not from generic: importing it starts logging, and find in files
+# worker processes import this package
+currPath = pathlib.Path(__file__).parent
 
 locale.setlocale(locale.LC_ALL, None)
 
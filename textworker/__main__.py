@@ -6,8 +6,8 @@ import wx
 from textworker import generic
 from textwrap import dedent
 
-ignore_not_exists: bool
-create_new: bool
+ignore_not_exists: bool = False
+create_new: bool = False
 
 parser = argparse.ArgumentParser(sys.argv[0],
                                  description =
@@ -35,6 +35,12 @@ config_flags.add_argument(
 )
 
 
+debug_flags = parser.add_argument_group("debugging")
+debug_flags.add_argument(
+    "--profile-startup", action="store_true",
+    help="print import times and startup phase timings once the window is painted",
+)
+
 file_flags = parser.add_argument_group("file-related flags")
 file_flags.add_argument(
     "--create-new", "-c", const=False, nargs="?",
@@ -73,10 +79,12 @@ def main():
     if options.paths:
         generic.logger.debug("Got paths: %s", " ".join(options.paths))
         for path in options.paths:
-            if not os.path.isfile(path): dirs += [path]
+            if os.path.isdir(path): dirs += [path]
             else: files += [path]
 
     import textworker.main as main_entrypoint
+    main_entrypoint.ignore_not_exists = ignore_not_exists
+    main_entrypoint.create_new = create_new
     app = wx.App(0)
     app.SetAppName("textworker")
 
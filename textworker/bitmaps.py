@@ -0,0 +1,124 @@
+"""
+Embedded images, decoded once and shared.
+
+Images are named "<module>.<image>", like "assets.close", "icons.icon"
+or "splash.splash". They come from the packed atlas module generated by
+`embedimgs.py -t atlas` if there is one (a single PNG to decode for
+everything), else from the per-image modules made by img2py.
+"""
+import base64
+import importlib
+import io
+import threading
+import wx
+
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from .generic import logger
+
+_lock = threading.RLock()
+_atlas: wx.Image | None = None
+_rects: dict[str, tuple[int, int, int, int]] | None = None
+_images: dict[str, wx.Image] = {}
+_bitmaps: dict[tuple[str, float], wx.Bitmap] = {}
+
+# Images needed before the main window shows up
+STARTUP: list[str] = ["icons.icon", "splash.splash",
+                      "assets.close", "assets.close_white", "assets.minimize", "assets.pin"]
+
+
+def _LoadAtlas() -> bool:
+    global _atlas, _rects
+
+    if _rects is not None:
+        return _atlas is not None
+
+    try:
+        from . import atlas
+    except ImportError:
+        _rects = {}
+        return False
+
+    _atlas = wx.Image(io.BytesIO(base64.b64decode(atlas.data)), wx.BITMAP_TYPE_PNG)
+    _rects = atlas.rects
+    return True
+
+
+def GetImage(name: str) -> wx.Image:
+    """
+    Get an embedded image, decoding it on first use.
+    Safe to call from any thread. Don't modify the result, copy it.
+    """
+    image = _images.get(name)
+    if image is not None:
+        return image
+
+    with _lock:
+        if name in _images:
+            return _images[name]
+
+        if _LoadAtlas() and name in _rects:
+            image = _atlas.GetSubImage(wx.Rect(*_rects[name]))
+        else:
+            module, attr = name.split(".", 1)
+            image = getattr(importlib.import_module(f"textworker.{module}"), attr).GetImage()
+
+        _images[name] = image
+        return image
+
+
+def GetBitmap(name: str, scale: float = 1.0) -> wx.Bitmap:
+    """
+    Get a shared bitmap of an embedded image for a scale factor
+    (see ScaleOf). Only call this from the GUI thread.
+    """
+    key = (name, scale)
+    bitmap = _bitmaps.get(key)
+    if bitmap is None:
+        image = GetImage(name)
+        if scale != 1.0:
+            image = image.Scale(round(image.GetWidth() * scale), round(image.GetHeight() * scale),
+                                wx.IMAGE_QUALITY_HIGH)
+        bitmap = _bitmaps[key] = wx.Bitmap(image)
+        if scale != 1.0 and hasattr(bitmap, "SetScaleFactor"):
+            bitmap.SetScaleFactor(scale)
+    return bitmap
+
+
+def GetIcon(name: str) -> wx.Icon:
+    icon = wx.Icon()
+    icon.CopyFromBitmap(GetBitmap(name))
+    return icon
+
+
+def ScaleOf(window: wx.Window | None) -> float:
+    """
+    The scale factor to ask bitmaps for, for a window.
+    """
+    if window and hasattr(window, "GetDPIScaleFactor"):
+        return window.GetDPIScaleFactor()
+    return 1.0
+
+
+def Prewarm(names: list[str], scale: float = 1.0) -> Future:
+    """
+    Decode images on a worker thread, then make their bitmaps on the
+    GUI thread once done. Returns the decoding Future.
+    """
+    def decode():
+        for name in names:
+            try:
+                GetImage(name)
+            except Exception as e:
+                logger.warning(f"Unable to decode {name}: {e}")
+
+    def make_bitmaps(future: Future):
+        for name in names:
+            if name in _images:
+                GetBitmap(name, scale)
+
+    pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="textworker-bitmaps")
+    future = pool.submit(decode)
+    future.add_done_callback(lambda future: wx.CallAfter(make_bitmaps, future))
+    pool.shutdown(wait=False)
+    return future
@@ -0,0 +1,214 @@
+"""
+Settings, parsed once.
+
+libtextworker's GetConfig keeps the parsed INI files, but its callers
+convert values again on each lookup, and set_and_update() rewrites (and
+parses again) the whole file on each change. Settings wraps a GetConfig:
+
+- values are converted once and cached, until the file's mtime changes
+  (Refresh) or a value is set;
+- Option attributes give them a name and a type;
+- Set() notifies listeners right away, and the file is written once
+  things calm down (WRITE_DELAY), atomically.
+"""
+import atexit
+import io
+import os
+import threading
+import typing
+
+from .fileio import AtomicWrite
+from .generic import logger
+from .watcher import Signature
+
+WRITE_DELAY: float = 1.0 # seconds without changes before writing
+
+Listener = typing.Callable[[str | None, str | None], None] # (section, option), both None for "everything"
+
+
+class Option:
+    """
+    A typed setting, as a Settings subclass attribute.
+    The value has the type of fallback, which is used when the option is
+    missing or invalid.
+    """
+
+    def __init__(this, section: str, option: str, fallback: typing.Any):
+        this.Section = section
+        this.Option = option
+        this.Fallback = fallback
+
+    def __get__(this, settings: "Settings | None", owner=None) -> typing.Any:
+        if settings is None:
+            return this
+        return settings.Get(this.Section, this.Option, this.Fallback)
+
+    def __set__(this, settings: "Settings", value: typing.Any):
+        settings.Set(this.Section, this.Option, value)
+
+
+class Settings:
+    """
+    Cached, typed access to a GetConfig, with coalesced writes.
+    """
+
+    def __init__(this, cfg, path: str):
+        this.Config = cfg
+        this.Path = path
+        this.YesValues = [str(value).lower() for value in cfg.yes_values]
+
+        this._cache: dict[tuple[str, str, type], typing.Any] = {}
+        this._listeners: list[Listener] = []
+        this._lock = threading.RLock() # Config changes vs the writer thread
+        this._timer: threading.Timer | None = None
+        this._stamp = Signature(path)
+
+        atexit.register(this.Flush)
+
+    def Get(this, section: str, option: str, fallback: typing.Any) -> typing.Any:
+        """
+        An option's value, converted to fallback's type.
+        fallback itself is returned if the option is missing or invalid.
+        """
+        key = (section, option, type(fallback))
+        try:
+            return this._cache[key]
+        except KeyError:
+            pass
+
+        with this._lock:
+            value = this.Config.get(section, option, raw=True, fallback=None) \
+                    if this.Config.has_section(section) else None
+
+        if value is None or value == "":
+            result = fallback
+        elif isinstance(fallback, bool):
+            result = value.lower() in this.YesValues
+        else:
+            try:
+                result = type(fallback)(value)
+            except (TypeError, ValueError):
+                logger.warning(f"Invalid value for {section}->{option}: {value}, using {fallback}")
+                result = fallback
+
+        this._cache[key] = result
+        return result
+
+    def Set(this, section: str, option: str, value: typing.Any):
+        """
+        Change an option. The file is written a bit later, see Flush.
+        """
+        text = ("yes" if value else "no") if isinstance(value, bool) else str(value)
+
+        with this._lock:
+            if this.Config.has_section(section) and this.Config.get(section, option, raw=True, fallback=None) == text:
+                return
+            if not this.Config.has_section(section):
+                this.Config.add_section(section)
+            this.Config.set(section, option, text)
+
+            for key in [key for key in this._cache if key[:2] == (section, option)]:
+                del this._cache[key]
+
+            if this._timer:
+                this._timer.cancel()
+            this._timer = threading.Timer(WRITE_DELAY, this.Flush)
+            this._timer.daemon = True
+            this._timer.start()
+
+        this._Notify(section, option)
+
+    def Flush(this):
+        """
+        Write pending changes now.
+        """
+        with this._lock:
+            if not this._timer:
+                return
+            this._timer.cancel()
+            this._timer = None
+
+            text = io.StringIO()
+            this.Config.write(text)
+            os.makedirs(os.path.dirname(this.Path), exist_ok=True)
+            AtomicWrite(this.Path, [text.getvalue().encode("utf-8")])
+            this._stamp = Signature(this.Path)
+
+    def Refresh(this) -> bool:
+        """
+        Read the file again if something else changed it.
+        Returns whether it did.
+        """
+        with this._lock:
+            if this._timer or Signature(this.Path) == this._stamp:
+                return False
+            this.Config.read(this.Path, encoding="utf-8")
+            this._stamp = Signature(this.Path)
+            this._cache.clear()
+
+        this._Notify(None, None)
+        return True
+
+    def Reset(this):
+        """
+        Forget cached values (the GetConfig was changed directly).
+        """
+        with this._lock:
+            this._cache.clear()
+            this._stamp = Signature(this.Path)
+        this._Notify(None, None)
+
+    """
+    Change notifications
+    """
+
+    def AddListener(this, listener: Listener):
+        this._listeners.append(listener)
+
+    def RemoveListener(this, listener: Listener):
+        if listener in this._listeners:
+            this._listeners.remove(listener)
+
+    def _Notify(this, section: str | None, option: str | None):
+        for listener in list(this._listeners):
+            listener(section, option)
+
+
+class AppSettings(Settings):
+    AutoUpdate = Option("base", "autoupdate", False)
+    RestoreSession = Option("base", "restore_session", True)
+    NotebookLocation = Option("extensions.textwkr.multiview", "notebook_location", "top")
+    Theme = Option("config-paths.ui", "theme", "")
+    SearchDir = Option("editor", "searchdir", "")
+
+    AutoSave = Option("editor.autosave", "enable", True)
+    AutoSaveTime = Option("editor.autosave", "time", 30)
+
+    MoveTabs = Option("editor.tabs", "move_tabs", True)
+    MiddleClose = Option("editor.tabs", "middle_close", True)
+    CloseOnNoTab = Option("editor.tabs", "close_on_no_tab", False)
+
+
+class EditorSettings(Settings):
+    IndentType = Option("indentation", "type", "spaces")
+    IndentSize = Option("indentation", "size", 4)
+    BackspaceUnindents = Option("indentation", "backspace_unindents", True)
+    ShowGuide = Option("indentation", "show_guide", True)
+
+    WordWrap = Option("editor", "wordwrap", False)
+    ViewWhitespaces = Option("editor", "view_whitespaces", False)
+    ViewEOL = Option("editor", "viewEOL", False) # The stock name, read as "vieweol"
+    LineCount = Option("editor", "line_count", True)
+    DragAndDrop = Option("editor", "dnd_enabled", True)
+    Menu = Option("menu", "enabled", True)
+
+    # See limits
+    LargeSize = Option("editor.limits", "large_size", 8) # MiB
+    HugeSize = Option("editor.limits", "huge_size", 32) # MiB
+    LongLine = Option("editor.limits", "long_line", 64) # KiB
+    VeryLongLine = Option("editor.limits", "very_long_line", 1024) # KiB
+
+
+class ColorSettings(Settings):
+    Auto = Option("color", "auto", True)
+    Background = Option("color", "background", "light")
@@ -0,0 +1,633 @@
+"""
+The Quick Open index: the files under the Explorer folder, without what
+.gitignore files exclude.
+
+The folder is walked with os.scandir on a background thread. The result is
+cached in CACHE_PATH, so the next run has it at once (and checks it in the
+background), then kept up to date by a Watcher.
+
+Matching is fuzzy: the characters of the query must appear in order in the
+path. For each character the index keeps a bitset of the paths containing
+it, split in blocks of BLOCK paths; ANDing these leaves few paths to really
+check and score. Paths are numbered shallowest and shortest first, so when
+a short query matches more paths than can be scored in QUERY_BUDGET, the
+first results are the likely picks; the Search goes on with the rest on
+later steps, between keystrokes.
+"""
+import hashlib
+import heapq
+import os
+import re
+import stat
+import struct
+import threading
+import time
+import zlib
+
+from typing import Callable, Iterator
+
+from .generic import CACHE_PATH, logger
+from .watcher import Watcher
+
+BLOCK: int = 4096 # paths per bitset block
+QUERY_BUDGET: float = 0.015 # seconds per query, at most
+SAVE_DELAY: float = 30.0 # seconds after a change
+
+INDEX_DIR: str = os.path.join(CACHE_PATH, "quickopen")
+ALWAYS_IGNORED: set[str] = {".git", ".hg", ".svn"}
+
+MAGIC: bytes = b"TWQO"
+VERSION: int = 1
+HEADER = struct.Struct("<4sHIII") # magic, version, path count, character count, paths length
+CHAR = struct.Struct("<I")
+
+Chain = tuple[tuple[str, list], ...] # (.gitignore directory, its rules), from the root down
+
+
+"""
+.gitignore
+"""
+
+def _Translate(pattern: str) -> str:
+    """
+    A gitignore glob as a regular expression (for fullmatch).
+    """
+    out = []
+    i, n = 0, len(pattern)
+    while i < n:
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+            continue
+        if pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+            continue
+
+        c = pattern[i]
+        match c:
+            case "*":
+                out.append("[^/]*")
+            case "?":
+                out.append("[^/]")
+            case "\\" if i + 1 < n:
+                i += 1
+                out.append(re.escape(pattern[i]))
+            case "[" if "]" in pattern[i + 2:]:
+                end = pattern.index("]", i + 2)
+                body = pattern[i + 1:end]
+                if body[0] == "!":
+                    body = "^" + body[1:]
+                out.append("[" + body.replace("\\", "\\\\") + "]")
+                i = end
+            case _:
+                out.append(re.escape(c))
+        i += 1
+
+    return "".join(out)
+
+
+def ParseIgnore(text: str) -> list[tuple[Callable, bool, bool, bool]]:
+    """
+    Parse a .gitignore file.
+    Rules are (fullmatch function, negated, directories only, anchored).
+    """
+    rules = []
+    for line in text.splitlines():
+        if not line.strip() or line.startswith("#"):
+            continue
+
+        line = line.rstrip(" ")
+        negate = line.startswith("!")
+        if negate:
+            line = line[1:]
+
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        anchored = "/" in line # Relative to the .gitignore, else a name anywhere below it
+        line = line.lstrip("/")
+
+        if line:
+            rules.append((re.compile(_Translate(line)).fullmatch, negate, dir_only, anchored))
+
+    return rules
+
+
+def IsIgnored(chain: Chain, path: str, is_dir: bool) -> bool:
+    """
+    Check a relative path (with / separators) against the rules which
+    apply to it. The last matching rule wins, deeper files have the last word.
+    """
+    ignored = False
+    name = path.rsplit("/", 1)[-1]
+
+    for base, rules in chain:
+        relative = path[len(base):]
+        for match, negate, dir_only, anchored in rules:
+            if dir_only and not is_dir:
+                continue
+            if match(relative if anchored else name):
+                ignored = not negate
+
+    return ignored
+
+
+def Walk(root: str, rel: str = "", chain: Chain = (),
+         stop: threading.Event | None = None) -> tuple[list[str], dict[str, tuple[Chain, Chain]]]:
+    """
+    List the files under root/rel which are not ignored.
+    chain is what applies to rel from the directories above it.
+
+    Returns the files (relative to root, / separated) and the walked
+    directories, each with its inherited rules and its own (which include
+    its .gitignore).
+    """
+    files = []
+    dirs = {}
+    stack = [(rel, chain)]
+
+    while stack and not (stop and stop.is_set()):
+        rel, inherited = stack.pop()
+        chain = inherited
+        path = os.path.join(root, rel) if rel else root
+
+        try:
+            with os.scandir(path) as it:
+                entries = list(it)
+        except OSError:
+            continue
+
+        if any(entry.name == ".gitignore" for entry in entries):
+            try:
+                with open(os.path.join(path, ".gitignore"), encoding="utf-8", errors="replace") as f:
+                    rules = ParseIgnore(f.read())
+                if rules:
+                    chain = chain + ((rel + "/" if rel else "", rules),)
+            except OSError:
+                pass
+
+        dirs[rel] = (inherited, chain)
+        prefix = rel + "/" if rel else ""
+
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False) # No loops
+            except OSError:
+                continue
+            if is_dir and entry.name in ALWAYS_IGNORED:
+                continue
+
+            relpath = prefix + entry.name
+            if chain and IsIgnored(chain, relpath, is_dir):
+                continue
+
+            if is_dir:
+                stack.append((relpath, chain))
+            else:
+                files.append(relpath)
+
+    return files, dirs
+
+
+"""
+Matching
+"""
+
+def Score(needle: str, path: str, match: re.Match) -> float:
+    """
+    How good a match is: the query in the file name beats the query
+    in the path, which beats scattered characters. Shorter is better.
+    """
+    lower = path.lower()
+    name = lower[lower.rfind("/") + 1:]
+    score = -min(match.end() - match.start() - len(needle), 50) # Gaps
+
+    if needle in name:
+        score += 100 if name.startswith(needle) else 80
+    elif needle in lower:
+        score += 50
+    elif match.re.search(name):
+        score += 30
+
+    return score - len(path) / 100
+
+
+def _Bitsets(paths: list[str | None]) -> dict[str, bytearray]:
+    size = (len(paths) + BLOCK - 1) // BLOCK * BLOCK // 8
+    bits = {}
+    for i, path in enumerate(paths):
+        if path is None:
+            continue
+        byte, bit = i >> 3, 1 << (i & 7)
+        for c in set(path.lower()):
+            row = bits.get(c)
+            if row is None:
+                row = bits[c] = bytearray(size)
+            row[byte] |= bit
+    return bits
+
+
+def _Blocks(row: bytes) -> list[int]:
+    step = BLOCK // 8
+    return [int.from_bytes(row[start:start + step], "little") for start in range(0, len(row), step)]
+
+
+class Search:
+    """
+    A running query. Each Step() spends up to a time budget on it, so a
+    query matching a lot can be refined between keystrokes; Results are
+    the best paths (relative to the index root) found so far, best first.
+    """
+
+    def __init__(this, index: "FileIndex", text: str, limit: int = 50):
+        this.Index = index
+        this.Needle = "".join(text.lower().split()).replace("\\", "/")
+        this.Limit = limit
+        this.Done = not this.Needle
+        this._Restart()
+
+    def _Restart(this):
+        index = this.Index
+        this.Generation = index._generation
+        this._heap: list[tuple[float, int]] = [] # (score, -id), the worst on top
+        this._matches: list[int] = []
+        this._candidates = None
+
+        if this.Done:
+            return
+
+        try:
+            rows = [index._bits[c] for c in set(this.Needle)]
+        except KeyError:
+            this.Done = True # A character no path has
+            return
+
+        # Typing more only removes matches: look at the last ones
+        last = index._last
+        if last and this.Needle.startswith(last[0]) and last[1] == this.Generation:
+            this._candidates = iter(last[2])
+        else:
+            this._candidates = index._Candidates(rows)
+
+        this._search = re.compile(".*?".join(map(re.escape, this.Needle)), re.IGNORECASE).search
+
+    @property
+    def Results(this) -> list[str]:
+        paths = this.Index._paths
+        return [paths[-i] for score, i in sorted(this._heap, reverse=True)]
+
+    def Step(this, budget: float = QUERY_BUDGET) -> bool:
+        """
+        Go on for up to budget seconds. Returns whether it's done.
+        """
+        if this.Done:
+            return True
+
+        index = this.Index
+        with index._lock:
+            if index._generation != this.Generation:
+                this._Restart() # The index changed under us
+                if this.Done:
+                    return True
+
+            paths = index._paths
+            search = this._search
+            heap = this._heap
+            matches = this._matches
+            deadline = time.perf_counter() + budget
+
+            for n, i in enumerate(this._candidates):
+                path = paths[i]
+                found = path is not None and search(path)
+                if found:
+                    matches.append(i)
+                    entry = (Score(this.Needle, path, found), -i)
+                    if len(heap) < this.Limit:
+                        heapq.heappush(heap, entry)
+                    elif entry > heap[0]:
+                        heapq.heapreplace(heap, entry)
+                if not n & 255 and time.perf_counter() > deadline:
+                    return False
+
+            this.Done = True
+            index._last = (this.Needle, this.Generation, matches)
+            return True
+
+
+def CacheFile(root: str) -> str:
+    name = hashlib.blake2b(root.encode("utf-8", "surrogateescape"), digest_size=8).hexdigest()
+    return os.path.join(INDEX_DIR, name + ".idx")
+
+
+class FileIndex:
+    """
+    Indexes a folder in the background, see the module documentation.
+    callback is called (on a worker thread) whenever the content changes.
+    """
+
+    def __init__(this, root: str, callback: Callable[[], None] | None = None):
+        this.Root = os.path.abspath(root)
+        this.Callback = callback
+        this.Ready = threading.Event() # Paths are there to query, maybe from the cache
+        this.Complete = threading.Event() # and they are up to date
+
+        this._lock = threading.RLock()
+        this._paths: list[str | None] = [] # None for removed ones
+        this._ids: dict[str, int] = {}
+        this._bits: dict[str, list[int]] = {}
+        this._dirs: dict[str, tuple[Chain, Chain]] = {}
+        this._generation = 0 # Changes with the paths
+        this._last: tuple[str, int, list[int]] | None = None # Last finished query, its generation and matches
+
+        this._stop = threading.Event()
+        this._dirty = False
+        this._save_timer: threading.Timer | None = None
+        this._watcher: Watcher | None = None
+
+        this._thread = threading.Thread(target=this._Run, name="textworker-index", daemon=True)
+        this._thread.start()
+
+    def __len__(this) -> int:
+        return len(this._ids)
+
+    def Paths(this) -> list[str]:
+        """
+        Every indexed path, relative to Root.
+        """
+        with this._lock:
+            return [path for path in this._paths if path is not None]
+
+    def Close(this):
+        """
+        Stop indexing and watching, write the cache if needed.
+        """
+        this._stop.set()
+        if this._watcher:
+            this._watcher.Stop()
+        if this._save_timer:
+            this._save_timer.cancel()
+        if this._dirty and this.Complete.is_set():
+            this.Save()
+
+    """
+    Content
+    """
+
+    def _Set(this, paths: list[str | None], bits: dict[str, bytearray]):
+        with this._lock:
+            this._paths = paths
+            this._ids = {path: i for i, path in enumerate(paths) if path is not None}
+            this._bits = {c: _Blocks(row) for c, row in bits.items()}
+            this._generation += 1
+
+    def _Add(this, path: str):
+        with this._lock:
+            if path in this._ids:
+                return
+            i = this._ids[path] = len(this._paths)
+            this._paths.append(path)
+
+            block, bit = divmod(i, BLOCK)
+            for c in set(path.lower()):
+                row = this._bits.setdefault(c, [])
+                if len(row) <= block:
+                    row.extend([0] * (block + 1 - len(row)))
+                row[block] |= 1 << bit
+            this._generation += 1
+
+    def _Remove(this, path: str):
+        with this._lock:
+            i = this._ids.pop(path, None)
+            if i is None:
+                return
+            this._paths[i] = None
+
+            block, bit = divmod(i, BLOCK)
+            for c in set(path.lower()):
+                this._bits[c][block] &= ~(1 << bit)
+            this._generation += 1
+
+    def _Forget(this, rel: str):
+        """
+        Remove a file, or a directory with everything under it.
+        """
+        this._Remove(rel)
+        prefix = rel + "/" if rel else ""
+        with this._lock:
+            if rel not in this._dirs:
+                return
+            for path in [path for path in this._ids if path.startswith(prefix)]:
+                this._Remove(path)
+            gone = [d for d in this._dirs if d == rel or d.startswith(prefix)]
+            for d in gone:
+                del this._dirs[d]
+
+        if this._watcher:
+            for d in gone:
+                this._watcher.UnwatchDir(os.path.join(this.Root, d))
+
+    def _Merge(this, files: list[str], dirs: dict):
+        with this._lock:
+            for path in files:
+                this._Add(path)
+            this._dirs.update(dirs)
+        if this._watcher:
+            for d in dirs:
+                this._watcher.WatchDir(os.path.join(this.Root, d))
+
+    def _Changed(this):
+        this._dirty = True
+        if this.Callback:
+            this.Callback()
+
+    """
+    Query
+    """
+
+    def _Candidates(this, rows: list[list[int]]) -> Iterator[int]:
+        """
+        Numbers of the paths having all the characters of rows.
+        """
+        for block in range(min(map(len, rows))):
+            mask = rows[0][block]
+            for row in rows[1:]:
+                mask &= row[block]
+                if not mask:
+                    break
+
+            base = block * BLOCK
+            while mask:
+                low = mask & -mask
+                yield base + low.bit_length() - 1
+                mask ^= low
+
+    def Query(this, text: str, limit: int = 50) -> "Search":
+        """
+        Start looking for text (spaces are ignored), and spend up to
+        QUERY_BUDGET on it. See Search.
+        """
+        search = Search(this, text, limit)
+        search.Step()
+        return search
+
+    """
+    Cache
+    """
+
+    def Save(this):
+        with this._lock:
+            paths = ["" if path is None else path for path in this._paths]
+            size = (len(paths) + BLOCK - 1) // BLOCK
+            bits = [(c, b"".join(block.to_bytes(BLOCK // 8, "little") for block in row)
+                        + bytes((size - len(row)) * BLOCK // 8))
+                    for c, row in this._bits.items()]
+            this._dirty = False
+
+        text = "\n".join([this.Root] + paths).encode("utf-8", "surrogateescape")
+        body = b"".join([text] + [CHAR.pack(ord(c)) + row for c, row in bits])
+
+        os.makedirs(INDEX_DIR, exist_ok=True)
+        path = CacheFile(this.Root)
+        with open(path + ".tmp", "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, len(paths), len(bits), len(text)))
+            f.write(zlib.compress(body, 1))
+        os.replace(path + ".tmp", path)
+
+    def Load(this) -> bool:
+        try:
+            with open(CacheFile(this.Root), "rb") as f:
+                data = f.read()
+            magic, version, count, chars, length = HEADER.unpack_from(data)
+            if magic != MAGIC or version != VERSION:
+                return False
+            body = memoryview(zlib.decompress(data[HEADER.size:]))
+        except (OSError, struct.error, zlib.error):
+            return False
+
+        lines = bytes(body[:length]).decode("utf-8", "surrogateescape").split("\n")
+        if lines[0] != this.Root or len(lines) != count + 1:
+            return False
+        paths = [path or None for path in lines[1:]]
+
+        row_size = (count + BLOCK - 1) // BLOCK * BLOCK // 8
+        offset = length
+        bits = {}
+        for i in range(chars):
+            (c,) = CHAR.unpack_from(body, offset)
+            offset += CHAR.size
+            bits[chr(c)] = body[offset:offset + row_size]
+            offset += row_size
+
+        this._Set(paths, bits)
+        return True
+
+    def ScheduleSave(this):
+        if this._save_timer:
+            this._save_timer.cancel()
+        this._save_timer = threading.Timer(SAVE_DELAY, this.Save)
+        this._save_timer.daemon = True
+        this._save_timer.start()
+
+    """
+    Worker threads
+    """
+
+    def _Run(this):
+        try:
+            cached = this.Load()
+            if cached:
+                logger.debug(f"Quick open: {len(this)} cached paths for {this.Root}")
+                this.Ready.set()
+                this._Changed()
+
+            start = time.perf_counter()
+            files, dirs = Walk(this.Root, stop=this._stop)
+            if this._stop.is_set():
+                return
+
+            if cached and len(this._ids) * 4 >= len(this._paths) * 3:
+                # Few removed paths: update what's there, numbers stay valid
+                found = set(files)
+                with this._lock:
+                    for path in [path for path in this._ids if path not in found]:
+                        this._Remove(path)
+                    for path in files:
+                        this._Add(path)
+                    this._dirs = dirs
+            else:
+                files.sort(key=lambda path: (path.count("/"), len(path)))
+                bits = _Bitsets(files)
+                this._Set(files, bits)
+                with this._lock:
+                    this._dirs = dirs
+
+            logger.debug(f"Quick open: indexed {len(this)} paths under {this.Root} "
+                         f"in {time.perf_counter() - start:.2f}s")
+            this.Ready.set()
+            this.Complete.set()
+            this._Changed()
+            this.Save()
+
+            this._watcher = Watcher(this._OnChanges)
+            for d in dirs:
+                if this._stop.is_set():
+                    return
+                this._watcher.WatchDir(os.path.join(this.Root, d))
+        except Exception as e:
+            logger.exception(f"Unable to index {this.Root}: {e}")
+
+    def _Update(this, rel: str, name: str):
+        with this._lock:
+            if rel not in this._dirs:
+                return # Ignored or removed meanwhile
+            inherited, chain = this._dirs[rel]
+
+        relpath = (rel + "/" if rel else "") + name
+        if name == ".gitignore":
+            this._Reindex(rel, inherited)
+            return
+
+        try:
+            is_dir = stat.S_ISDIR(os.lstat(os.path.join(this.Root, relpath)).st_mode)
+        except OSError:
+            this._Forget(relpath)
+            return
+
+        if (is_dir and name in ALWAYS_IGNORED) or IsIgnored(chain, relpath, is_dir):
+            this._Forget(relpath)
+        elif not is_dir:
+            this._Add(relpath)
+        elif relpath not in this._dirs:
+            this._Merge(*Walk(this.Root, relpath, chain, this._stop))
+
+    def _Reindex(this, rel: str, inherited: Chain):
+        this._Forget(rel)
+        this._Merge(*Walk(this.Root, rel, inherited, this._stop))
+
+    def _OnChanges(this, changes: set[tuple[str, str]]):
+        for directory, name in changes:
+            rel = os.path.relpath(directory, this.Root).replace(os.sep, "/")
+            if rel == ".":
+                rel = ""
+            elif rel.startswith(".."):
+                continue
+
+            if name:
+                this._Update(rel, name)
+                continue
+
+            # Unknown change in the directory: compare its entries
+            prefix = rel + "/" if rel else ""
+            try:
+                names = set(os.listdir(directory))
+            except OSError:
+                names = set()
+            with this._lock:
+                for path in list(this._ids) + list(this._dirs):
+                    if path.startswith(prefix) and path and "/" not in path[len(prefix):]:
+                        names.add(path[len(prefix):])
+            for name in names:
+                this._Update(rel, name)
+
+        this._Changed()
+        this.ScheduleSave()
@@ -0,0 +1,65 @@
+"""
+File writing helpers shared by saving, autosave and caches.
+"""
+import os
+import tempfile
+
+from typing import Callable, Iterable
+
+WRITE_CHUNK: int = 1 << 20 # 1 MiB
+
+
+def Chunked(data, size: int = WRITE_CHUNK):
+    """
+    Split a bytes-like object into memoryview chunks (no copy).
+    """
+    view = memoryview(data)
+    for start in range(0, len(view), size):
+        yield view[start:start + size]
+
+
+def AtomicWrite(path: str, chunks: Iterable, before_replace: Callable[[], None] | None = None):
+    """
+    Write chunks to path without ever leaving a half-written file behind.
+
+    The data goes to a temporary file in the same directory, which is
+    flushed, fsync()-ed and then renamed over path. The permissions of an
+    existing target are kept.
+    @param before_replace: Called right before the rename (e.g to close a
+                           memory map of the target, which Windows requires)
+    """
+    path = os.path.abspath(path)
+    directory = os.path.dirname(path)
+    fd, temp = tempfile.mkstemp(prefix=".textworker-", dir=directory)
+
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+            chunk = None # Don't keep a view of the source alive
+            f.flush()
+            os.fsync(f.fileno())
+
+        if os.path.exists(path):
+            os.chmod(temp, os.stat(path).st_mode & 0o7777)
+
+        if before_replace:
+            before_replace()
+        os.replace(temp, path)
+    except BaseException:
+        if os.path.exists(temp):
+            os.remove(temp)
+        raise
+
+    # Make the rename itself durable
+    if hasattr(os, "O_DIRECTORY"):
+        try:
+            dirfd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        except OSError:
+            return
+        try:
+            os.fsync(dirfd)
+        except OSError:
+            pass
+        finally:
+            os.close(dirfd)
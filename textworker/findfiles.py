@@ -0,0 +1,206 @@
+"""
+Find in files.
+
+Files are searched in batches by a process pool, so a big search uses
+every core and leaves the GUI process alone. Each file is memory mapped:
+binary files (a NUL byte near the start) are skipped, then a literal
+which any match must contain is looked for with mmap.find before the
+regular expression runs at all, on the decoded text (so that case
+folding, word characters and boundaries follow Unicode).
+
+This module only uses the standard library: it is what the worker
+processes import.
+"""
+import mmap
+import os
+import re
+import threading
+
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Callable, Iterable
+
+try:
+    from re import _parser as sre_parse
+    from re import _constants as sre_constants
+except ImportError: # Python < 3.11
+    import sre_parse
+    import sre_constants
+
+BATCH: int = 64 # files per task
+MAX_FILE_HITS: int = 1000
+MAX_HITS: int = 100000
+BINARY_PROBE: int = 8192 # bytes looked at for NUL
+LINE_PREVIEW: int = 200 # characters
+
+Hit = tuple[str, int, int, int, str] # path, line (0-based), column and length (bytes), line text
+
+_pool: ProcessPoolExecutor | None = None
+
+
+def GetPool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=os.cpu_count() or 1)
+    return _pool
+
+
+def RequiredLiteral(pattern: str, flags: int = 0) -> bytes:
+    """
+    The longest literal text that every match of pattern contains,
+    b"" if there is none (or it can't be told).
+    """
+    try:
+        parsed = sre_parse.parse(pattern, flags)
+    except re.error:
+        return b""
+
+    best = run = ""
+    for op, value in parsed:
+        if op == sre_constants.LITERAL:
+            run += chr(value)
+            if len(run) > len(best):
+                best = run
+        else:
+            run = ""
+
+    # mmap.find can't ignore the case
+    if flags & re.IGNORECASE and best.lower() != best.upper():
+        return b""
+    return best.encode("utf-8")
+
+
+def Compile(text: str, regex: bool = False, case: bool = False) -> tuple[str, int, bytes]:
+    """
+    Turn what the user typed into (pattern, flags, literal) for SearchFiles.
+    Raises re.error for an invalid expression.
+    """
+    pattern = text if regex else re.escape(text)
+    flags = re.MULTILINE | (0 if case else re.IGNORECASE)
+    re.compile(pattern, flags)
+    return pattern, flags, RequiredLiteral(pattern, flags)
+
+
+def SearchFile(path: str, search: Callable, literal: bytes) -> list[Hit]:
+    """
+    Invalid UTF-8 is decoded as surrogates (surrogateescape), which encode
+    back to the same bytes: columns and lengths stay byte offsets.
+    """
+    try:
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return []
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return []
+
+    hits = []
+    with mm:
+        if mm.find(b"\0", 0, BINARY_PROBE) != -1:
+            return []
+        if literal and mm.find(literal) == -1:
+            return []
+
+        content = mm[:].decode("utf-8", "surrogateescape")
+
+    def size(text: str) -> int:
+        return len(text.encode("utf-8", "surrogateescape"))
+
+    line = 0
+    counted = 0 # Offset up to which lines are counted
+    for match in search(content):
+        start = match.start()
+        line += content.count("\n", counted, start)
+        counted = start
+
+        begin = content.rfind("\n", 0, start) + 1
+        end = content.find("\n", start)
+        if end == -1:
+            end = len(content)
+        text = content[begin:min(end, begin + LINE_PREVIEW)]
+        text = text.encode("utf-8", "surrogateescape").decode("utf-8", "replace")
+
+        hits.append((path, line, size(content[begin:start]), size(match.group()), text.rstrip("\r")))
+        if len(hits) >= MAX_FILE_HITS:
+            break
+
+    return hits
+
+
+def SearchFiles(paths: list[str], pattern: str, flags: int, literal: bytes) -> list[Hit]:
+    """
+    Search a batch of files. Runs in a worker process.
+    """
+    search = re.compile(pattern, flags).finditer
+    hits = []
+    for path in paths:
+        hits += SearchFile(path, search, literal)
+    return hits
+
+
+class FindJob:
+    """
+    A search: once started, files from paths are handed to the process pool
+    in batches of BATCH (never many more than there are workers, so
+    cancelling is quick), and callback(job, hits) gets the hits as they
+    come, on the coordinating thread. done(job, count, cancelled) is called
+    at the end.
+    """
+
+    def __init__(this, paths: Callable[[], Iterable[str]], text: str, regex: bool, case: bool,
+                 callback: Callable[["FindJob", list[Hit]], None], done: Callable[["FindJob", int, bool], None]):
+        this.Pattern, this.Flags, this.Literal = Compile(text, regex, case)
+        this.Paths = paths
+        this.Callback = callback
+        this.Finished = done
+        this.Count = 0
+        this._cancel = threading.Event()
+
+    def Start(this):
+        threading.Thread(target=this._Run, name="textworker-find", daemon=True).start()
+
+    def Cancel(this):
+        this._cancel.set()
+
+    @property
+    def Cancelled(this) -> bool:
+        return this._cancel.is_set()
+
+    def _Run(this):
+        pool = GetPool()
+        limit = (os.cpu_count() or 1) * 2
+        running: set[Future] = set()
+        batch = []
+
+        def collect(block: bool):
+            nonlocal running
+            finished, running = wait(running, timeout=None if block else 0, return_when=FIRST_COMPLETED)
+            for future in finished:
+                if future.cancelled() or future.exception():
+                    continue
+                hits = future.result()[:MAX_HITS - this.Count]
+                if hits and not this.Cancelled:
+                    this.Count += len(hits)
+                    this.Callback(this, hits)
+            if this.Count >= MAX_HITS:
+                this._cancel.set()
+
+        try:
+            for path in this.Paths():
+                if this.Cancelled:
+                    break
+                batch.append(path)
+                if len(batch) < BATCH:
+                    continue
+
+                running.add(pool.submit(SearchFiles, batch, this.Pattern, this.Flags, this.Literal))
+                batch = []
+                collect(block=len(running) >= limit)
+
+            if batch and not this.Cancelled:
+                running.add(pool.submit(SearchFiles, batch, this.Pattern, this.Flags, this.Literal))
+            while running and not this.Cancelled:
+                collect(block=True)
+        finally:
+            for future in running:
+                future.cancel()
+            this.Finished(this, this.Count, this.Cancelled and this.Count < MAX_HITS)
@@ -1,3 +1,4 @@
+import functools
 import logging
 import os
 import typing
@@ -9,6 +10,8 @@ from libtextworker.interface.wx import ColorManager
 from libtextworker.versioning import is_development_version_from_project
 from libtextworker import EDITOR_DIR, THEMES_DIR, TOPLV_DIR
 
+from . import logs
+
 
 currPath = GetCurrentDir(__file__, True)
 clrCall: ColorManager
@@ -20,17 +23,18 @@ _theme_load: str
 global_settings: GetConfig
 editorCfg: GetConfig
 
+# Cached, typed views of the above (and of clrCall), see config
+settings: "AppSettings"
+editorSettings: "EditorSettings"
+colorSettings: "ColorSettings"
+
 # Setup a logger
 logger = Logger("textworker", logging.INFO)
 logger.UseGUIToolKit("wx")
 logging.captureWarnings(True)
 
-## Log to file
-filehdlr = logging.FileHandler(os.path.expanduser("~/.logs/textworker.log"))
-filehdlr.setFormatter(formatter)
-
-logger.addHandler(filehdlr)
-logger.addHandler(strhdlr)
+## Log to a rotated file and to the console, on a background thread
+logs.Start(logger, os.path.expanduser("~/.logs/textworker.log"), formatter, strhdlr)
 
 CONFIGS_PATH = os.path.expanduser(
     "~/.config/textworker/configs{}.ini".format(
@@ -39,10 +43,19 @@ CONFIGS_PATH = os.path.expanduser(
 )
 DATA_PATH: str = str(currPath / "data")
 UIRC_DIR: str = str(currPath / "ui")
+CACHE_PATH: str = os.path.expanduser("~/.cache/textworker")
+
+def get_setting(section: str, option: str, fallback: typing.Any, cfg: "Settings | None" = None) -> typing.Any:
+    """
+    Get an option which may not exist in older configuration files.
+    The value is converted to fallback's type; fallback itself is returned
+    if the option is missing or invalid. See config.Settings.Get.
+    """
+    return (cfg or settings).Get(section, option, fallback)
 
 def find_resource(t: typing.Literal["ui", "editor"]) -> str:
-    _name = global_settings.Get(f'config-paths.{t}', 'name' if t == "editor" else "theme", True, True, True, True)
-    _path = global_settings.Get(f'config-paths.{t}', 'path', True, True, True, True)
+    _name = settings.Get(f'config-paths.{t}', 'name' if t == "editor" else "theme", "default")
+    _path = settings.Get(f'config-paths.{t}', 'path', "unchanged")
 
     _name += ".ini"
 
@@ -53,18 +66,22 @@ def find_resource(t: typing.Literal["ui", "editor"]) -> str:
 
     return CraftItems(_path, _name)
 
-def ready():
+def read_settings():
     """
-    Get ready for the application window to start.
-    It must be ran before the main window module import.
+    Read the application and editor settings. Doesn't touch wx, so it can
+    run on a worker thread (see main.start_app); ready() does the rest.
     """
     global _theme_load, _editor_config_load
-    global clrCall, configs, global_settings, editorCfg
+    global configs, global_settings, editorCfg
+    global settings, editorSettings
     global THEMES_DIR, EDITOR_DIR, TOPLV_DIR
 
+    from .config import AppSettings, EditorSettings
+
     configs = open(CraftItems(DATA_PATH, "appconfig.ini"), "r").read()
 
     global_settings = GetConfig(defaults=configs, load=CONFIGS_PATH)
+    settings = AppSettings(global_settings, CONFIGS_PATH)
 
     TOPLV_DIR = os.path.dirname(CONFIGS_PATH)
     EDITOR_DIR = CraftItems(TOPLV_DIR, "editorconfigs")
@@ -79,8 +96,26 @@ def ready():
     logger.info(f"Themes directory: {THEMES_DIR}")
     logger.info(f"Editor settings directory: {EDITOR_DIR}")
 
-    clrCall = ColorManager(default_configs=stock_ui_configs, customfilepath=_theme_load)
     editorCfg = GetConfig(defaults=stock_editor_configs, load=_editor_config_load)
+    editorSettings = EditorSettings(editorCfg, _editor_config_load)
+
+def ready():
+    """
+    Get ready for the application window to start.
+    It must be ran before the main window module import, on the GUI thread.
+    """
+    global clrCall, colorSettings
+
+    from .config import ColorSettings
+
+    if "settings" not in globals():
+        read_settings()
+
+    clrCall = ColorManager(default_configs=stock_ui_configs, customfilepath=_theme_load)
+    colorSettings = ColorSettings(clrCall, _theme_load)
+
+    # Asked for by every window configured: computed once, until ui.profile.Recompile
+    clrCall.GetColor = functools.lru_cache(maxsize=1)(clrCall.GetColor)
 
     import wx.stc
     logger.debug("Setting background + foregroud functions for editors...")
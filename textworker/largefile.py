@@ -0,0 +1,408 @@
+"""
+Large file support: memory-mapped documents, a persistent sparse line
+index and a piece table for edits.
+Nothing here touches wx, so it can be used from worker threads.
+"""
+import hashlib
+import mmap
+import os
+import struct
+import threading
+
+from array import array
+from bisect import bisect_right
+from itertools import accumulate
+
+from textworker.fileio import AtomicWrite
+from textworker.generic import CACHE_PATH, logger
+
+SCAN_CHUNK: int = 8 << 20 # 8 MiB
+STRIDE: int = 256 # Keep the offset of every STRIDE-th line
+INDEX_MAGIC: bytes = b"TWLIDX1\0"
+INDEX_HEADER = struct.Struct("<8sQqIQ") # magic, size, mtime_ns, stride, line count
+INDEX_DIR: str = os.path.join(CACHE_PATH, "lineindex")
+
+
+def _AddLines(checkpoints: array, data, pos: int, lines: int, stride: int) -> int:
+    """
+    Add the checkpoints found in data (which starts at offset pos, after
+    lines line starts) to checkpoints.
+    @return The number of line starts found so far
+    """
+    parts = bytes(data).split(b"\n")
+    starts = [pos + offset for offset in accumulate(len(part) + 1 for part in parts[:-1])]
+
+    first = (-(lines + 1)) % stride
+    checkpoints.extend(starts[first::stride])
+    return lines + len(starts)
+
+
+class LineIndex:
+    """
+    Sparse newline-offset index of a memory-mapped file.
+
+    Only the start offset of every STRIDE-th line is kept, so a 4 GB file
+    costs a few hundred kilobytes. Finding a line is a list lookup plus a
+    scan over at most STRIDE lines: constant time.
+    The index is built on a background thread and cached on disk, keyed by
+    the file size and modification time. Checkpoints grow as the scan goes,
+    so lookups near the start of the file are fast right away.
+    """
+
+    def __init__(this, path: str, mapping: mmap.mmap | bytes, stride: int = STRIDE):
+        this.Path = path
+        this.Map = mapping
+        this.Stride = stride
+        this.Checkpoints = array("q", [0])
+        this.LineCount: int = -1 # Unknown until Ready is set
+        this.Ready = threading.Event()
+        this._cancel = threading.Event()
+
+        stat = os.stat(path)
+        this._key = (stat.st_size, stat.st_mtime_ns)
+
+    @property
+    def CacheFile(this) -> str:
+        name = hashlib.sha1(os.path.abspath(this.Path).encode("utf-8")).hexdigest()
+        return os.path.join(INDEX_DIR, name + ".idx")
+
+    def Load(this) -> bool:
+        """
+        Try to load the index from the cache.
+        """
+        try:
+            with open(this.CacheFile, "rb") as f:
+                magic, size, mtime, stride, count = INDEX_HEADER.unpack(f.read(INDEX_HEADER.size))
+                if magic != INDEX_MAGIC or (size, mtime) != this._key or stride != this.Stride:
+                    return False
+                checkpoints = array("q")
+                checkpoints.frombytes(f.read())
+        except (OSError, struct.error, ValueError):
+            return False
+
+        this.Checkpoints = checkpoints
+        this.LineCount = count
+        this.Ready.set()
+        return True
+
+    def Store(this):
+        os.makedirs(INDEX_DIR, exist_ok=True)
+        try:
+            with open(this.CacheFile, "wb") as f:
+                f.write(INDEX_HEADER.pack(INDEX_MAGIC, *this._key, this.Stride, this.LineCount))
+                this.Checkpoints.tofile(f)
+        except OSError as e:
+            logger.warning(f"Unable to store the line index of {this.Path}: {e}")
+
+    def Build(this, background: bool = True):
+        """
+        Load the index from the cache, or scan the file for it.
+        """
+        if this.Load():
+            return
+
+        if background:
+            threading.Thread(target=this._Scan, daemon=True).start()
+        else:
+            this._Scan()
+
+    def Adopt(this, checkpoints: array, count: int):
+        """
+        Use an index built elsewhere (e.g while the file was written).
+        """
+        this.Checkpoints = checkpoints
+        this.LineCount = count
+        this.Ready.set()
+        this.Store()
+
+    def Cancel(this):
+        this._cancel.set()
+
+    def _Scan(this):
+        size = len(this.Map)
+        lines = 0 # Line starts found so far, not counting line 0
+        this.Checkpoints = checkpoints = array("q", [0]) # Filled in place
+
+        for pos in range(0, size, SCAN_CHUNK):
+            if this._cancel.is_set():
+                return
+            lines = _AddLines(checkpoints, this.Map[pos:pos + SCAN_CHUNK], pos, lines, this.Stride)
+
+        this.LineCount = lines + 1
+        this.Ready.set()
+        this.Store()
+
+    def Offset(this, line: int) -> int:
+        """
+        Byte offset of the start of a (0-based) line in the original file.
+        Works while the index is still being built, just slower.
+        """
+        checkpoints = this.Checkpoints
+        slot = min(line // this.Stride, len(checkpoints) - 1)
+        offset = checkpoints[slot]
+
+        for _ in range(line - slot * this.Stride):
+            found = this.Map.find(b"\n", offset)
+            if found == -1:
+                return len(this.Map)
+            offset = found + 1
+
+        return offset
+
+    def LineAt(this, offset: int) -> int:
+        """
+        The (0-based) line containing the given byte offset.
+        Doesn't wait for the index: past the scanned part, lines are counted.
+        """
+        checkpoints = this.Checkpoints
+        slot = bisect_right(checkpoints, offset) - 1
+        line = slot * this.Stride
+
+        for pos in range(checkpoints[slot], offset, SCAN_CHUNK):
+            line += this.Map[pos:min(offset, pos + SCAN_CHUNK)].count(b"\n")
+        return line
+
+
+class PieceTable:
+    """
+    A piece table over a read-only buffer (usually a memory map).
+    Unchanged ranges are never copied: saving splices them straight from
+    the original buffer.
+    """
+
+    ORIGINAL = 0
+    ADDED = 1
+
+    def __init__(this, original: mmap.mmap | bytes):
+        this.Original = original
+        this.Added = bytearray()
+        this.Pieces: list[tuple[int, int, int]] = [] # (source, start, length)
+
+        if len(original):
+            this.Pieces.append((this.ORIGINAL, 0, len(original)))
+
+    def __len__(this) -> int:
+        return sum(piece[2] for piece in this.Pieces)
+
+    @property
+    def Modified(this) -> bool:
+        return this.Pieces != ([(this.ORIGINAL, 0, len(this.Original))] if len(this.Original) else [])
+
+    def Replace(this, start: int, end: int, data: bytes):
+        """
+        Replace the [start, end) range of the document with data.
+        """
+        result = []
+        pos = 0
+        inserted = False
+
+        for source, pstart, length in this.Pieces:
+            pend = pos + length
+
+            if pend <= start or pos >= end:
+                if pos >= end and not inserted:
+                    this._Insert(result, data)
+                    inserted = True
+                result.append((source, pstart, length))
+            else:
+                if pos < start:
+                    result.append((source, pstart, start - pos))
+                if not inserted:
+                    this._Insert(result, data)
+                    inserted = True
+                if pend > end:
+                    result.append((source, pstart + end - pos, pend - end))
+
+            pos = pend
+
+        if not inserted:
+            this._Insert(result, data)
+
+        this.Pieces = result
+
+    def _Insert(this, pieces: list, data: bytes):
+        if data:
+            pieces.append((this.ADDED, len(this.Added), len(data)))
+            this.Added += data
+
+    def Chunks(this, start: int = 0, end: int | None = None):
+        """
+        Yield the document between start and end as bytes-like chunks.
+        Original ranges are memoryviews over the mapping (no copy).
+        """
+        if end is None:
+            end = len(this)
+
+        pos = 0
+        original = memoryview(this.Original)
+
+        for source, pstart, length in this.Pieces:
+            pend = pos + length
+            if pend > start and pos < end:
+                lo = max(start, pos) - pos + pstart
+                hi = min(end, pend) - pos + pstart
+                if source == this.ORIGINAL:
+                    for chunk in range(lo, hi, SCAN_CHUNK):
+                        yield original[chunk:min(hi, chunk + SCAN_CHUNK)]
+                else:
+                    yield bytes(this.Added[lo:hi])
+            if pend >= end:
+                break
+            pos = pend
+
+    def Read(this, start: int, end: int) -> bytes:
+        return b"".join(this.Chunks(start, end))
+
+
+class LargeDocument:
+    """
+    A memory-mapped document: a LineIndex for the original file, and a
+    PieceTable for the edits made on top of it.
+    """
+
+    def __init__(this, path: str):
+        this.Path = path
+        this._Map()
+        this.Table = PieceTable(this.Map)
+
+    def _Map(this, index: tuple[array, int] | None = None, stride: int = STRIDE):
+        """
+        Map the file, and index it (or use index: checkpoints every stride
+        lines, and line count).
+        """
+        this._file = open(this.Path, "rb")
+
+        if os.fstat(this._file.fileno()).st_size:
+            this.Map = mmap.mmap(this._file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            this.Map = b"" # mmap refuses empty files
+
+        this.Index = LineIndex(this.Path, this.Map, stride)
+        if index:
+            this.Index.Adopt(*index)
+        else:
+            this.Index.Build()
+
+    @property
+    def Modified(this) -> bool:
+        return this.Table.Modified
+
+    @property
+    def LineCount(this) -> int:
+        """
+        Number of lines in the edited document, -1 if the index is not ready yet.
+        """
+        if not this.Index.Ready.is_set():
+            return -1
+        if not this.Modified:
+            return this.Index.LineCount
+
+        count = 1
+        for source, start, length in this.Table.Pieces:
+            if source == PieceTable.ORIGINAL:
+                count += this.Index.LineAt(start + length) - this.Index.LineAt(start)
+            else:
+                count += this.Table.Added.count(b"\n", start, start + length)
+        return count
+
+    def LineOffset(this, line: int) -> int:
+        """
+        Byte offset of a (0-based) line in the edited document.
+        Only looks as far as that line, so it doesn't wait for the index.
+        """
+        if not this.Modified:
+            return this.Index.Offset(line)
+
+        pos = 0
+        for source, start, length in this.Table.Pieces:
+            if source == PieceTable.ORIGINAL:
+                if line == 0:
+                    return pos
+                first = this.Index.LineAt(start)
+                found = this.Index.Offset(first + line)
+                if found < start + length:
+                    return pos + found - start
+                # Newlines inside this piece
+                count = this.Index.LineAt(start + length) - first
+                if line <= count:
+                    return pos + length
+            else:
+                count = this.Table.Added.count(b"\n", start, start + length)
+                if line <= count:
+                    offset = start - 1
+                    for _ in range(line):
+                        offset = this.Table.Added.find(b"\n", offset + 1)
+                    return pos + offset + 1 - start
+            line -= count
+            pos += length
+
+        return pos
+
+    def ReadLines(this, first: int, count: int, limit: int | None = None) -> tuple[int, int, bytes]:
+        """
+        Read count lines starting at first, and no more than limit bytes:
+        the range then ends after its last whole line, or inside the first
+        one if it's that long (but not inside an UTF-8 character).
+        Returns the start and end offset of the range, and its content.
+        """
+        start = this.LineOffset(first)
+        end = this.LineOffset(first + count)
+
+        if limit is not None and end - start > limit:
+            data = this.Table.Read(start, start + limit + 1)
+            cut = data.rfind(b"\n", 0, limit) + 1
+            if not cut:
+                cut = limit
+                while cut and data[cut] & 0xC0 == 0x80: # A continuation byte
+                    cut -= 1
+            return start, start + cut, data[:cut]
+
+        return start, end, this.Table.Read(start, end)
+
+    def Replace(this, start: int, end: int, data: bytes):
+        this.Table.Replace(start, end, data)
+
+    def Save(this, path: str | None = None):
+        """
+        Write the document to path (defaults to the opened file).
+        The output goes to a temporary file first, and then replaces the
+        target, so unchanged ranges can be copied from the mapping of the
+        file being replaced.
+        """
+        path = path or this.Path
+        stride = this.Index.Stride
+
+        if this.Modified or not this.Index.Ready.is_set():
+            # Index the document while it's written, rather than scan the file again
+            checkpoints = array("q", [0])
+            lines = 0
+
+            def chunks():
+                nonlocal lines
+                pos = 0
+                for chunk in this.Table.Chunks():
+                    yield chunk
+                    lines = _AddLines(checkpoints, chunk, pos, lines, stride)
+                    pos += len(chunk)
+        else:
+            checkpoints, lines = this.Index.Checkpoints, this.Index.LineCount - 1
+            chunks = this.Table.Chunks
+
+        try:
+            AtomicWrite(path, chunks(), this.Close)
+        except BaseException:
+            if this._file.closed:
+                # The rename failed: the original file is still there, map it again
+                this._Map()
+                this.Table.Original = this.Map
+            raise
+
+        this.Path = path
+        this._Map((checkpoints, lines + 1), stride)
+        this.Table = PieceTable(this.Map)
+
+    def Close(this):
+        this.Index.Cancel()
+        if isinstance(this.Map, mmap.mmap):
+            this.Map.close()
+        this._file.close()
@@ -0,0 +1,83 @@
+"""
+Rendering limits for big documents and long lines.
+
+Scintilla lays out (wraps, styles, measures) whole lines. A 300 MB file
+with word wrap on, or minified JSON on one 50 MB line, takes minutes to
+show. Assess() tells how heavy a document is from its size and its
+longest line, and the editor turns off what costs the most at that level
+(see ui.profile.Restrict), until the user asks for the full view.
+"""
+from typing import NamedTuple
+
+# Levels
+NORMAL = 0
+LARGE = 1 # No word wrap, whitespace or EOL marks, indentation guides or brace matching
+HUGE = 2 # Plain text: no lexing or folding either, only the caret line's layout is cached
+
+
+class Thresholds(NamedTuple):
+    Large: int # Document size, in bytes
+    Huge: int
+    LongLine: int # Line length, in bytes
+    VeryLongLine: int
+
+
+def Assess(length: int, longest: int, thresholds: Thresholds) -> int:
+    """
+    The level for a document of length bytes, whose longest line is
+    longest bytes long.
+    """
+    if length >= thresholds.Huge or longest >= thresholds.VeryLongLine:
+        return HUGE
+    if length >= thresholds.Large or longest >= thresholds.LongLine:
+        return LARGE
+    return NORMAL
+
+
+def _Ending(data: bytes, start: int, stop: int) -> int:
+    """
+    The first line ending in data[start:stop], -1 if there is none.
+    """
+    ends = [end for end in (data.find(b"\n", start, stop), data.find(b"\r", start, stop)) if end != -1]
+    return min(ends, default=-1)
+
+
+def _Beginning(data: bytes, start: int, stop: int) -> int:
+    """
+    Where the line of data[stop] starts, if it's in data[start:stop], else -1.
+    """
+    found = max(data.rfind(b"\n", start, stop), data.rfind(b"\r", start, stop))
+    return found + 1 if found != -1 or start == 0 else -1
+
+
+def FindLongLine(data: bytes, length: int) -> int:
+    """
+    Length of a line of data (without its ending) at least length bytes
+    long, 0 if there is none.
+    Doesn't copy data: it's looked at in windows of length / 2 bytes, as
+    any such line covers a whole window without a line ending. Each look
+    is bounded, so the whole is linear.
+    """
+    step = max(length // 2, 1)
+    start = 0
+    while start < len(data):
+        stop = min(start + step, len(data))
+        if _Ending(data, start, stop) != -1:
+            start = stop
+            continue
+
+        # No line ending in the window: is its line that long?
+        begin = _Beginning(data, max(start - length, 0), start)
+        if begin != -1:
+            end = _Ending(data, stop, begin + length)
+            if end != -1:
+                start = end
+                continue
+            if begin + length > len(data):
+                return 0 # The last line, and it's shorter
+
+        # It is: measure it
+        begin = _Beginning(data, 0, start)
+        end = _Ending(data, stop, len(data))
+        return (len(data) if end == -1 else end) - begin
+    return 0
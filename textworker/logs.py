@@ -0,0 +1,52 @@
+"""
+Logging off the GUI thread.
+
+Loggers only put records in a queue (QueueHandler). A QueueListener
+thread writes them to the console and to a rotated log file, which never
+takes more than MAX_BYTES * (BACKUPS + 1) on disk.
+"""
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+
+MAX_BYTES: int = 1 << 20 # 1 MiB per file
+BACKUPS: int = 3 # textworker.log.1 to .3
+
+_listeners: dict[logging.Handler, logging.handlers.QueueListener] = {}
+
+
+def Start(logger: logging.Logger, path: str, formatter: logging.Formatter,
+          *handlers: logging.Handler) -> logging.Handler:
+    """
+    Send logger's records to path and to handlers, on a background thread.
+    Returns the handler added to logger.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    filehdlr = logging.handlers.RotatingFileHandler(path, maxBytes=MAX_BYTES, backupCount=BACKUPS,
+                                                    encoding="utf-8", delay=True)
+    filehdlr.setFormatter(formatter)
+
+    records = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(records, filehdlr, *handlers, respect_handler_level=True)
+    listener.start()
+
+    handler = logging.handlers.QueueHandler(records)
+    _listeners[handler] = listener
+    logger.addHandler(handler)
+    return handler
+
+
+def Stop(handler: logging.Handler | None = None):
+    """
+    Write the records left and stop the writer thread, of a handler
+    returned by Start, or of all of them.
+    """
+    for handler in [handler] if handler else list(_listeners):
+        listener = _listeners.pop(handler, None)
+        if listener:
+            listener.stop()
+
+
+atexit.register(Stop)
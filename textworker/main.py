@@ -1,59 +1,91 @@
 import os
 import sys
 import textworker
+import time
 import traceback
 import wx
 
-from textworker import _
-from textworker.splash import splash
-from textworker.icons import icon
+from concurrent.futures import ThreadPoolExecutor
+
+from textworker import _, bitmaps, generic
 from textworker.generic import logger, ready
-from wx.lib.agw.advancedsplash import AdvancedSplash, AS_TIMEOUT, AS_CENTER_ON_SCREEN
+from textworker.profiling import Profiler
 
 ignore_not_exists: bool = False
 create_new: bool = False
 
+# How long the splash screen used to be shown, whatever happened
+OLD_SPLASH_TIME: float = 5.0
+
+
+class StartupGate:
+    """
+    Calls a function once every named startup task is done.
+    """
+
+    def __init__(this, callback):
+        this.Pending: set[str] = set()
+        this.Callback = callback
+
+    def Add(this, *names: str):
+        this.Pending.update(names)
+
+    def Done(this, name: str):
+        this.Pending.discard(name)
+        if not this.Pending and this.Callback:
+            callback, this.Callback = this.Callback, None
+            callback()
+
+
+
 
 def start_app(files: list[str], directory: list[str], showsplash: bool):
 
     def _file_not_found(filename):
-        if ignore_not_exists: return wx.ID_CANCEL
+        if ignore_not_exists: return wx.NO
         
-        if create_new: return wx.ID_YES
+        if create_new: return wx.YES
+
+        if splash: splash.Hide() # Stays on top, would hide the question
         
         return wx.MessageBox(_("Cannot find file name %s - create it?") % filename,
                              _("File not found"), wx.YES_NO | wx.ICON_INFORMATION, fm)
 
-    if files: logger.info("Passed files: ", " ".join(files))
+    if files: logger.info("Passed files: %s", " ".join(files))
 
-    ready()
+    started = time.perf_counter()
+    splash = None
 
-    textworker.ICON = icon.GetIcon()
-    from .ui.mainwindow import MainFrame
+    if showsplash:
+        from wx.lib.agw.advancedsplash import AdvancedSplash, AS_NOTIMEOUT, AS_CENTER_ON_SCREEN
 
+        splash = AdvancedSplash(None, bitmap=bitmaps.GetBitmap("splash.splash"),
+                                agwStyle=AS_NOTIMEOUT | AS_CENTER_ON_SCREEN)
+        splash.Update()
 
-    if len(files) >= 1:
-        nb = fm.notebook
+    # While the splash screen is up: images are decoded, and the settings are
+    # read on a worker thread while the toolkit modules are imported here.
+    # The theme needs wx, so it is loaded here afterwards.
+    bitmaps.Prewarm([name for name in bitmaps.STARTUP if name != "splash.splash"])
 
-        for i in range(0, len(files)):
-            if i >= 1:
-                nb.AddTab(tabname=files[i])
+    with Profiler.Phase("generic.ready()"):
+        worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="textworker-ready")
+        configured = worker.submit(generic.read_settings)
+        worker.shutdown(wait=False)
 
-            if not os.path.isfile(files[i]):
-                if _file_not_found(files[i]) != wx.ID_YES:
-                    nb.DeletePage(nb.GetSelection())
-                    continue
+        import wx.stc
+        import wx.lib.agw.aui
+        import libtextworker.interface.wx.dirctrl
+        import libtextworker.interface.wx.editor
 
-            try:
-                open(files[i], "r")
-            except Exception as e:
-                logger.warning(str(e))
-                nb.DeletePage(nb.GetSelection())
-                raise e
-            else:
-                nb.OpenFile(files[i])
+        configured.result()
+        ready()
+        generic.clrCall.GetColor() # Imports the color tables and checks the system theme
+
+    textworker.ICON = bitmaps.GetIcon("icons.icon")
+    with Profiler.Phase("import textworker.ui.mainwindow"):
+        from .ui.mainwindow import MainFrame
 
-    for path in directory: fm.OpenDir(None, path)
 
     if sys.platform == "win32":
         import ctypes
@@ -63,10 +95,10 @@ def start_app(files: list[str], directory: list[str], showsplash: bool):
         is_admin = (os.getuid() == 0)
 
     if is_admin:
+        if splash: splash.Hide()
         wx.MessageBox(_("You are running this program as root.\n"
                                    "You must be responsible for your changes."),
-                      style=wx.OK | wx.ICON_WARNING,
-                      parent=fm)
+                      style=wx.OK | wx.ICON_WARNING)
     del is_admin
 
     exchook = sys.excepthook
@@ -120,12 +152,37 @@ def start_app(files: list[str], directory: list[str], showsplash: bool):
         myappid = "me.lebao3105.textworker"
         ctypes.windll.shell32.SetCurrentProcessExplicitAppUserModelID(myappid)
 
-    fm = MainFrame()
+    def _show():
+        if splash:
+            shown = time.perf_counter() - started
+            Profiler.Note("Splash screen shown", shown)
+            Profiler.Note("Saved against the fixed 5 s splash screen", max(0.0, OLD_SPLASH_TIME - shown))
+            splash.Destroy()
+        fm.Show()
+
+    # The splash screen goes away once the window is built, the files are opened
+    # and the previous session is back
+    gate = StartupGate(_show)
+    gate.Add("frame", "files", "session")
+
+    with Profiler.Phase("MainFrame.__init__"):
+        fm = MainFrame()
     fm.SetIcon(textworker.ICON)
+    Profiler.WatchFirstPaint(fm.notebook.GetCurrentPage() or fm)
+    fm.PrewarmFileHistory()
+    fm.workspace.Restore(lambda: gate.Done("session"))
 
-    if showsplash:
-        AdvancedSplash(fm, bitmap=splash.GetBitmap(), timeout=5000,
-                       agwStyle=AS_TIMEOUT | AS_CENTER_ON_SCREEN)
-        wx.CallLater(5000, fm.Show).Start()
-    else:
-        fm.Show()
+    # Existing files are read in the background, see ui.opener
+    existing = []
+    for path in files:
+        if os.path.isfile(path):
+            existing.append(path)
+        elif _file_not_found(path) == wx.YES:
+            fm.notebook.PlaceFile(path) # Created on save
+
+    fm.notebook.OpenFiles(existing)
+    fm.notebook.Opener.WhenIdle(lambda: gate.Done("files"))
+
+    for path in directory: fm.OpenDir(None, path)
+
+    gate.Done("frame")
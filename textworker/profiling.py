@@ -0,0 +1,320 @@
+"""
+Startup profiling, enabled with --profile-startup, and the measures shown
+in Help -> Performance: operation timings, cProfile and tracemalloc.
+
+Only the standard library may be imported here: the profiler is started
+from textworker/__init__.py, before anything else is imported.
+"""
+import builtins
+import collections
+import importlib.util
+import json
+import sys
+import threading
+import time
+import tracemalloc
+
+from contextlib import contextmanager
+from typing import Callable, Iterator, TextIO
+
+SAMPLES: int = 10000 # Durations kept per operation, for percentiles
+MEMORY_FRAMES: int = 10 # Stack frames kept per allocation by tracemalloc
+
+
+class StartupProfiler:
+    """
+    Records how long each module import and each startup phase takes,
+    then prints a report once the main window is painted for the first time.
+    Does nothing (and costs nothing) unless Start() is called.
+    """
+
+    Enabled: bool = False
+
+    def __init__(this):
+        this.Origin = time.perf_counter()
+        this.Imports: dict[str, list[float]] = {} # name: [inclusive, self]
+        this.Phases: list[tuple[int, str, float, float]] = [] # (depth, name, start, duration)
+        this.FirstPaint: float | None = None
+        this.Extra: list[tuple[str, float]] = []
+        this._local = threading.local() # Per thread: the import stack and phase depth
+        this._lock = threading.Lock()
+        this._import = builtins.__import__
+
+    def Start(this):
+        """
+        Start timing imports. Call this as early as possible.
+        """
+        if this.Enabled:
+            return
+        this.Enabled = True
+        this.Origin = time.perf_counter()
+        builtins.__import__ = this._TimedImport
+
+    def Stop(this):
+        if builtins.__import__ == this._TimedImport:
+            builtins.__import__ = this._import
+
+    def _Stack(this) -> list[float]:
+        """
+        Time spent in nested imports, per level, on this thread.
+        """
+        stack = getattr(this._local, "stack", None)
+        if stack is None:
+            stack = this._local.stack = []
+        return stack
+
+    def _TimedImport(this, name, globals=None, locals=None, fromlist=(), level=0):
+        if level:
+            try:
+                fullname = importlib.util.resolve_name("." * level + name, (globals or {}).get("__package__"))
+            except (ImportError, ValueError):
+                fullname = name
+        else:
+            fullname = name
+
+        if fullname in sys.modules:
+            return this._import(name, globals, locals, fromlist, level)
+
+        stack = this._Stack()
+        stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            return this._import(name, globals, locals, fromlist, level)
+        finally:
+            spent = time.perf_counter() - start
+            nested = stack.pop()
+            if stack:
+                stack[-1] += spent
+            this.Imports.setdefault(fullname, [spent, spent - nested])
+
+    @contextmanager
+    def Phase(this, name: str):
+        """
+        Time a startup phase (a with block). Phases may be nested, and run
+        on several threads: each thread has its own nesting.
+        """
+        if not this.Enabled:
+            yield
+            return
+
+        if threading.current_thread() is not threading.main_thread():
+            name = f"{name} ({threading.current_thread().name})"
+        depth = getattr(this._local, "depth", 0)
+        start = time.perf_counter()
+        with this._lock:
+            index = len(this.Phases)
+            this.Phases.append((depth, name, start - this.Origin, 0.0))
+        this._local.depth = depth + 1
+        try:
+            yield
+        finally:
+            this._local.depth = depth
+            this.Phases[index] = (depth, name, start - this.Origin, time.perf_counter() - start)
+
+    def Note(this, name: str, seconds: float):
+        """
+        Add an extra line (a duration) to the report.
+        """
+        if this.Enabled:
+            this.Extra.append((name, seconds))
+
+    def WatchFirstPaint(this, window):
+        """
+        Print the report when the window is painted for the first time.
+        """
+        if not this.Enabled:
+            return
+
+        import wx
+
+        def painted(evt):
+            evt.Skip()
+            window.Unbind(wx.EVT_PAINT, handler=painted)
+            if this.FirstPaint is None:
+                this.FirstPaint = time.perf_counter() - this.Origin
+                wx.CallAfter(this.Report)
+
+        window.Bind(wx.EVT_PAINT, painted)
+
+    def Report(this, file=None, top: int = 30):
+        """
+        Print the collected timings (to stderr by default).
+        """
+        this.Stop()
+        file = file or sys.stderr
+        ms = lambda seconds: f"{seconds * 1000:9.1f} ms"
+
+        print("Startup profile", file=file)
+        print("===============", file=file)
+
+        print(f"\nSlowest imports (self time, inclusive time), {len(this.Imports)} modules:", file=file)
+        slowest = sorted(this.Imports.items(), key=lambda item: item[1][1], reverse=True)
+        for name, (inclusive, self_time) in slowest[:top]:
+            print(f"{ms(self_time)} {ms(inclusive)}  {name}", file=file)
+        print(f"Total: {ms(sum(self_time for inclusive, self_time in this.Imports.values())).strip()}", file=file)
+
+        print("\nPhases (started at, duration):", file=file)
+        for depth, name, start, duration in this.Phases:
+            print(f"{ms(start)} {ms(duration)}  {'  ' * depth}{name}", file=file)
+
+        for name, seconds in this.Extra:
+            print(f"{ms(seconds)}  {name}", file=file)
+
+        if this.FirstPaint is not None:
+            print(f"\nFirst paint: {ms(this.FirstPaint).strip()} after startup", file=file)
+
+
+Profiler = StartupProfiler()
+
+
+class Timing:
+    """
+    Durations of an operation: totals, and the last SAMPLES for percentiles.
+    """
+
+    def __init__(this):
+        this.Count = 0
+        this.Total = 0.0
+        this.Max = 0.0
+        this.Recent: collections.deque[float] = collections.deque(maxlen=SAMPLES)
+
+    def Add(this, seconds: float):
+        this.Count += 1
+        this.Total += seconds
+        this.Max = max(this.Max, seconds)
+        this.Recent.append(seconds)
+
+    def Percentile(this, percent: float) -> float:
+        if not this.Recent:
+            return 0.0
+        ordered = sorted(this.Recent)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+
+class OperationCounters:
+    """
+    Timings of the things which make the editor feel slow (opening, saving,
+    event loop lag...), by name. Always on: adding one is a dict lookup and
+    a deque append. Thread safe.
+    """
+
+    def __init__(this):
+        this.Timings: dict[str, Timing] = {}
+        this._lock = threading.Lock()
+
+    def Add(this, name: str, seconds: float):
+        with this._lock:
+            timing = this.Timings.get(name)
+            if timing is None:
+                timing = this.Timings[name] = Timing()
+            timing.Add(seconds)
+
+    @contextmanager
+    def Time(this, name: str):
+        """
+        Time a with block.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            this.Add(name, time.perf_counter() - start)
+
+    def Started(this, name: str) -> Callable[..., None]:
+        """
+        Time something asynchronous: call the returned function (with any
+        arguments, so it can be a callback) when it's done.
+        """
+        start = time.perf_counter()
+        return lambda *args: this.Add(name, time.perf_counter() - start)
+
+    def Reset(this):
+        with this._lock:
+            this.Timings = {}
+
+    def Records(this) -> Iterator[dict]:
+        with this._lock:
+            timings = sorted(this.Timings.items())
+        for name, timing in timings:
+            yield {"type": "operation", "name": name, "count": timing.Count,
+                   "total_ms": timing.Total * 1000, "mean_ms": timing.Total / timing.Count * 1000,
+                   "p50_ms": timing.Percentile(50) * 1000, "p99_ms": timing.Percentile(99) * 1000,
+                   "max_ms": timing.Max * 1000}
+
+
+class SessionProfiler:
+    """
+    cProfile and tracemalloc for the running session, turned on and off
+    from Help -> Performance. cProfile only sees the GUI thread, where it
+    was turned on.
+    """
+
+    def __init__(this):
+        this.Profile = None # cProfile.Profile, imported when needed
+        this.Profiling = False
+
+    def ToggleProfile(this, on: bool):
+        if on and not this.Profiling:
+            import cProfile
+            this.Profile = this.Profile or cProfile.Profile()
+            this.Profile.enable()
+        elif not on and this.Profiling:
+            this.Profile.disable()
+        this.Profiling = on
+
+    def DumpProfile(this, path: str):
+        """
+        Write what cProfile collected (for pstats or snakeviz), and start over.
+        """
+        if not this.Profile:
+            raise ValueError("Nothing profiled yet")
+        this.Profile.disable()
+        this.Profile.dump_stats(path)
+        this.Profile = None
+        if this.Profiling:
+            this.Profiling = False
+            this.ToggleProfile(True)
+
+    @property
+    def Tracing(this) -> bool:
+        return tracemalloc.is_tracing()
+
+    def ToggleTracing(this, on: bool):
+        if on and not this.Tracing:
+            tracemalloc.start(MEMORY_FRAMES)
+        elif not on and this.Tracing:
+            tracemalloc.stop()
+
+    def DumpTracing(this, path: str):
+        """
+        Write a tracemalloc snapshot, see tracemalloc.Snapshot.load.
+        """
+        if not this.Tracing:
+            raise ValueError("Allocations are not tracked")
+        tracemalloc.take_snapshot().dump(path)
+
+    def Records(this, top: int = 30) -> Iterator[dict]:
+        if not this.Tracing:
+            return
+        current, peak = tracemalloc.get_traced_memory()
+        yield {"type": "memory", "current_bytes": current, "peak_bytes": peak}
+        for stat in tracemalloc.take_snapshot().statistics("lineno")[:top]:
+            frame = stat.traceback[0]
+            yield {"type": "allocation", "file": frame.filename, "line": frame.lineno,
+                   "size_bytes": stat.size, "count": stat.count}
+
+
+def Export(file: TextIO):
+    """
+    Write the counters and the allocations as JSON lines, the first one
+    telling where they come from.
+    """
+    import platform
+    meta = {"type": "meta", "time": time.time(), "python": sys.version,
+            "platform": platform.platform(), "profiling": Session.Profiling, "tracing": Session.Tracing}
+    for record in [meta, *Counters.Records(), *Session.Records()]:
+        file.write(json.dumps(record) + "\n")
+
+
+Counters = OperationCounters()
+Session = SessionProfiler()
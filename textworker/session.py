@@ -0,0 +1,118 @@
+"""
+Binary workspace snapshots: open tabs with their view state, the
+Explorer folder and the window layout.
+
+Layout (little endian):
+    header  MAGIC, VERSION, body length, CRC32 of the body
+    body    folder, perspective (strings), selected tab (int32),
+            tab count, then for each tab: its fixed fields (TAB) and path
+A string is its UTF-8 length (uint32) followed by the bytes.
+"""
+import struct
+import zlib
+
+MAGIC: bytes = b"TWSS"
+VERSION: int = 1
+
+HEADER = struct.Struct("<4sHII")
+TAB = struct.Struct("<QQIIbb") # caret, anchor, first line, x offset, zoom, wrap
+COUNT = struct.Struct("<iI")
+LENGTH = struct.Struct("<I")
+
+
+class SessionError(Exception):
+    pass
+
+
+class Session:
+    """
+    The decoded content of a snapshot.
+    Tabs are (path, state) pairs, state as made by ui.hibernate.Capture.
+    """
+
+    def __init__(this, tabs: list[tuple[str, dict]] | None = None, selected: int = -1,
+                 folder: str = "", perspective: str = ""):
+        this.Tabs = tabs or []
+        this.Selected = selected
+        this.Folder = folder
+        this.Perspective = perspective
+
+
+def _String(text: str) -> bytes:
+    data = text.encode("utf-8")
+    return LENGTH.pack(len(data)) + data
+
+
+def EncodeTab(path: str, state: dict) -> bytes:
+    """
+    Encode a single tab. Kept apart so callers can cache the result
+    of tabs which did not change.
+    """
+    return TAB.pack(state.get("caret", 0), state.get("anchor", 0),
+                    state.get("first_line", 0), state.get("x_offset", 0),
+                    state.get("zoom", 0), state.get("wrap", 0)) + _String(path)
+
+
+def Encode(tabs: list[bytes], selected: int, folder: str, perspective: str) -> bytes:
+    """
+    Build a snapshot from already encoded tabs (see EncodeTab).
+    """
+    body = b"".join([_String(folder), _String(perspective),
+                     COUNT.pack(selected, len(tabs))] + tabs)
+    return HEADER.pack(MAGIC, VERSION, len(body), zlib.crc32(body)) + body
+
+
+def Decode(data: bytes) -> Session:
+    """
+    Read a snapshot. Raises SessionError if it is damaged or too new.
+    """
+    if len(data) < HEADER.size:
+        raise SessionError("Truncated header")
+
+    magic, version, length, crc = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise SessionError("Not a session file")
+    if version > VERSION:
+        raise SessionError(f"Made by a newer version (format {version})")
+
+    body = memoryview(data)[HEADER.size:]
+    if len(body) != length or zlib.crc32(body) != crc:
+        raise SessionError("Damaged session file")
+
+    offset = 0
+
+    def string() -> str:
+        nonlocal offset
+        (size,) = LENGTH.unpack_from(body, offset)
+        offset += LENGTH.size
+        text = bytes(body[offset:offset + size]).decode("utf-8")
+        offset += size
+        return text
+
+    try:
+        folder = string()
+        perspective = string()
+        selected, count = COUNT.unpack_from(body, offset)
+        offset += COUNT.size
+
+        tabs = []
+        for i in range(count):
+            caret, anchor, first_line, x_offset, zoom, wrap = TAB.unpack_from(body, offset)
+            offset += TAB.size
+            tabs.append((string(), {"caret": caret, "anchor": anchor, "first_line": first_line,
+                                    "x_offset": x_offset, "zoom": zoom, "wrap": wrap}))
+    except (struct.error, UnicodeDecodeError) as e:
+        raise SessionError(f"Damaged session file: {e}")
+
+    return Session(tabs, selected, folder, perspective)
+
+
+def Load(path: str) -> Session | None:
+    """
+    Read a snapshot file. Returns None if there is none.
+    """
+    try:
+        with open(path, "rb") as f:
+            return Decode(f.read())
+    except FileNotFoundError:
+        return None
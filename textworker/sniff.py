@@ -0,0 +1,186 @@
+"""
+Telling how a text file is written: encoding, line endings and indentation.
+
+The encoding is guessed from the first SAMPLE bytes. The file is then
+read once, a chunk at a time, and checked (or converted to UTF-8) with an
+incremental decoder, so there is never a str of the whole text nor a copy
+of it in its own encoding. Line endings and indentation are guessed from
+the first SAMPLE bytes only.
+"""
+import codecs
+import io
+import locale
+
+from collections import Counter
+from typing import BinaryIO, Iterator
+
+from .fileio import Chunked
+
+DECODE_CHUNK: int = 1 << 20 # 1 MiB
+SAMPLE: int = 64 * 1024 # bytes looked at for line endings and indentation
+MAX_INDENT: int = 8
+
+# UTF-32 first: its little endian BOM starts with UTF-16's
+BOMS: list[tuple[bytes, str]] = [(codecs.BOM_UTF32_LE, "utf-32-le"),
+                                 (codecs.BOM_UTF32_BE, "utf-32-be"),
+                                 (codecs.BOM_UTF8, "utf-8"),
+                                 (codecs.BOM_UTF16_LE, "utf-16-le"),
+                                 (codecs.BOM_UTF16_BE, "utf-16-be")]
+
+
+class FileFormat:
+    """
+    How a file is written. None means it couldn't be told (no line ending,
+    no indented line...), so the editor settings are used.
+    """
+
+    def __init__(this, encoding: str = "utf-8", bom: bytes = b"", eol: str | None = None,
+                 tabs: bool | None = None, indent: int | None = None):
+        this.Encoding = encoding
+        this.BOM = bom
+        this.EOL = eol
+        this.Tabs = tabs
+        this.Indent = indent
+
+    def __repr__(this) -> str:
+        return (f"FileFormat({this.Encoding!r}, {this.BOM!r}, {this.EOL!r}, "
+                f"tabs={this.Tabs}, indent={this.Indent})")
+
+
+def FindBOM(head: bytes) -> tuple[bytes, str]:
+    """
+    The BOM at the start of head and its encoding, (b"", "") if there is none.
+    """
+    for bom, encoding in BOMS:
+        if head.startswith(bom):
+            return bom, encoding
+    return b"", ""
+
+
+def Fallbacks() -> list[str]:
+    """
+    Encodings tried for files which are not UTF-8. The last one never fails.
+    """
+    names = [codecs.lookup(name).name for name in [locale.getpreferredencoding(False), "cp1252", "latin-1"]]
+    return [name for name in dict.fromkeys(names) if name != "utf-8"]
+
+
+def Fits(head: bytes, encoding: str) -> bool:
+    """
+    Whether the start of a file can be in encoding.
+    """
+    try:
+        codecs.getincrementaldecoder(encoding)().decode(head) # Not final: head may end inside a character
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+def Transcoded(data, source: str, target: str, errors: str = "strict") -> Iterator[bytes]:
+    """
+    data converted from one encoding to another, in chunks.
+    """
+    decoder = codecs.getincrementaldecoder(source)(errors)
+    encoder = codecs.getincrementalencoder(target)(errors)
+    for chunk in Chunked(data, DECODE_CHUNK):
+        yield encoder.encode(decoder.decode(chunk))
+    yield encoder.encode(decoder.decode(b"", True), True)
+
+
+def Decoded(f: BinaryIO, encoding: str, errors: str = "strict") -> bytes:
+    """
+    The rest of f as UTF-8, read and converted from encoding a chunk at a time.
+    UTF-8 chunks are only checked, and kept as they are.
+    """
+    out = io.BytesIO()
+    decoder = codecs.getincrementaldecoder(encoding)(errors)
+    encoder = codecs.getincrementalencoder("utf-8")() if encoding != "utf-8" else None
+
+    while chunk := f.read(DECODE_CHUNK):
+        text = decoder.decode(chunk)
+        out.write(encoder.encode(text) if encoder else chunk)
+    text = decoder.decode(b"", True)
+    if encoder:
+        out.write(encoder.encode(text, True))
+
+    return out.getvalue()
+
+
+def GuessEOL(sample: bytes) -> str | None:
+    crlf = sample.count(b"\r\n")
+    counts = {"\r\n": crlf, "\n": sample.count(b"\n") - crlf, "\r": sample.count(b"\r") - crlf}
+    eol = max(counts, key=counts.get)
+    return eol if counts[eol] else None
+
+
+def GuessIndent(sample: bytes) -> tuple[bool | None, int | None]:
+    """
+    (indented with tabs, indentation width) from the indented lines of sample.
+    The width is the most common step between a line and a more indented
+    next one; steps of 1 are left out, they are mostly " * " comment lines.
+    """
+    tabs = spaces = 0
+    steps = Counter()
+    previous = 0
+
+    for line in sample.splitlines():
+        if not line.strip():
+            continue
+
+        if line[:1] == b"\t":
+            tabs += 1
+            previous = None
+            continue
+
+        indent = len(line) - len(line.lstrip(b" "))
+        if indent:
+            spaces += 1
+        if previous is not None and 1 < indent - previous <= MAX_INDENT:
+            steps[indent - previous] += 1
+        previous = indent
+
+    if tabs > spaces:
+        return True, None
+    if spaces:
+        return False, steps.most_common(1)[0][0] if steps else None
+    return None, None
+
+
+def Read(f: BinaryIO) -> tuple[bytes, FileFormat]:
+    """
+    Read a file opened in binary mode (and seekable), once - again only
+    if the encoding guessed from its start fails further on.
+    Returns its text as UTF-8 (what Scintilla uses, without the BOM) and its format.
+    """
+    head = f.read(SAMPLE)
+    bom, encoding = FindBOM(head)
+
+    if encoding:
+        f.seek(len(bom))
+        data = Decoded(f, encoding, "replace")
+    else:
+        for encoding in ["utf-8", *Fallbacks()]: # The last one never fails
+            if not Fits(head, encoding):
+                continue
+            f.seek(0)
+            try:
+                data = Decoded(f, encoding)
+                break
+            except UnicodeDecodeError:
+                continue
+
+    sample = data[:SAMPLE]
+    return data, FileFormat(encoding, bom, GuessEOL(sample), *GuessIndent(sample))
+
+
+def Encoded(data, format: FileFormat) -> Iterator:
+    """
+    UTF-8 data written back the way format says, in chunks for fileio.AtomicWrite.
+    Raises UnicodeEncodeError (on the way) if the encoding can't hold some text.
+    """
+    if format.BOM:
+        yield format.BOM
+    if format.Encoding == "utf-8":
+        yield from Chunked(data)
+    else:
+        yield from Transcoded(data, "utf-8", format.Encoding)
@@ -0,0 +1,60 @@
+"""
+Input traces: what was typed, scrolled and selected in an editor, with
+timestamps, so that an editing session can be replayed (see
+ui.inputtrace and the benchmarks).
+
+A trace file is MAGIC, a JSON header line (the document and where the
+caret was), then 13 bytes per event (see EVENT).
+Traces hold the text that was typed: share them knowingly.
+"""
+import json
+import struct
+
+from typing import BinaryIO, Iterable, NamedTuple
+
+MAGIC: bytes = b"TWTRACE1\n"
+EVENT = struct.Struct("<IBii") # µs since the previous event, kind, two arguments
+MAX_DELAY: int = 2 ** 32 - 1 # µs, longer pauses are shortened
+
+# Event kinds, and what their arguments are
+CHAR = 1 # Typed character: (code point, 0)
+KEY = 2 # Other key press: (wx key code, wx modifiers)
+SCROLL = 3 # Mouse wheel: (lines, 0)
+SELECT = 4 # Selection set with the mouse: (anchor, caret)
+
+
+class TraceEvent(NamedTuple):
+    Time: float # s since the trace started
+    Kind: int
+    A: int
+    B: int
+
+
+def Write(f: BinaryIO, header: dict, events: Iterable[TraceEvent]):
+    f.write(MAGIC)
+    f.write(json.dumps(header).encode("utf-8") + b"\n")
+
+    previous = 0
+    for event in events:
+        now = round(event.Time * 1e6)
+        f.write(EVENT.pack(min(max(now - previous, 0), MAX_DELAY), event.Kind, event.A, event.B))
+        previous = now
+
+
+def Read(f: BinaryIO) -> tuple[dict, list[TraceEvent]]:
+    """
+    Raises ValueError if f is not a trace.
+    """
+    if f.readline() != MAGIC:
+        raise ValueError("Not an input trace")
+    header = json.loads(f.readline())
+
+    data = f.read()
+    data = data[:len(data) - len(data) % EVENT.size] # Cut short by a crash
+
+    events = []
+    elapsed = 0
+    for delay, kind, a, b in EVENT.iter_unpack(data):
+        elapsed += delay
+        events.append(TraceEvent(elapsed / 1e6, kind, a, b))
+    return header, events
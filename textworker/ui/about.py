@@ -5,9 +5,10 @@ import wx.lib.agw.labelbook as LB
 
 import webbrowser
 
-from textworker import DEVS, ARTISTS, DOCWRITERS, LICENSE, icons
+from textworker import DEVS, ARTISTS, DOCWRITERS, LICENSE
 from textworker import HOMEPAGE, _, ICON
 from textworker import branch, __version__
+from textworker.bitmaps import GetImage
 from textworker.generic import clrCall
 
 class AboutDialog(wx.Dialog):
@@ -27,7 +28,7 @@ class AboutDialog(wx.Dialog):
 		bSizer3.Add(wx.StaticText(this.m_panel1, label=f"TextWorker {branch.capitalize()}", style=wx.ALIGN_LEFT), 1, wx.ALL, 5 )
 
 		this.m_bitmap1 = wx.StaticBitmap(this.m_panel1)
-		this.m_bitmap1.SetIcon(wx.Icon(wx.Bitmap(icons.icon.GetImage().Scale(32, 32))))
+		this.m_bitmap1.SetIcon(wx.Icon(wx.Bitmap(GetImage("icons.icon").Scale(32, 32))))
 		this.m_bitmap1.SetToolTip(_("Click to view in full size"))
 	
 		def fullImage(evt):
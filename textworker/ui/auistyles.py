@@ -6,7 +6,7 @@ from wx.lib.agw.aui.aui_utilities import GetBaseColour
 from wx.lib.agw.aui.aui_constants import *
 
 from ..generic import clrCall
-from textworker import assets
+from textworker.bitmaps import GetBitmap
 from libtextworker.interface import manager
 
 class AuiFlatDockArt(AuiDefaultDockArt):
@@ -34,11 +34,11 @@ class AuiFlatDockArt(AuiDefaultDockArt):
         this._inactive_caption_text_colour = fg
 
         ## Bitmaps
-        this._inactive_close_bitmap = assets.close.GetBitmap()
-        this._inactive_minimize_bitmap = assets.minimize.GetBitmap()
-        this._inactive_pin_bitmap = assets.pin.GetBitmap()
+        this._inactive_close_bitmap = GetBitmap("assets.close")
+        this._inactive_minimize_bitmap = GetBitmap("assets.minimize")
+        this._inactive_pin_bitmap = GetBitmap("assets.pin")
 
-        this._active_close_bitmap = assets.close_white.GetBitmap()
+        this._active_close_bitmap = GetBitmap("assets.close_white")
 
         # Background
         this._background_colour = bg
@@ -54,7 +54,7 @@ class AuiFlatTabArt(ChromeTabArt):
         newfont.SetWeight(wx.FONTWEIGHT_NORMAL)
         this._normal_font = this._selected_font = this._measuring_font = newfont
 
-        closeBmp = closeHBmp = closePBmp = assets.close.GetBitmap()
+        closeBmp = closeHBmp = closePBmp = GetBitmap("assets.close")
         this.SetCustomButton(AUI_BUTTON_CLOSE, AUI_BUTTON_STATE_NORMAL, closeBmp)
         this.SetCustomButton(AUI_BUTTON_CLOSE, AUI_BUTTON_STATE_HOVER, closeHBmp)
         this.SetCustomButton(AUI_BUTTON_CLOSE, AUI_BUTTON_STATE_PRESSED, closePBmp)
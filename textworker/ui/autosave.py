@@ -1,21 +1,19 @@
+import heapq
+import itertools
+import time as clock
 import wx
 import wx.xrc
 
-from threading import Thread
-from typing import Callable
-
 from .. import _
-from ..generic import global_settings
+from ..generic import settings, logger
+from ..profiling import Counters
 from . import autosave_generated
 
 
 # Configs
-enabled = global_settings['editor.autosave']["enable"]
-time = global_settings['editor.autosave']["time"]
-if not int(time):
-    time = 30
+time = settings.AutoSaveTime or 30
 
-TOGGLE: bool = enabled in global_settings.yes_values
+TOGGLE: bool = settings.AutoSave
 
 
 class AutoSaveConfig(autosave_generated.AutoSaveDialog):
@@ -29,8 +27,9 @@ class AutoSaveConfig(autosave_generated.AutoSaveDialog):
         _("20 minutes"): 1200,
         _("30 minutes"): 1800,
     }
-    enabled = enabled
+    enabled = TOGGLE
     shown = False
+    Target: "AutoSave | None" = None # The editor to configure, None for every editor
 
     def __init__(this, Parent: wx.Window):
 
@@ -49,46 +48,141 @@ class AutoSaveConfig(autosave_generated.AutoSaveDialog):
 
     def OnChoiceSelected(this, evt):
         choice = this.Cmb.GetValue()
-        if choice:
-            global_settings["editor"]["autosave"]["time"] = this.timealiases[choice]
+        if not choice:
+            return
+
+        if this.Target:
+            this.Target.Start(this.timealiases[choice])
+        else:
+            settings.AutoSaveTime = this.timealiases[choice] # Written later, see config.Settings
+            AutoSave.CurrDelay = this.timealiases[choice]
 
     def ConfigWindow(this):
         this.ShowModal()
         this.shown = True
 
 
+class AutoSaveScheduler:
+    """
+    A single timer driving the auto save of every editor.
+
+    Dirty editors are kept in a priority queue ordered by the time they are
+    due, using each editor's own delay (CurrDelay). An editor is queued
+    once, however much is typed in it, and clean editors are skipped when
+    their turn comes. Saving itself is done by ui.saver in the background.
+    """
+
+    def __init__(this, owner: wx.EvtHandler):
+        this.Timer = wx.Timer(owner)
+        owner.Bind(wx.EVT_TIMER, this.OnTimer, this.Timer)
+
+        this.Queue: list[tuple[float, int, wx.Window]] = [] # (due, order, editor)
+        this.Due: dict[wx.Window, float] = {}
+        this._order = itertools.count()
+
+    def Schedule(this, editor: "AutoSave", restart: bool = False):
+        """
+        Queue an editor to be saved after its delay.
+        An editor which is already queued keeps its place unless restart is set.
+        """
+        if not TOGGLE or not editor.AutoSaveOn:
+            return
+        if editor in this.Due and not restart:
+            return
+
+        due = clock.monotonic() + int(editor.CurrDelay)
+        this.Due[editor] = due
+        heapq.heappush(this.Queue, (due, next(this._order), editor))
+        this._Arm()
+
+    def Unschedule(this, editor: "AutoSave"):
+        # The queue entry is dropped when it comes out of the heap
+        this.Due.pop(editor, None)
+
+    def ScheduleAll(this, editors: list):
+        for editor in editors:
+            if editor.Tracker.Dirty:
+                this.Schedule(editor)
+
+    def _Arm(this):
+        while this.Queue and this.Due.get(this.Queue[0][2]) != this.Queue[0][0]:
+            heapq.heappop(this.Queue) # Stale entry
+
+        if not this.Queue:
+            this.Timer.Stop()
+            return
+
+        delay = max(0, this.Queue[0][0] - clock.monotonic())
+        this.Timer.StartOnce(int(delay * 1000) + 1)
+
+    def OnTimer(this, evt):
+        from .saver import Engine
+
+        now = clock.monotonic()
+        while this.Queue and this.Queue[0][0] <= now:
+            due, _order, editor = heapq.heappop(this.Queue)
+            if this.Due.get(editor) != due:
+                continue
+            del this.Due[editor]
+
+            if not TOGGLE or not editor or not editor.Tracker.Dirty or not editor.FileLoaded:
+                continue
+
+            logger.debug(f"Auto saving {editor.FileLoaded}")
+            timed = Counters.Started("autosave")
+            Engine.Save(editor, callback=lambda path, error, editor=editor, timed=timed: this._Saved(editor, error, timed),
+                        guard=True)
+
+        this._Arm()
+
+    def _Saved(this, editor: "AutoSave", error: Exception | None, timed=None):
+        from .saver import ChangedOnDisk
+
+        if timed:
+            timed()
+
+        # Typed during the save, or failed: try again later.
+        # Not if another program changed the file: the user is asked (see diskwatch)
+        if editor and editor.Tracker.Dirty and not isinstance(error, ChangedOnDisk):
+            this.Schedule(editor)
+
+
 class AutoSave:
     """
     Auto-save support for wxPython editors.
-    Just simple as it is.
+    The timing is done by the AutoSaveScheduler owned by the main window
+    (AutoSave.Scheduler); this class only keeps per-editor settings.
+    The editor must have its ChangeTracker before AutoSave.__init__ runs.
     """
 
-    Function: Callable
-    Function_args: dict
+    Scheduler: AutoSaveScheduler | None = None
 
     CurrDelay: int = time
+    AutoSaveOn: bool = True
 
     def __init__(this):
-        this.Timer = wx.CallLater(
-            int(this.CurrDelay) * 1000, this.Function, **this.Function_args
-        )
-        Thread(target=this.Toggle,
-               args=(((not TOGGLE) and this.Timer.IsRunning())
-                     or
-                     not this.Timer.IsRunning(),)
-        ).start()
+        this.Tracker.AddListener(this._OnDirtyChanged)
+
+    def _OnDirtyChanged(this, editor, dirty: bool):
+        if not this.Scheduler:
+            return
+        if dirty:
+            this.Scheduler.Schedule(this)
+        else:
+            this.Scheduler.Unschedule(this)
 
     def Start(this, time_: str = ""):
         if time_:
             this.CurrDelay = int(time_)
 
-        if this.Timer.IsRunning():
-            this.Timer.Stop()
-
-        this.Timer.Start(int(this.CurrDelay) * 1000)
+        this.AutoSaveOn = True
+        if this.Scheduler and this.Tracker.Dirty:
+            this.Scheduler.Schedule(this, restart=True)
 
     def Stop(this):
-        this.Timer.Stop()
+        this.AutoSaveOn = False
+        if this.Scheduler:
+            this.Scheduler.Unschedule(this)
 
     def Toggle(this, on_or_off: bool):
         if on_or_off:
@@ -97,7 +191,4 @@ class AutoSave:
             this.Stop()
 
     def CheckToggle(this):
-        if (not TOGGLE) and this.Timer.IsRunning():
-            this.Stop()
-        elif not this.Timer.IsRunning():
-            this.Start()
+        this.Toggle(TOGGLE)
@@ -0,0 +1,180 @@
+import difflib
+import os
+import wx
+
+from concurrent.futures import Future
+
+from .. import _
+from ..generic import logger
+from ..watcher import Signature, Watcher
+from .editor import Editor
+from .hibernate import Apply, Capture, TabStub
+from .opener import GetPool, ReadFile
+from .saver import Engine, Snapshot
+
+
+class DiskWatcher:
+    """
+    Notices when another program changes a file open in the notebook.
+
+    Every tab remembers the signature (see watcher.Signature) of its file
+    as it was loaded or saved, in its Disk attribute. The files are
+    watched by a single watcher.Watcher (inotify, or polling on one
+    thread), so watching many files costs next to nothing.
+
+    When a file changes, a clean editor is reloaded; an editor with
+    unsaved changes asks what to do. Auto save does not overwrite a changed
+    file meanwhile (see saver.ChangedOnDisk).
+    """
+
+    def __init__(this, notebook: wx.Window):
+        this.Notebook = notebook
+        this.Watcher = Watcher(lambda changes: wx.CallAfter(this.OnChanges, changes))
+        this.Watched: set[str] = set()
+        this.Asking: set[str] = set() # Paths with a question shown
+        this._scheduled = False
+
+    def Pages(this) -> list:
+        pages = map(this.Notebook.GetPage, range(this.Notebook.GetPageCount()))
+        return [page for page in pages if isinstance(page, (Editor, TabStub)) and page.FileLoaded]
+
+    def Schedule(this):
+        """
+        Update the watched files once the current event is handled
+        (tabs opened, closed or saved under another name).
+        """
+        if not this._scheduled:
+            this._scheduled = True
+            wx.CallAfter(this.Sync)
+
+    def Sync(this):
+        this._scheduled = False
+        if not this.Notebook:
+            return
+
+        paths = {os.path.abspath(page.FileLoaded) for page in this.Pages()}
+        for path in this.Watched - paths:
+            this.Watcher.UnwatchFile(path)
+        for path in paths - this.Watched:
+            this.Watcher.WatchFile(path)
+        this.Watched = paths
+
+    def Stop(this):
+        this.Watcher.Stop()
+
+    def Check(this, page):
+        """
+        Compare a tab's file with what it was when loaded or saved.
+        """
+        if not isinstance(page, Editor) or not page or page.Hibernating:
+            return # A stub is read again when shown, then checked
+
+        path = page.FileLoaded
+        if not path or path in this.Asking or Engine.Saving(path):
+            return
+
+        signature = Signature(path)
+        if signature == page.Disk:
+            return
+        if signature is None: # Removed: saving creates it again
+            logger.info(f"{path} was removed by another program")
+            return
+
+        if page.Tracker.Dirty or (page.Large and page.Large.Modified):
+            this.Ask(page, signature)
+        else:
+            logger.info(f"Reloading {path}, changed by another program")
+            this.Reload(page)
+
+    def Reload(this, editor: Editor):
+        """
+        Load a file again, dropping what's unsaved.
+        """
+        path = editor.FileLoaded
+
+        if editor.Large:
+            editor.Large.Reopen()
+            editor.Disk = Signature(path)
+            return
+
+        state = Capture(editor)
+
+        def fill(future: Future):
+            if not editor or editor.FileLoaded != path:
+                return
+            if editor.Tracker.Dirty: # Typed meanwhile
+                return this.Check(editor)
+            if future.exception():
+                logger.warning(f"Unable to reload {path}: {future.exception()}")
+                return
+
+            data, format, signature = future.result()
+            if data is None: # Grew too much for the editor
+                editor.LoadLargeFile(path)
+            else:
+                editor.LoadRaw(data, format)
+                Apply(editor, state)
+            editor.Disk = signature
+
+        GetPool().submit(ReadFile, path).add_done_callback(lambda future: wx.CallAfter(fill, future))
+
+    def Ask(this, editor: Editor, signature: tuple):
+        path = editor.FileLoaded
+        this.Asking.add(path)
+
+        # No comparing in large file mode: the file can't be read as a whole
+        dlg = wx.MessageDialog(wx.GetTopLevelParent(this.Notebook),
+                               _(f"{path} was changed by another program, and has unsaved changes here."),
+                               _("File changed"), wx.YES_NO | wx.ICON_WARNING | (0 if editor.Large else wx.CANCEL))
+        dlg.SetYesNoCancelLabels(_("Reload"), _("Keep mine"), _("Compare"))
+        answer = dlg.ShowModal()
+        dlg.Destroy()
+        this.Asking.discard(path)
+
+        if not editor:
+            return
+        match answer:
+            case wx.ID_YES:
+                this.Reload(editor)
+            case wx.ID_NO:
+                editor.Disk = signature # Saving overwrites it now
+            case wx.ID_CANCEL:
+                this.Compare(editor) # Asked again when the tab is shown
+
+    def Compare(this, editor: Editor):
+        """
+        Show the differences between the file and the editor in a new tab.
+        """
+        path = editor.FileLoaded
+        mine = Snapshot(editor)
+
+        def diff() -> bytes:
+            theirs = ReadFile(path)[0] or b""
+            lines = difflib.unified_diff(theirs.decode("utf-8", "replace").splitlines(True),
+                                         mine.decode("utf-8", "replace").splitlines(True),
+                                         _(f"{path} (on disk)"), _(f"{path} (here)"))
+            return "".join(lines).encode("utf-8")
+
+        def show(future: Future):
+            if future.exception():
+                logger.warning(f"Unable to compare {path}: {future.exception()}")
+                return
+            this.Notebook.AddTab(tabname=_(f"Changes of {os.path.basename(path)}"))
+            this.Notebook.GetCurrentPage().LoadRaw(future.result())
+
+        GetPool().submit(diff).add_done_callback(lambda future: wx.CallAfter(show, future))
+
+    """
+    Events
+    """
+
+    def OnChanges(this, changes: set[tuple[str, str]]):
+        if not this.Notebook:
+            return
+
+        files = {os.path.join(directory, name) for directory, name in changes if name}
+        directories = {directory for directory, name in changes if not name}
+        for page in this.Pages():
+            path = os.path.abspath(page.FileLoaded)
+            if path in files or os.path.dirname(path) in directories:
+                this.Check(page)
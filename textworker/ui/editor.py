@@ -1,43 +1,221 @@
+import os
+import time
+import typing
 import wx
 import wx.xrc
 import wx.stc
 
-from libtextworker.interface.wx.editor import StyledTextControl
+from libtextworker.interface.wx.editor import DragNDropTarget, StyledTextControl
 
 from .autosave import AutoSave, AutoSaveConfig
-from ..generic import editorCfg
+from .largeview import LargeFileView
+from .lazy import LazyWindow
+from .profile import Configure, Current, EditorProfile, LineNumbersWidth, Restrict
+from .saver import Engine
+from .tracker import ChangeTracker
+from .. import limits
+from ..generic import editorCfg, logger
+from ..profiling import Counters
+from ..sniff import FileFormat
 
 
 class Editor(StyledTextControl, AutoSave):
 
-    def __init__(this, *args, **kwds):
-        this.Function = this.SaveFile
-        this.Function_args = {"filename": this.FileLoaded}
+    Large: LargeFileView | None = None
+    Hibernating: bool = False # Being replaced by a hibernate.TabStub
+    Format: FileFormat = FileFormat() # How FileLoaded is written, kept on save
+    Disk: tuple | None = None # watcher.Signature of FileLoaded when loaded or saved, see diskwatch
+    Profile: EditorProfile | None = None # What the editor was set up from, see ApplyProfile
+    Level: int = limits.NORMAL # How heavy the document is, see SetLevel
+    FullView: bool = False # Limits lifted by the user, see ui.limitsbar
+    LimitsListener: typing.Callable[["Editor"], None] | None = None # Called when Level or FullView change
+    _shown: EditorProfile | None = None # Profile restricted to Level, as configured
+    _keyed: float = 0.0 # When a key was typed, until the next paint
+
+    # One dialog for every editor, see ASConfig
+    asDlg = LazyWindow(lambda this: AutoSaveConfig(wx.GetTopLevelParent(this)), shared=True)
 
+    def __init__(this, *args, **kwds):
         StyledTextControl.__init__(this, *args, **kwds)
-        AutoSave.__init__(this)
 
-        this.asDlg = AutoSaveConfig(this)
-        this.asDlg.OnChoiceSelected = this.OnChoiceSelected
+        this.Tracker = ChangeTracker(this)
+        AutoSave.__init__(this)
 
         this.cfg = editorCfg
 
-        # this.EditorInit() content :smile:
-        this.LineNumbers()
-        this.DNDSupport()
-        this.IndentationSet()
+        # Instead of this.EditorInit(), which reads the settings again
+        this.ApplyProfile(Current())
+
+        # Keystroke to paint latency, see Help -> Performance
+        this.Bind(wx.EVT_CHAR, this.OnCharTimed)
+        this.Bind(wx.stc.EVT_STC_PAINTED, this.OnPaintedTimed)
+
+        this.Bind(wx.stc.EVT_STC_MODIFIED, this.OnModifiedLimits)
+
+        # The line numbers margin grows with the line count
+        this.Bind(wx.stc.EVT_STC_UPDATEUI, this.OnUpdateLineNumbers)
+        this.Bind(wx.stc.EVT_STC_ZOOM, this.OnUpdateLineNumbers)
+
+    def ApplyProfile(this, profile: EditorProfile):
+        """
+        Follow the editor settings and the theme, see ui.profile.
+        Only what differs from the current profile is changed, and the
+        file's own indentation still comes first.
+        """
+        previous, this.Profile = this.Profile, profile
+        this.ApplyLimits()
+
+        if not previous or profile.Menu != previous.Menu:
+            if profile.Menu:
+                this.Bind(wx.EVT_RIGHT_DOWN, this.MenuPopup)
+            elif previous:
+                this.Unbind(wx.EVT_RIGHT_DOWN, handler=this.MenuPopup)
+
+        if not previous or profile.DragAndDrop != previous.DragAndDrop:
+            this.SetDropTarget(DragNDropTarget(this) if profile.DragAndDrop else None)
+
+        if previous and (profile.UseTabs, profile.Indent) != (previous.UseTabs, previous.Indent):
+            this.ApplyFormat(this.Format)
+
+    def ApplyLimits(this):
+        """
+        Configure the editor from its profile, restricted to Level.
+        """
+        shown = this.Profile if this.FullView else Restrict(this.Profile, this.Level)
+        Configure(this, shown, this._shown)
+        this._shown = shown
+
+    def SetLevel(this, level: int):
+        """
+        Limit the editor for a document this heavy (see limits).
+        """
+        if level == this.Level:
+            return
+        logger.debug(f"Editor limits level: {this.Level} -> {level}")
+        this.Level = level
+        this.ApplyLimits()
+        if this.LimitsListener:
+            this.LimitsListener(this)
 
-        if this.cfg.Get("menu", "enabled") in this.cfg.yes_values:
-            this.Bind(wx.EVT_RIGHT_DOWN, this.MenuPopup)
+    def SetFullView(this, full: bool):
+        """
+        Lift the limits (or set them back), whatever the document.
+        """
+        this.FullView = full
+        this.ApplyLimits()
+        if this.LimitsListener:
+            this.LimitsListener(this)
 
-        this.SetWrapMode(this.cfg.Get("editor", "wordwrap") in this.cfg.yes_values)
+    def LoadRaw(this, data: bytes, format: FileFormat | None = None):
+        """
+        Replace the content with UTF-8 bytes, as a freshly loaded file.
+        """
+        # Before Scintilla lays anything out
+        thresholds = this.Profile.Thresholds
+        longest = 0
+        if len(data) < thresholds.Huge:
+            longest = limits.FindLongLine(data, thresholds.VeryLongLine) or \
+                      limits.FindLongLine(data, thresholds.LongLine)
+        this.SetLevel(limits.Assess(len(data), longest, thresholds))
+
+        this.SetTextRaw(data)
+        this.EmptyUndoBuffer()
+        this.SetSavePoint()
+        if format:
+            this.ApplyFormat(format)
+
+    def ApplyFormat(this, format: FileFormat):
+        """
+        Follow a file's line endings and indentation instead of the
+        settings (ApplyProfile), where they could be told.
+        """
+        this.Format = format
+
+        match format.EOL:
+            case "\r\n":
+                this.SetEOLMode(wx.stc.STC_EOL_CRLF)
+            case "\r":
+                this.SetEOLMode(wx.stc.STC_EOL_CR)
+            case "\n":
+                this.SetEOLMode(wx.stc.STC_EOL_LF)
+
+        if format.Tabs is not None:
+            this.SetUseTabs(format.Tabs)
+            this.SetIndent(0 if format.Tabs else format.Indent or this.GetIndent())
+
+    def OnCharTimed(this, evt):
+        if not this._keyed:
+            this._keyed = time.perf_counter()
+        evt.Skip()
+
+    def OnPaintedTimed(this, evt):
+        if this._keyed:
+            Counters.Add("keystroke to paint", time.perf_counter() - this._keyed)
+            this._keyed = 0.0
+        evt.Skip()
+
+    def OnUpdateLineNumbers(this, evt):
+        if this._shown and this._shown.LineNumbers:
+            width = LineNumbersWidth(this)
+            if width != this.GetMarginWidth(0):
+                this.SetMarginWidth(0, width)
+        evt.Skip()
+
+    def OnModifiedLimits(this, evt):
+        """
+        Raise the level as the document grows. Only the lines at both ends
+        of an insertion are measured (and its average line length).
+        """
+        if evt.GetModificationType() & wx.stc.STC_MOD_INSERTTEXT and this.Level < limits.HUGE:
+            start = this.LineFromPosition(evt.GetPosition())
+            end = this.LineFromPosition(evt.GetPosition() + evt.GetLength())
+            longest = max(this.LineLength(start), this.LineLength(end), evt.GetLength() // (end - start + 1))
+
+            level = limits.Assess(this.GetLength(), longest, this.Profile.Thresholds)
+            if level > this.Level:
+                # Not while Scintilla notifies a change
+                wx.CallAfter(lambda: this and this.SetLevel(max(level, this.Level)))
+        evt.Skip()
+
+    # Large file mode
+    def LoadLargeFile(this, path: str):
+        """
+        Open a file in large file mode: only a window of its lines is loaded.
+        """
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            size = 0
+        this.SetLevel(limits.Assess(size, 0, this.Profile.Thresholds))
+        this.Large = LargeFileView(this, path)
+
+    def ShowMatch(this, line: int, column: int = 0, length: int = 0):
+        """
+        Go to a (0-based) document line and select length bytes from column.
+        """
+        if this.Large:
+            this.Large.GoToLine(line)
+            line -= this.Large.FirstLine
+        else:
+            this.GotoLine(line)
+
+        end = this.GetLineEndPosition(line)
+        start = min(this.PositionFromLine(line) + column, end)
+        this.SetSelection(start, min(start + length, end))
+        this.EnsureCaretVisible()
+        this.SetFocus()
+
+    def SaveFile(this, filename: str = "", callback=None) -> bool:
+        """
+        Save the document in the background (see ui.saver).
+        @param filename: Defaults to FileLoaded
+        @param callback: Called as callback(path, error) once done
+        @return False if there is no file name to save to
+        """
+        return Engine.Save(this, filename, callback) is not None
 
     # AutoSaveConfig
     def ASConfig(this):
+        this.asDlg.Target = this
         this.asDlg.ChkBox.Hide()
-        this.asDlg.ConfigWindow(this)
-
-    def OnChoiceSelected(this, evt):
-        value = this.asDlg.Cmb.GetValue()
-        if value:
-            this.Start(this.asDlg.timealiases[value])
+        this.asDlg.ConfigWindow()
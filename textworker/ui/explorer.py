@@ -0,0 +1,307 @@
+import os
+import time
+import wx
+
+from concurrent.futures import Future
+
+from .. import _
+from ..generic import logger
+from ..watcher import Watcher
+from .opener import GetPool
+
+BATCH: int = 500 # Items added at once, the rest waits for the next event loop turn
+
+Entry = tuple[str, bool, int, int] # name, is a directory, size, modification time (ns)
+
+
+def ListDir(path: str) -> list[Entry]:
+    """
+    The entries of a directory, directories first, then by name.
+    Runs on a worker thread.
+    """
+    entries = []
+    with os.scandir(path) as it:
+        for entry in it:
+            try:
+                st = entry.stat()
+                is_dir = entry.is_dir()
+            except OSError: # Broken link, removed meanwhile...
+                st = None
+                is_dir = False
+            entries.append((entry.name, is_dir, st.st_size if st else 0, st.st_mtime_ns if st else 0))
+
+    entries.sort(key=lambda entry: (not entry[1], entry[0].lower(), entry[0]))
+    return entries
+
+
+class Explorer(wx.TreeCtrl):
+    """
+    A folder tree which never waits for the disk on the GUI thread.
+
+    Directories are listed on the I/O pool when first expanded, and their
+    items added in chunks of BATCH. What os.scandir found is kept in Stats,
+    so asking if an item is a directory (or for its size) costs nothing.
+    Listed directories are watched; a change lists the directory again and
+    only patches its own items.
+    """
+
+    def __init__(this, parent: wx.Window, style: int = wx.TR_DEFAULT_STYLE | wx.TR_HIDE_ROOT | wx.TR_EDIT_LABELS):
+        wx.TreeCtrl.__init__(this, parent, style=style)
+
+        images = wx.ImageList(16, 16)
+        this.folderidx = images.Add(wx.ArtProvider.GetBitmap(wx.ART_FOLDER, wx.ART_OTHER, (16, 16)))
+        this.fileidx = images.Add(wx.ArtProvider.GetBitmap(wx.ART_NORMAL_FILE, wx.ART_OTHER, (16, 16)))
+        this.openfolder = images.Add(wx.ArtProvider.GetBitmap(wx.ART_FOLDER_OPEN, wx.ART_OTHER, (16, 16)))
+        this.AssignImageList(images)
+
+        this.Folder = ""
+        this.Stats: dict[str, tuple[bool, int, int]] = {} # path: (is a directory, size, modification time)
+        this.Loaded: dict[str, wx.TreeItemId] = {} # Listed directory: its item
+        this.Pending: set[str] = set() # Being listed
+        this.Filling: set[str] = set() # Being added, in chunks
+        this.Stale: set[str] = set() # Changed while being listed or filled
+        this.Watcher: Watcher | None = None
+        this._generation = 0 # Changes with the folder, to drop late results
+
+        this.Bind(wx.EVT_TREE_ITEM_EXPANDING, this.OnExpanding)
+        this.Bind(wx.EVT_TREE_ITEM_GETTOOLTIP, this.OnGetToolTip)
+        this.Bind(wx.EVT_TREE_BEGIN_LABEL_EDIT, this.OnBeginRename)
+        this.Bind(wx.EVT_TREE_END_LABEL_EDIT, this.OnEndRename)
+        this.Bind(wx.EVT_WINDOW_DESTROY, this.OnDestroy)
+
+    def SetFolder(this, path: str):
+        if not os.path.isdir(path):
+            raise FileNotFoundError(f"Directory not found: {path}")
+
+        this._generation += 1
+        if this.Watcher:
+            this.Watcher.Stop()
+        this.Watcher = Watcher(lambda changes: wx.CallAfter(this.OnFsChanged, changes))
+
+        this.DeleteAllItems()
+        this.Stats.clear()
+        this.Loaded.clear()
+        this.Pending.clear()
+        this.Filling.clear()
+        this.Stale.clear()
+
+        this.Folder = os.path.abspath(path)
+        root = this.AddRoot(this.Folder, this.folderidx, data=this.Folder)
+        this.SetItemHasChildren(root)
+        this.Load(root)
+
+    def GetFullPath(this, item: wx.TreeItemId | None = None) -> str:
+        item = item or (this.GetFocusedItem() if this.HasFlag(wx.TR_MULTIPLE) else this.GetSelection())
+        return this.GetItemData(item) if item.IsOk() else ""
+
+    def IsDir(this, item: wx.TreeItemId | None = None) -> bool:
+        path = this.GetFullPath(item)
+        return path == this.Folder or this.Stats.get(path, (False,))[0]
+
+    def OnCompareItems(this, first: wx.TreeItemId, second: wx.TreeItemId) -> int:
+        # For SortChildren, same order as ListDir
+        keys = [(not this.IsDir(item), this.GetItemText(item).lower(), this.GetItemText(item))
+                for item in (first, second)]
+        return (keys[0] > keys[1]) - (keys[0] < keys[1])
+
+    """
+    Listing
+    """
+
+    def Load(this, item: wx.TreeItemId):
+        """
+        List a directory item's children in the background, then add them.
+        """
+        path = this.GetItemData(item)
+        if path in this.Loaded or path in this.Pending:
+            return
+
+        this.Pending.add(path)
+        generation = this._generation
+        GetPool().submit(ListDir, path).add_done_callback(
+            lambda future: wx.CallAfter(this._Fill, item, path, generation, future))
+
+    def _Fill(this, item: wx.TreeItemId, path: str, generation: int, future: Future):
+        if not this or generation != this._generation:
+            return
+        this.Pending.discard(path)
+
+        if future.exception():
+            logger.warning(f"Unable to list {path}: {future.exception()}")
+            this.SetItemHasChildren(item, False)
+            return
+
+        entries = future.result()
+        this.Loaded[path] = item
+        this.Watcher.WatchDir(path)
+        if not entries:
+            this.SetItemHasChildren(item, False)
+        this.Filling.add(path)
+        this._Append(item, path, entries, 0, generation)
+
+    def _Append(this, item: wx.TreeItemId, path: str, entries: list[Entry], start: int, generation: int):
+        if not this or generation != this._generation or this.Loaded.get(path) != item:
+            return
+
+        this.Freeze()
+        try:
+            for entry in entries[start:start + BATCH]:
+                this._AddEntry(item, path, entry)
+        finally:
+            this.Thaw()
+
+        if start + BATCH < len(entries):
+            wx.CallAfter(this._Append, item, path, entries, start + BATCH, generation)
+            return
+
+        this.Filling.discard(path)
+        if path in this.Stale:
+            this.Stale.discard(path)
+            this.RefreshDir(path)
+
+    def _AddEntry(this, parent: wx.TreeItemId, directory: str, entry: Entry, pos: int | None = None) -> wx.TreeItemId:
+        name, is_dir, size, mtime = entry
+        path = os.path.join(directory, name)
+        this.Stats[path] = (is_dir, size, mtime)
+
+        image = this.folderidx if is_dir else this.fileidx
+        if pos is None:
+            item = this.AppendItem(parent, name, image, data=path)
+        else:
+            item = this.InsertItem(parent, pos, name, image, data=path)
+
+        if is_dir:
+            this.SetItemHasChildren(item)
+            this.SetItemImage(item, this.openfolder, wx.TreeItemIcon_Expanded)
+        return item
+
+    def _Forget(this, path: str):
+        """
+        Drop what's known about a path and everything below it.
+        """
+        prefix = path + os.sep
+        for known in [known for known in this.Stats if known == path or known.startswith(prefix)]:
+            del this.Stats[known]
+        for known in [known for known in this.Loaded if known == path or known.startswith(prefix)]:
+            del this.Loaded[known]
+            this.Filling.discard(known)
+            this.Stale.discard(known)
+            this.Watcher.UnwatchDir(known)
+
+    def RefreshDir(this, path: str):
+        """
+        List a directory again and update its items. Nothing happens if
+        it was never listed: that will be done when it's expanded.
+        """
+        if path not in this.Loaded:
+            return
+        if path in this.Pending or path in this.Filling:
+            this.Stale.add(path) # Refreshed once done
+            return
+
+        this.Pending.add(path)
+        generation = this._generation
+        GetPool().submit(ListDir, path).add_done_callback(
+            lambda future: wx.CallAfter(this._Patch, path, generation, future))
+
+    def _Patch(this, path: str, generation: int, future: Future):
+        if not this or generation != this._generation:
+            return
+        this.Pending.discard(path)
+
+        item = this.Loaded.get(path)
+        if item is None:
+            return
+        if future.exception(): # Removed, its parent gets a notification too
+            logger.debug(f"Unable to list {path}: {future.exception()}")
+            return
+
+        entries = future.result()
+        wanted = {entry[0]: entry for entry in entries}
+
+        this.Freeze()
+        try:
+            kept = set()
+            child, cookie = this.GetFirstChild(item)
+            gone = []
+            while child.IsOk():
+                name = this.GetItemText(child)
+                full = os.path.join(path, name)
+                entry = wanted.get(name)
+                if entry is None or entry[1] != this.Stats.get(full, (None,))[0]:
+                    gone.append((full, child))
+                else:
+                    this.Stats[full] = entry[1:]
+                    kept.add(name)
+                child, cookie = this.GetNextChild(item, cookie)
+
+            for full, child in gone:
+                this._Forget(full)
+                this.Delete(child)
+
+            # Children are in the same order as entries, add the missing ones
+            for pos, entry in enumerate(entries):
+                if entry[0] not in kept:
+                    this._AddEntry(item, path, entry, pos)
+
+            this.SetItemHasChildren(item, bool(entries))
+        finally:
+            this.Thaw()
+
+        if path in this.Stale:
+            this.Stale.discard(path)
+            this.RefreshDir(path)
+
+    """
+    Events
+    """
+
+    def OnFsChanged(this, changes: set[tuple[str, str]]):
+        if not this:
+            return
+        for directory in {directory for directory, name in changes}:
+            this.RefreshDir(directory)
+
+    def OnExpanding(this, evt):
+        this.Load(evt.GetItem())
+        evt.Skip()
+
+    def OnGetToolTip(this, evt):
+        stats = this.Stats.get(this.GetFullPath(evt.GetItem()))
+        if stats and not stats[0]:
+            evt.SetToolTip(_(f"{stats[1]} bytes, modified {time.strftime('%c', time.localtime(stats[2] / 1e9))}"))
+
+    def OnBeginRename(this, evt):
+        if evt.GetItem() == this.GetRootItem():
+            evt.Veto()
+
+    def OnEndRename(this, evt):
+        label = evt.GetLabel()
+        if evt.IsEditCancelled() or not label:
+            return
+
+        item = evt.GetItem()
+        old = this.GetFullPath(item)
+        new = os.path.join(os.path.dirname(old), label)
+        try:
+            os.rename(old, new)
+        except OSError as e:
+            evt.Veto()
+            wx.MessageBox(_(f"Unable to rename {old}: {e}"), _("Error"), wx.OK | wx.ICON_ERROR, this)
+            return
+
+        # Listed again from its new name when expanded
+        stats = this.Stats.get(old, (False, 0, 0))
+        this._Forget(old)
+        this.Stats[new] = stats
+        this.SetItemData(item, new)
+        if stats[0]:
+            this.Collapse(item)
+            this.DeleteChildren(item)
+            this.SetItemHasChildren(item)
+        wx.CallAfter(this.SortChildren, this.GetItemParent(item)) # Once the new label is set
+
+    def OnDestroy(this, evt):
+        if evt.GetWindow() is this and this.Watcher:
+            this.Watcher.Stop()
+        evt.Skip()
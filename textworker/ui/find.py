@@ -0,0 +1,374 @@
+import re
+import wx
+import wx.stc
+
+from typing import Callable, Iterator
+
+from .. import _
+from ..generic import clrCall
+
+CHUNK: int = 1 << 20 # 1 MiB, searched at once
+INDICATOR: int = wx.stc.STC_INDIC_CONTAINER # The first indicator free for applications
+
+
+def Chunks(editor: wx.stc.StyledTextCtrl, start: int = 0, end: int | None = None) -> list[tuple[int, int]]:
+    """
+    Split [start, end) into ranges of about CHUNK bytes ending at line ends,
+    so that a match can only be cut if it spans lines (or a line is
+    longer than CHUNK).
+    """
+    end = editor.GetLength() if end is None else end
+    ranges = []
+    while start < end:
+        stop = min(start + CHUNK, end)
+        if stop < end:
+            line_end = editor.PositionFromLine(editor.LineFromPosition(stop) + 1)
+            if line_end == -1 or line_end > end:
+                line_end = end
+            if line_end - stop <= CHUNK:
+                stop = line_end
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+def Size(text: str) -> int:
+    """
+    Length of text in UTF-8 bytes (see Finder.Scan).
+    """
+    return len(text.encode("utf-8", "surrogateescape"))
+
+
+class Finder:
+    """
+    Find and replace in an editor, at Scintilla's UTF-8 byte positions.
+
+    The document is never copied as a whole: it's read CHUNK by CHUNK with
+    GetTextRangeRaw, and each chunk is searched as text so that case
+    folding, word characters and boundaries follow Unicode. Matches are
+    highlighted with an indicator for the visible lines only, again after
+    each scroll or change.
+    """
+
+    def __init__(this, editor: wx.stc.StyledTextCtrl):
+        this.Editor = editor
+        this.Pattern: re.Pattern | None = None
+        this.Template = "" # Replacement, for Match.expand
+        this._lit = (0, 0) # Range with highlights
+
+        editor.IndicatorSetStyle(INDICATOR, wx.stc.STC_INDIC_ROUNDBOX)
+        editor.IndicatorSetForeground(INDICATOR, wx.Colour(255, 190, 0))
+        editor.IndicatorSetAlpha(INDICATOR, 90)
+        editor.Bind(wx.stc.EVT_STC_UPDATEUI, this.OnUpdateUI)
+
+    def Detach(this):
+        if this.Editor:
+            this.Clear()
+            this.Editor.Unbind(wx.stc.EVT_STC_UPDATEUI, handler=this.OnUpdateUI)
+
+    def SetSearch(this, text: str, regex: bool = False, case: bool = False, replacement: str = ""):
+        """
+        Raises re.error for an invalid expression.
+        """
+        template = replacement
+        if not regex:
+            text = re.escape(text)
+            template = template.replace("\\", "\\\\")
+
+        this.Pattern = re.compile(text, re.MULTILINE | (0 if case else re.IGNORECASE)) if text else None
+        this.Template = template
+        this.Highlight()
+
+    def Scan(this, data: bytes) -> Iterator[tuple[int, int, re.Match]]:
+        """
+        (start, end, match) of each match in UTF-8 data, as byte offsets.
+        Invalid UTF-8 is decoded as surrogates, which encode back to the
+        same bytes.
+        """
+        text = data.decode("utf-8", "surrogateescape")
+        if len(text) == len(data): # ASCII, offsets are the same
+            for match in this.Pattern.finditer(text):
+                yield match.start(), match.end(), match
+            return
+
+        offset = position = 0 # Byte offset of position in text
+        for match in this.Pattern.finditer(text):
+            offset += Size(text[position:match.start()])
+            position = match.start()
+            yield offset, offset + Size(match.group()), match
+
+    def Expand(this, match: re.Match) -> bytes:
+        return match.expand(this.Template).encode("utf-8", "surrogateescape")
+
+    def Matches(this, start: int = 0, end: int | None = None) -> Iterator[tuple[int, int]]:
+        """
+        (start, end) of each non empty match within [start, end).
+        Whole lines are searched, so ^ and $ only match at real line starts and ends.
+        """
+        if not this.Pattern:
+            return
+
+        editor = this.Editor
+        end = editor.GetLength() if end is None else end
+        begin = editor.PositionFromLine(editor.LineFromPosition(start))
+        stop = editor.GetLineEndPosition(editor.LineFromPosition(end))
+
+        for first, last in Chunks(editor, begin, stop):
+            for match_start, match_end, match in this.Scan(editor.GetTextRangeRaw(first, last)):
+                match_start, match_end = first + match_start, first + match_end
+                if match_start >= end:
+                    return
+                if match_end > match_start and match_start >= start and match_end <= end:
+                    yield match_start, match_end
+
+    """
+    Highlights
+    """
+
+    def Clear(this):
+        start, end = this._lit
+        if end > start:
+            this.Editor.SetIndicatorCurrent(INDICATOR)
+            this.Editor.IndicatorClearRange(start, min(end, this.Editor.GetLength()) - start)
+        this._lit = (0, 0)
+
+    def Highlight(this):
+        editor = this.Editor
+        this.Clear()
+        if not this.Pattern:
+            return
+
+        top = editor.GetFirstVisibleLine()
+        first = editor.DocLineFromVisible(top)
+        last = editor.DocLineFromVisible(top + editor.LinesOnScreen())
+        start, end = editor.PositionFromLine(first), editor.GetLineEndPosition(last)
+
+        editor.SetIndicatorCurrent(INDICATOR)
+        for match_start, match_end in this.Matches(start, end):
+            editor.IndicatorFillRange(match_start, match_end - match_start)
+        this._lit = (start, end)
+
+    def OnUpdateUI(this, evt: wx.stc.StyledTextEvent):
+        if evt.GetUpdated() & (wx.stc.STC_UPDATE_CONTENT | wx.stc.STC_UPDATE_V_SCROLL):
+            this.Highlight()
+        evt.Skip()
+
+    """
+    Find and replace
+    """
+
+    def Select(this, start: int, end: int):
+        this.Editor.SetSelection(start, end)
+        this.Editor.EnsureCaretVisible()
+
+    def FindNext(this, forward: bool = True) -> bool:
+        """
+        Select the next (or previous) match, wrapping around.
+        """
+        editor = this.Editor
+        if not this.Pattern:
+            return False
+
+        if forward:
+            position = editor.GetSelectionEnd()
+            for start, end in [(position, None), (0, position)]:
+                for match in this.Matches(start, end):
+                    this.Select(*match)
+                    return True
+            return False
+
+        position = editor.GetSelectionStart()
+        for start, end in [(0, position), (position, editor.GetLength())]:
+            for first, last in reversed(Chunks(editor, start, end)):
+                found = None
+                for found in this.Matches(first, last):
+                    pass
+                if found:
+                    this.Select(*found)
+                    return True
+        return False
+
+    def Replace(this) -> bool:
+        """
+        Replace the selection if it is a match, then find the next one.
+        """
+        editor = this.Editor
+        start, end = editor.GetSelection()
+        match = this.Pattern and end > start and \
+                this.Pattern.fullmatch(editor.GetTextRangeRaw(start, end).decode("utf-8", "surrogateescape"))
+        if match:
+            editor.SetTargetRange(start, end)
+            editor.ReplaceTargetRaw(this.Expand(match))
+            editor.SetSelection(editor.GetTargetEnd(), editor.GetTargetEnd())
+        return this.FindNext()
+
+    def ReplaceAll(this) -> int:
+        """
+        Replace every match, as a single undo action, without redrawing
+        in between. Returns the number of replacements.
+
+        Each chunk is rewritten by Pattern.sub and replaced at once, from
+        its first match: a handful of Scintilla changes per MiB instead of
+        one per match. Chunks are done from the end, so the positions of
+        the ones left don't move. Empty matches are left alone, as Matches
+        (and so FindNext) skips them.
+        """
+        editor = this.Editor
+        if not this.Pattern:
+            return 0
+
+        count = 0
+        first: int | None = None # Of the chunk, in characters
+
+        def replace(match: re.Match) -> str:
+            nonlocal count, first
+            if match.end() == match.start():
+                return ""
+            count += 1
+            if first is None:
+                first = match.start()
+            return match.expand(this.Template)
+
+        this.Clear()
+        editor.Freeze()
+        editor.BeginUndoAction()
+        try:
+            for start, end in reversed(Chunks(editor)):
+                text = editor.GetTextRangeRaw(start, end).decode("utf-8", "surrogateescape")
+                first = None
+                new = this.Pattern.sub(replace, text)
+                if first is None:
+                    continue
+                # Nothing changes before the first match
+                editor.SetTargetRange(start + Size(text[:first]), end)
+                editor.ReplaceTargetRaw(new[first:].encode("utf-8", "surrogateescape"))
+        finally:
+            editor.EndUndoAction()
+            editor.Thaw()
+
+        this.Highlight()
+        return count
+
+
+class FindDialog(wx.Dialog):
+    """
+    Find/replace in the current editor, see Finder.
+    """
+
+    def __init__(this, parent: wx.Window, get_editor: Callable[[], wx.stc.StyledTextCtrl | None]):
+        wx.Dialog.__init__(this, parent, title=_("Find and replace"),
+                           style=wx.DEFAULT_DIALOG_STYLE | wx.RESIZE_BORDER)
+        this.GetEditor = get_editor
+        this.Finder: Finder | None = None
+
+        this.FindText = wx.TextCtrl(this, style=wx.TE_PROCESS_ENTER)
+        this.ReplaceText = wx.TextCtrl(this, style=wx.TE_PROCESS_ENTER)
+        this.Regex = wx.CheckBox(this, label=_("Regular expression"))
+        this.Case = wx.CheckBox(this, label=_("Match case"))
+        this.Status = wx.StaticText(this)
+
+        fields = wx.FlexGridSizer(2, 5, 5)
+        fields.AddGrowableCol(1)
+        fields.Add(wx.StaticText(this, label=_("Find:")), 0, wx.ALIGN_CENTER_VERTICAL)
+        fields.Add(this.FindText, 1, wx.EXPAND)
+        fields.Add(wx.StaticText(this, label=_("Replace with:")), 0, wx.ALIGN_CENTER_VERTICAL)
+        fields.Add(this.ReplaceText, 1, wx.EXPAND)
+
+        options = wx.BoxSizer(wx.HORIZONTAL)
+        options.Add(this.Regex, 0, wx.RIGHT, 5)
+        options.Add(this.Case)
+
+        buttons = wx.BoxSizer(wx.HORIZONTAL)
+        for label, handler in [(_("Previous"), lambda evt: this.Find(False)),
+                               (_("Next"), lambda evt: this.Find(True)),
+                               (_("Replace"), this.OnReplace),
+                               (_("Replace all"), this.OnReplaceAll)]:
+            button = wx.Button(this, label=label)
+            button.Bind(wx.EVT_BUTTON, handler)
+            buttons.Add(button, 0, wx.LEFT, 5)
+
+        sizer = wx.BoxSizer(wx.VERTICAL)
+        sizer.Add(fields, 0, wx.EXPAND | wx.ALL, 5)
+        sizer.Add(options, 0, wx.EXPAND | wx.LEFT | wx.RIGHT, 5)
+        sizer.Add(buttons, 0, wx.ALIGN_RIGHT | wx.ALL, 5)
+        sizer.Add(this.Status, 0, wx.EXPAND | wx.LEFT | wx.RIGHT | wx.BOTTOM, 5)
+        this.SetSizerAndFit(sizer)
+
+        for control in [this.FindText, this.ReplaceText]:
+            control.Bind(wx.EVT_TEXT, this.OnChanged)
+        for control in [this.Regex, this.Case]:
+            control.Bind(wx.EVT_CHECKBOX, this.OnChanged)
+        this.FindText.Bind(wx.EVT_TEXT_ENTER, lambda evt: this.Find(not wx.GetKeyState(wx.WXK_SHIFT)))
+        this.ReplaceText.Bind(wx.EVT_TEXT_ENTER, this.OnReplace)
+        this.Bind(wx.EVT_CLOSE, this.OnClose)
+
+        clrCall.configure(this)
+
+    def Popup(this, replace: bool = False):
+        editor = this.GetEditor()
+        if editor:
+            selected = editor.GetSelectedText()
+            if selected and "\n" not in selected:
+                this.FindText.ChangeValue(selected)
+        this.Show()
+        this.Raise()
+        field = this.ReplaceText if replace else this.FindText
+        field.SetFocus()
+        field.SelectAll()
+        this.Prepare()
+
+    def Prepare(this) -> Finder | None:
+        """
+        Get a Finder for the current editor, with the current search.
+        """
+        editor = this.GetEditor()
+        if this.Finder and this.Finder.Editor is not editor:
+            this.Finder.Detach()
+            this.Finder = None
+        if not editor:
+            return None
+        if not this.Finder:
+            this.Finder = Finder(editor)
+
+        try:
+            this.Finder.SetSearch(this.FindText.GetValue(), this.Regex.GetValue(),
+                                  this.Case.GetValue(), this.ReplaceText.GetValue())
+            this.Status.SetLabel("")
+        except re.error as e:
+            this.Finder.SetSearch("")
+            this.Status.SetLabel(_(f"Invalid regular expression: {e}"))
+            return None
+        return this.Finder
+
+    def Find(this, forward: bool = True):
+        finder = this.Prepare()
+        if finder and not finder.FindNext(forward):
+            this.Status.SetLabel(_("Not found"))
+
+    """
+    Events
+    """
+
+    def OnChanged(this, evt):
+        this.Prepare()
+
+    def OnReplace(this, evt):
+        finder = this.Prepare()
+        if finder and not finder.Replace():
+            this.Status.SetLabel(_("Not found"))
+
+    def OnReplaceAll(this, evt):
+        finder = this.Prepare()
+        if finder:
+            wx.BeginBusyCursor()
+            try:
+                count = finder.ReplaceAll()
+            finally:
+                wx.EndBusyCursor()
+            this.Status.SetLabel(_(f"Replaced {count} matches"))
+
+    def OnClose(this, evt):
+        if this.Finder:
+            this.Finder.Detach()
+            this.Finder = None
+        this.Hide()
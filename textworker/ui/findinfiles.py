@@ -0,0 +1,171 @@
+import os
+import re
+import threading
+import wx
+
+from .. import _
+from ..fileindex import Walk
+from ..findfiles import FindJob, Hit
+
+FLUSH_DELAY: int = 100 # ms, hits are shown in batches
+
+
+class HitList(wx.ListCtrl):
+    """
+    A virtual list of hits: rows are only formatted when they are shown,
+    whatever the number of hits.
+    """
+
+    def __init__(this, parent: wx.Window):
+        wx.ListCtrl.__init__(this, parent, style=wx.LC_REPORT | wx.LC_VIRTUAL | wx.LC_SINGLE_SEL)
+        this.Root = ""
+        this.Hits: list[Hit] = []
+
+        this.InsertColumn(0, _("File"), width=160)
+        this.InsertColumn(1, _("Line"), wx.LIST_FORMAT_RIGHT, width=50)
+        this.InsertColumn(2, _("Text"), width=400)
+
+    def Add(this, hits: list[Hit]):
+        this.Hits += hits
+        this.SetItemCount(len(this.Hits))
+
+    def Clear(this, root: str = ""):
+        this.Root = root
+        this.Hits = []
+        this.SetItemCount(0)
+
+    def OnGetItemText(this, item: int, column: int) -> str:
+        path, line, start, length, text = this.Hits[item]
+        match column:
+            case 0:
+                return os.path.relpath(path, this.Root) if this.Root else path
+            case 1:
+                return str(line + 1)
+            case _:
+                return text.strip()
+
+
+class FindInFiles(wx.Panel):
+    """
+    The Find in Files side panel: searches the Explorer folder
+    (see findfiles.FindJob), clicking a hit shows it in the editor.
+    """
+
+    def __init__(this, parent: wx.Window, frame: wx.Frame):
+        wx.Panel.__init__(this, parent)
+        this.Frame = frame
+        this.Job: FindJob | None = None
+
+        this._lock = threading.Lock()
+        this._pending: list[Hit] = []
+        this._scheduled = False
+
+        this.Entry = wx.TextCtrl(this, style=wx.TE_PROCESS_ENTER)
+        this.Entry.SetHint(_("Find in the opened folder"))
+        this.Regex = wx.CheckBox(this, label=_("Regular expression"))
+        this.Case = wx.CheckBox(this, label=_("Match case"))
+        this.Button = wx.Button(this, label=_("Search"))
+        this.Status = wx.StaticText(this)
+        this.Results = HitList(this)
+
+        options = wx.BoxSizer(wx.HORIZONTAL)
+        options.Add(this.Regex, 0, wx.ALIGN_CENTER_VERTICAL | wx.RIGHT, 5)
+        options.Add(this.Case, 0, wx.ALIGN_CENTER_VERTICAL)
+        options.AddStretchSpacer()
+        options.Add(this.Button)
+
+        sizer = wx.BoxSizer(wx.VERTICAL)
+        sizer.Add(this.Entry, 0, wx.EXPAND | wx.ALL, 5)
+        sizer.Add(options, 0, wx.EXPAND | wx.LEFT | wx.RIGHT, 5)
+        sizer.Add(this.Status, 0, wx.EXPAND | wx.ALL, 5)
+        sizer.Add(this.Results, 1, wx.EXPAND)
+        this.SetSizer(sizer)
+
+        this.Entry.Bind(wx.EVT_TEXT_ENTER, this.OnSearch)
+        this.Button.Bind(wx.EVT_BUTTON, this.OnSearch)
+        this.Results.Bind(wx.EVT_LIST_ITEM_SELECTED, this.OnHitSelected)
+
+    def Paths(this, root: str):
+        """
+        What to search: the Quick open index if it's there for the same
+        folder (it already skipped ignored files), else a walk of it.
+        """
+        index = this.Frame.fileindex
+        if index and index.Root == root and index.Complete.is_set():
+            return lambda: (os.path.join(root, path) for path in index.Paths())
+        return lambda: (os.path.join(root, path) for path in Walk(root)[0])
+
+    def Search(this, text: str):
+        this.Stop()
+
+        root = this.Frame.dirs.Folder
+        if not root:
+            this.Status.SetLabel(_("Open a folder first"))
+            return
+        if not text:
+            return
+
+        try:
+            this.Job = FindJob(this.Paths(root), text, this.Regex.GetValue(), this.Case.GetValue(),
+                               this._Found, lambda *args: wx.CallAfter(this.OnDone, *args))
+        except re.error as e:
+            this.Status.SetLabel(_(f"Invalid regular expression: {e}"))
+            return
+
+        this.Results.Clear(root)
+        with this._lock:
+            this._pending = []
+        this.Job.Start()
+        this.Button.SetLabel(_("Stop"))
+        this.Status.SetLabel(_("Searching..."))
+
+    def Stop(this):
+        if this.Job:
+            this.Job.Cancel()
+            this.Job = None
+        this.Button.SetLabel(_("Search"))
+
+    def _Found(this, job: FindJob, hits: list[Hit]):
+        # Search thread
+        with this._lock:
+            if job is not this.Job:
+                return
+            this._pending += hits
+            if this._scheduled:
+                return
+            this._scheduled = True
+        wx.CallAfter(wx.CallLater, FLUSH_DELAY, this._Flush, job)
+
+    def _Flush(this, job: FindJob | None):
+        with this._lock:
+            hits, this._pending = this._pending, []
+            this._scheduled = False
+        if this and job is this.Job and hits:
+            this.Results.Add(hits)
+            this.Status.SetLabel(_(f"Searching... {len(this.Results.Hits)} matches"))
+
+    """
+    Events
+    """
+
+    def OnSearch(this, evt):
+        if this.Job and evt.GetEventObject() is this.Button:
+            this.Stop()
+            this.Status.SetLabel(_(f"Stopped, {len(this.Results.Hits)} matches"))
+        else:
+            this.Search(this.Entry.GetValue())
+
+    def OnDone(this, job: FindJob, count: int, cancelled: bool):
+        if not this or job is not this.Job:
+            return
+        this._Flush(job)
+        this.Job = None
+        this.Button.SetLabel(_("Search"))
+        if cancelled:
+            this.Status.SetLabel(_(f"Stopped, {count} matches"))
+        else:
+            this.Status.SetLabel(_(f"{count} matches"))
+
+    def OnHitSelected(this, evt):
+        path, line, start, length, text = this.Results.Hits[evt.GetIndex()]
+        this.Frame.notebook.ShowFileAt(path, line, start, length)
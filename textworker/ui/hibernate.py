@@ -0,0 +1,318 @@
+import os
+import uuid
+import wx
+import zlib
+
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable
+
+from .. import _
+from ..fileio import AtomicWrite
+from ..generic import CACHE_PATH, get_setting, logger
+from ..sniff import Encoded, FileFormat
+from ..watcher import Signature
+from .editor import Editor
+from .opener import GetPool, ReadFile
+from .saver import Engine, Snapshot
+
+# Total size of the documents kept in live editors (MiB), 0 for no limit
+BUDGET: int = get_setting("editor.tabs", "memory_budget", 256) * 1024 * 1024
+
+# Estimated cost of an editor control itself, whatever its content
+EDITOR_OVERHEAD: int = 512 * 1024
+
+SCRATCH_DIR: str = os.path.join(CACHE_PATH, "hibernate")
+
+
+def Cost(editor) -> int:
+    """
+    Rough memory use of an editor: Scintilla keeps a style byte per
+    character next to the text.
+    """
+    return editor.GetLength() * 2 + EDITOR_OVERHEAD
+
+
+def Capture(editor) -> dict:
+    """
+    The view state of an editor, to be given back by Apply().
+    """
+    state = {"anchor": editor.GetAnchor(),
+             "caret": editor.GetCurrentPos(),
+             "first_line": editor.GetFirstVisibleLine(),
+             "x_offset": editor.GetXOffset(),
+             "zoom": editor.GetZoom(),
+             "wrap": editor.GetWrapMode()}
+
+    # Only if set for this editor, see AutoSave
+    for name in ["CurrDelay", "AutoSaveOn"]:
+        if name in editor.__dict__:
+            state[name] = editor.__dict__[name]
+
+    return state
+
+
+def Apply(editor, state: dict):
+    editor.SetZoom(state.get("zoom", editor.GetZoom()))
+    editor.SetWrapMode(state.get("wrap", editor.GetWrapMode()))
+
+    length = editor.GetLength()
+    editor.SetAnchor(min(state.get("anchor", 0), length))
+    editor.SetCurrentPos(min(state.get("caret", 0), length))
+    editor.SetFirstVisibleLine(state.get("first_line", 0))
+    editor.SetXOffset(state.get("x_offset", 0))
+
+    if "CurrDelay" in state:
+        editor.CurrDelay = state["CurrDelay"]
+    if "AutoSaveOn" in state:
+        editor.Toggle(state["AutoSaveOn"])
+
+
+def Spill(data: bytes) -> tuple[str, Future]:
+    """
+    Compress unsaved text into a scratch file, in the background.
+    """
+    path = os.path.join(SCRATCH_DIR, uuid.uuid4().hex + ".z")
+
+    def write():
+        os.makedirs(SCRATCH_DIR, exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(zlib.compress(data, 1))
+
+    return path, GetPool().submit(write)
+
+
+def ReadScratch(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return zlib.decompress(f.read())
+
+
+class TabStub(wx.Panel):
+    """
+    A tab without an editor: either never shown yet, or hibernated.
+
+    It remembers the file, the view state (caret, selection, scroll...)
+    and, for a tab with unsaved changes, the scratch file holding its text.
+    The notebook swaps it for a real editor when it gets selected.
+    """
+
+    def __init__(this, parent: wx.Window, path: str = "", state: dict | None = None):
+        wx.Panel.__init__(this, parent)
+
+        this.FileLoaded = path
+        this.Format: FileFormat | None = None # Of the editor this stub replaced
+        this.Disk: tuple | None = None # Same, see Editor.Disk
+        this.State = state or {}
+        this.Dirty = False
+        this.Scratch = "" # Unsaved text, compressed
+        this.Pending: Future | None = None # Writing the scratch file
+        this.Realizing = False
+
+        this.Bind(wx.EVT_WINDOW_DESTROY, this.OnDestroy)
+
+    def SetScratch(this, data: bytes):
+        this.Dirty = True
+        this.Scratch, this.Pending = Spill(data)
+
+    def ReadScratch(this) -> bytes:
+        if this.Pending:
+            this.Pending.result()
+        return ReadScratch(this.Scratch)
+
+    def DropScratch(this):
+        if this.Scratch and os.path.exists(this.Scratch):
+            os.remove(this.Scratch)
+        this.Scratch = ""
+        this.Dirty = False
+
+    def SaveFile(this, filename: str = "", callback: Callable[[str, Exception | None], None] | None = None) -> bool:
+        """
+        Write the unsaved text to its file without making an editor.
+        """
+        path = filename or this.FileLoaded
+        if not path or not this.Dirty:
+            return False
+
+        pending, scratch, format = this.Pending, this.Scratch, this.Format or FileFormat()
+        signature = None
+
+        def work():
+            nonlocal signature
+            if pending:
+                pending.result()
+            AtomicWrite(path, Encoded(ReadScratch(scratch), format))
+            signature = Signature(path)
+
+        def done(error: Exception | None):
+            if not error and this:
+                this.FileLoaded = path
+                this.Disk = signature
+                this.DropScratch()
+                notebook = this.GetParent()
+                notebook.SetPageText(notebook.GetPageIndex(this), path)
+            if callback:
+                callback(path, error)
+
+        Engine.Run(path, work, done)
+        return True
+
+    def OnDestroy(this, evt):
+        if evt.GetWindow() is not this or this.Realizing or not this.Dirty:
+            return evt.Skip()
+
+        # Closing: no time for the background, save right away
+        path = this.FileLoaded or _("this new file")
+        if wx.MessageBox(_(f"Save {path}? It has unsaved changes."),
+                         _("Not saved"), wx.YES_NO | wx.YES_DEFAULT) == wx.YES:
+            path = this.FileLoaded or wx.FileSelector(_("Save this to..."), flags=wx.FD_SAVE | wx.FD_OVERWRITE_PROMPT)
+            try:
+                if path:
+                    AtomicWrite(path, Encoded(this.ReadScratch(), this.Format or FileFormat()))
+            except OSError as e:
+                logger.error(f"Unable to save {path}: {e}")
+                return evt.Skip() # Keep the scratch file
+
+        this.DropScratch()
+        evt.Skip()
+
+
+class Hibernator:
+    """
+    Keeps the memory used by editors under BUDGET.
+
+    Editors are ordered by the last time they were selected. When the
+    budget is exceeded, the least recently used ones (but never the current
+    one, nor one in large file mode) are replaced by a TabStub: their
+    control is destroyed, unsaved text goes compressed to a scratch file.
+    Selecting the tab again brings the editor back (Realize).
+    """
+
+    def __init__(this, notebook, make_editor: Callable[[], Editor]):
+        this.Notebook = notebook
+        this.MakeEditor = make_editor
+        this.Used: OrderedDict = OrderedDict() # editor: None, most recent last
+        this._scheduled = False
+
+    def Touch(this, editor):
+        this.Used.pop(editor, None)
+        this.Used[editor] = None
+        this.Schedule()
+
+    def Forget(this, editor):
+        this.Used.pop(editor, None)
+
+    def Schedule(this):
+        if not this._scheduled and BUDGET > 0:
+            this._scheduled = True
+            wx.CallAfter(this.Enforce)
+
+    def Enforce(this):
+        this._scheduled = False
+        if not this.Notebook:
+            return
+
+        current = this.Notebook.GetCurrentPage()
+        editors = [page for page in map(this.Notebook.GetPage, range(this.Notebook.GetPageCount()))
+                   if isinstance(page, Editor)]
+        total = sum(map(Cost, editors))
+        if total <= BUDGET:
+            return
+
+        # Never selected ones first, then least recently used
+        order = [editor for editor in editors if editor not in this.Used] + \
+                [editor for editor in this.Used if editor in editors]
+
+        for editor in order:
+            if total <= BUDGET:
+                break
+            if editor is current or editor.Large:
+                continue
+            total -= Cost(editor)
+            this.Hibernate(editor)
+
+    def Hibernate(this, editor: Editor) -> TabStub:
+        notebook = this.Notebook
+        index = notebook.GetPageIndex(editor)
+
+        stub = TabStub(notebook, editor.FileLoaded, Capture(editor))
+        stub.Format, stub.Disk = editor.Format, editor.Disk
+        if editor.Tracker.Dirty:
+            stub.SetScratch(Snapshot(editor))
+
+        notebook.InsertPage(index, stub, notebook.GetPageText(index), select=False)
+
+        this.Forget(editor)
+        if editor.Scheduler:
+            editor.Scheduler.Unschedule(editor)
+        editor.Hibernating = True
+        notebook.DeletePage(notebook.GetPageIndex(editor))
+
+        logger.debug(f"Hibernated {stub.FileLoaded or 'a new file'}")
+        return stub
+
+    def Realize(this, stub: TabStub):
+        """
+        Replace a TabStub with an editor showing the same document.
+        """
+        notebook = this.Notebook
+        index = notebook.GetPageIndex(stub)
+        if index == wx.NOT_FOUND:
+            return
+
+        editor = this.MakeEditor()
+        stub.Realizing = True
+        notebook.InsertPage(index, editor, notebook.GetPageText(index), select=True)
+        notebook.DeletePage(notebook.GetPageIndex(stub))
+
+        path, state, dirty = stub.FileLoaded, stub.State, stub.Dirty
+        scratch, pending, format, disk = stub.Scratch, stub.Pending, stub.Format, stub.Disk
+        editor.FileLoaded = path
+
+        def load() -> tuple[tuple, bytes | None]:
+            # Worker thread: the file on disk (its format and signature), and the unsaved text if any
+            base = ReadFile(path) if path and os.path.isfile(path) else (b"", None, None)
+            if not dirty:
+                return base, None
+            if pending:
+                pending.result()
+            return base, ReadScratch(scratch)
+
+        def drop():
+            # Only once the text is in the editor (or has nowhere to go)
+            if dirty and os.path.exists(scratch):
+                os.remove(scratch)
+
+        def fill(future: Future):
+            if not editor:
+                return drop()
+
+            if future.exception():
+                logger.warning(f"Unable to restore {path}: {future.exception()}")
+                if dirty:
+                    logger.warning(f"Its unsaved text is kept in {scratch}")
+                wx.MessageBox(_("Unable to open these files:\n") + f"{path}: {future.exception()}",
+                              _("Error"), wx.OK | wx.ICON_ERROR, wx.GetTopLevelParent(notebook))
+                return
+
+            (base, base_format, signature), text = future.result()
+            if base is None:
+                editor.LoadLargeFile(path)
+            else:
+                editor.LoadRaw(base, base_format or format)
+
+            # Unsaved text was made from the file as it was then
+            editor.Disk = disk if text is not None and disk else signature
+
+            if text is not None:
+                # One undoable change from the file on disk, so the tab is dirty
+                editor.BeginUndoAction()
+                editor.ClearAll()
+                editor.AddTextRaw(text)
+                editor.EndUndoAction()
+                drop()
+
+            Apply(editor, state)
+            notebook.Loaded(editor)
+
+        GetPool().submit(load).add_done_callback(lambda future: wx.CallAfter(fill, future))
+        return editor
@@ -0,0 +1,143 @@
+import time
+import wx
+import wx.stc
+
+from .. import trace
+from ..trace import CHAR, KEY, SCROLL, SELECT, TraceEvent
+
+stc = wx.stc
+
+# Keys which don't type a character, and what Scintilla does for them.
+# (key code, modifiers): command, see StyledTextCtrl.CmdKeyExecute
+COMMANDS: dict[tuple[int, int], int] = {
+    (wx.WXK_BACK, 0): stc.STC_CMD_DELETEBACK,
+    (wx.WXK_BACK, wx.MOD_CONTROL): stc.STC_CMD_DELWORDLEFT,
+    (wx.WXK_DELETE, 0): stc.STC_CMD_CLEAR,
+    (wx.WXK_DELETE, wx.MOD_CONTROL): stc.STC_CMD_DELWORDRIGHT,
+    (wx.WXK_RETURN, 0): stc.STC_CMD_NEWLINE,
+    (wx.WXK_NUMPAD_ENTER, 0): stc.STC_CMD_NEWLINE,
+    (wx.WXK_TAB, 0): stc.STC_CMD_TAB,
+    (wx.WXK_TAB, wx.MOD_SHIFT): stc.STC_CMD_BACKTAB,
+
+    (wx.WXK_LEFT, 0): stc.STC_CMD_CHARLEFT,
+    (wx.WXK_LEFT, wx.MOD_SHIFT): stc.STC_CMD_CHARLEFTEXTEND,
+    (wx.WXK_LEFT, wx.MOD_CONTROL): stc.STC_CMD_WORDLEFT,
+    (wx.WXK_LEFT, wx.MOD_CONTROL | wx.MOD_SHIFT): stc.STC_CMD_WORDLEFTEXTEND,
+    (wx.WXK_RIGHT, 0): stc.STC_CMD_CHARRIGHT,
+    (wx.WXK_RIGHT, wx.MOD_SHIFT): stc.STC_CMD_CHARRIGHTEXTEND,
+    (wx.WXK_RIGHT, wx.MOD_CONTROL): stc.STC_CMD_WORDRIGHT,
+    (wx.WXK_RIGHT, wx.MOD_CONTROL | wx.MOD_SHIFT): stc.STC_CMD_WORDRIGHTEXTEND,
+    (wx.WXK_UP, 0): stc.STC_CMD_LINEUP,
+    (wx.WXK_UP, wx.MOD_SHIFT): stc.STC_CMD_LINEUPEXTEND,
+    (wx.WXK_DOWN, 0): stc.STC_CMD_LINEDOWN,
+    (wx.WXK_DOWN, wx.MOD_SHIFT): stc.STC_CMD_LINEDOWNEXTEND,
+    (wx.WXK_HOME, 0): stc.STC_CMD_VCHOME,
+    (wx.WXK_HOME, wx.MOD_SHIFT): stc.STC_CMD_VCHOMEEXTEND,
+    (wx.WXK_HOME, wx.MOD_CONTROL): stc.STC_CMD_DOCUMENTSTART,
+    (wx.WXK_END, 0): stc.STC_CMD_LINEEND,
+    (wx.WXK_END, wx.MOD_SHIFT): stc.STC_CMD_LINEENDEXTEND,
+    (wx.WXK_END, wx.MOD_CONTROL): stc.STC_CMD_DOCUMENTEND,
+    (wx.WXK_PAGEUP, 0): stc.STC_CMD_PAGEUP,
+    (wx.WXK_PAGEDOWN, 0): stc.STC_CMD_PAGEDOWN,
+
+    (ord("Z"), wx.MOD_CONTROL): stc.STC_CMD_UNDO,
+    (ord("Y"), wx.MOD_CONTROL): stc.STC_CMD_REDO,
+    (ord("X"), wx.MOD_CONTROL): stc.STC_CMD_CUT,
+    (ord("C"), wx.MOD_CONTROL): stc.STC_CMD_COPY,
+    (ord("V"), wx.MOD_CONTROL): stc.STC_CMD_PASTE,
+    (ord("A"), wx.MOD_CONTROL): stc.STC_CMD_SELECTALL,
+}
+
+
+class TraceRecorder:
+    """
+    Records what is done in an editor (see trace): typed characters, the
+    keys in COMMANDS, mouse wheel scrolls and selections made with the
+    mouse. The events are only looked at, never stopped.
+    """
+
+    def __init__(this, editor: wx.stc.StyledTextCtrl):
+        this.Editor = editor
+        this.Events: list[TraceEvent] = []
+        this.Header = {"document": getattr(editor, "FileLoaded", ""), "length": editor.GetLength(),
+                       "anchor": editor.GetAnchor(), "caret": editor.GetCurrentPos(),
+                       "first_line": editor.GetFirstVisibleLine(), "created": time.time()}
+        this._start = time.perf_counter()
+
+        editor.Bind(wx.EVT_KEY_DOWN, this.OnKeyDown)
+        editor.Bind(wx.EVT_CHAR, this.OnChar)
+        editor.Bind(wx.EVT_MOUSEWHEEL, this.OnMouseWheel)
+        editor.Bind(wx.EVT_LEFT_UP, this.OnLeftUp)
+
+    def Stop(this) -> list[TraceEvent]:
+        if this.Editor:
+            this.Editor.Unbind(wx.EVT_KEY_DOWN, handler=this.OnKeyDown)
+            this.Editor.Unbind(wx.EVT_CHAR, handler=this.OnChar)
+            this.Editor.Unbind(wx.EVT_MOUSEWHEEL, handler=this.OnMouseWheel)
+            this.Editor.Unbind(wx.EVT_LEFT_UP, handler=this.OnLeftUp)
+        return this.Events
+
+    def Save(this, path: str):
+        with open(path, "wb") as f:
+            trace.Write(f, this.Header, this.Events)
+
+    def Add(this, kind: int, a: int, b: int = 0):
+        this.Events.append(TraceEvent(time.perf_counter() - this._start, kind, a, b))
+
+    """
+    Events
+    """
+
+    def OnKeyDown(this, evt: wx.KeyEvent):
+        key = (evt.GetKeyCode(), evt.GetModifiers())
+        if key in COMMANDS:
+            this.Add(KEY, *key)
+        evt.Skip()
+
+    def OnChar(this, evt: wx.KeyEvent):
+        code = evt.GetUnicodeKey()
+        if code >= 32 and code != 127 and not evt.GetModifiers() & (wx.MOD_CONTROL | wx.MOD_ALT):
+            this.Add(CHAR, code)
+        evt.Skip()
+
+    def OnMouseWheel(this, evt: wx.MouseEvent):
+        if evt.GetWheelAxis() == wx.MOUSE_WHEEL_VERTICAL and evt.GetWheelDelta():
+            this.Add(SCROLL, -evt.GetWheelRotation() * evt.GetLinesPerAction() // evt.GetWheelDelta())
+        evt.Skip()
+
+    def OnLeftUp(this, evt: wx.MouseEvent):
+        # Once Scintilla has set the selection
+        wx.CallAfter(lambda: this.Editor and this.Add(SELECT, this.Editor.GetAnchor(), this.Editor.GetCurrentPos()))
+        evt.Skip()
+
+
+def Prepare(editor: wx.stc.StyledTextCtrl, header: dict):
+    """
+    Put the caret and the view back where they were when recording started.
+    """
+    editor.SetSelection(header.get("anchor", 0), header.get("caret", 0))
+    editor.SetFirstVisibleLine(header.get("first_line", 0))
+
+
+def Apply(editor: wx.stc.StyledTextCtrl, event: TraceEvent) -> bool:
+    """
+    Do what an event did, through the editor's API (synthesized key events
+    are not typed by the native control). Returns whether it was a keystroke.
+    """
+    match event.Kind:
+        case trace.CHAR:
+            editor.ReplaceSelection(chr(event.A))
+        case trace.KEY:
+            command = COMMANDS.get((event.A, event.B))
+            if command is None:
+                return False
+            editor.CmdKeyExecute(command)
+        case trace.SCROLL:
+            editor.ScrollLines(event.A)
+            return False
+        case trace.SELECT:
+            editor.SetSelection(event.A, event.B)
+            return False
+        case _:
+            return False
+    return True
@@ -0,0 +1,172 @@
+import os
+import wx
+import wx.stc
+
+from .. import _
+from ..generic import get_setting
+from ..largefile import LargeDocument
+
+# Files bigger than this (in MiB) are opened in large file mode
+THRESHOLD: int = get_setting("editor.largefile", "threshold", 64) * 1024 * 1024
+
+# Number of lines kept in the editor at once
+WINDOW: int = get_setting("editor.largefile", "window_lines", 4000)
+
+# And bytes (in MiB), for files with few line endings
+WINDOW_SIZE: int = get_setting("editor.largefile", "window_size", 4) * 1024 * 1024
+
+
+def IsLarge(path: str) -> bool:
+    try:
+        return os.path.getsize(path) >= THRESHOLD
+    except OSError:
+        return False
+
+
+class LargeFileView:
+    """
+    Shows a window of lines of a LargeDocument in an Editor.
+
+    The editor only ever holds WINDOW lines (WINDOW_SIZE bytes at most).
+    When the user scrolls close to
+    an edge of the window, the window is moved: pending edits are first
+    recorded in the document's piece table, then the new range is read
+    from the memory map.
+    """
+
+    def __init__(this, editor: wx.stc.StyledTextCtrl, path: str):
+        this.Editor = editor
+        this.Document = LargeDocument(path)
+        this.FirstLine = 0 # First document line shown in the editor
+        this.Start = this.End = 0 # Byte range of the window in the document
+        this._generation = 0 # Editor generation when the window was loaded
+        this._moving = False
+        this._closed = False
+        this.Saving = False # Set by ui.saver while the document is written
+
+        editor.Bind(wx.stc.EVT_STC_UPDATEUI, this.OnUpdateUI)
+        editor.Bind(wx.EVT_KEY_DOWN, this.OnKeyDown)
+
+        this.Load(0)
+
+    @property
+    def Modified(this) -> bool:
+        return this.Document.Modified or this.Editor.Tracker.Dirty
+
+    def Commit(this):
+        """
+        Record the editor content in the document's piece table.
+        """
+        if this.Saving or this.Editor.Tracker.Generation == this._generation:
+            return
+
+        this.Document.Replace(this.Start, this.End, this.Editor.GetTextRaw())
+        this.End = this.Start + this.Editor.GetLength()
+        this._generation = this.Editor.Tracker.Generation
+
+    def Load(this, first: int, keep_line: int | None = None):
+        """
+        Show the window starting at the given document line.
+        If keep_line (a document line) is set, it stays at the top of the view.
+        """
+        if this.Saving:
+            return
+
+        this.Commit()
+
+        first = max(0, first)
+        this.Start, this.End, data = this.Document.ReadLines(first, WINDOW, WINDOW_SIZE)
+        this.FirstLine = first
+
+        this._moving = True
+        this.Editor.SetTextRaw(data)
+        this.Editor.EmptyUndoBuffer()
+        this._generation = this.Editor.Tracker.Generation
+
+        # Edits made outside of this window keep the tab dirty
+        if not this.Document.Modified:
+            this.Editor.SetSavePoint()
+
+        if keep_line is not None:
+            this.Editor.SetFirstVisibleLine(keep_line - first)
+        this._moving = False
+
+    def GoToLine(this, line: int):
+        """
+        Jump to a (0-based) document line.
+        """
+        if this.Saving:
+            return
+        if not this.FirstLine <= line < this.FirstLine + WINDOW:
+            this.Load(line - WINDOW // 4, line)
+        this.Editor.GotoLine(line - this.FirstLine)
+        this.Editor.SetFirstVisibleLine(line - this.FirstLine)
+
+    def Reload(this):
+        """
+        Show the current window again, once the document has been saved.
+        Typing done during the save is kept.
+        """
+        this.Saving = False
+        if this._closed: # The editor is gone
+            return this.Document.Close()
+        this.Load(this.FirstLine, this.FirstLine + this.Editor.GetFirstVisibleLine())
+
+    def Reopen(this):
+        """
+        Open the file again, once another program changed it.
+        Unsaved edits are dropped.
+        """
+        this.Document.Close()
+        this.Document = LargeDocument(this.Document.Path)
+        this._generation = this.Editor.Tracker.Generation # Nothing to commit
+        this.Load(0)
+
+    def Close(this):
+        """
+        Close the document, once the save in progress (if any) is done.
+        """
+        this._closed = True
+        if not this.Saving:
+            this.Document.Close()
+
+    """
+    Events.
+    """
+
+    def OnUpdateUI(this, evt: wx.stc.StyledTextEvent):
+        evt.Skip()
+
+        if this._moving or this.Saving or not evt.GetUpdated() & wx.stc.STC_UPDATE_V_SCROLL:
+            return
+
+        top = this.Editor.GetFirstVisibleLine()
+        shown = this.Editor.LinesOnScreen()
+        lines = this.Editor.GetLineCount() # Less than WINDOW if the lines are long
+        margin = max(lines // 8, 1)
+        first = this.FirstLine + top - lines // 2 # Puts the top line in the middle
+
+        if top < margin and this.FirstLine > 0:
+            wx.CallAfter(this.Load, first, this.FirstLine + top)
+
+        elif top + shown > lines - margin and first > this.FirstLine:
+            total = this.Document.LineCount
+            if total == -1 or this.FirstLine + lines < total:
+                wx.CallAfter(this.Load, first, this.FirstLine + top)
+
+    def OnKeyDown(this, evt: wx.KeyEvent):
+        if evt.GetKeyCode() == ord("G") and evt.ControlDown():
+            return this.AskGoToLine()
+        evt.Skip()
+
+    def AskGoToLine(this):
+        if this.Saving: # The document is being mapped again
+            return wx.Bell()
+
+        total = this.Document.LineCount
+        line = wx.GetNumberFromUser(_("Line number:"), "",
+                                    _("Go to line"), this.FirstLine + 1,
+                                    1, total if total != -1 else 2 ** 31 - 1,
+                                    this.Editor)
+        if line != -1:
+            this.GoToLine(line - 1)
@@ -0,0 +1,65 @@
+import time
+import wx
+
+from typing import Callable
+
+from ..generic import logger
+from ..profiling import Profiler
+
+
+class LazyWindow:
+    """
+    A window (or any wx object) attribute which is built on first access,
+    then reused. It is built again if the window got destroyed meanwhile.
+
+    Use it as a class attribute; the factory gets the object the attribute
+    is read from:
+        wiz = LazyWindow(lambda this: SettingsDialog(this))
+
+    With shared=True there is only one instance for the whole class
+    (e.g one file dialog for every Tabber).
+    """
+
+    def __init__(this, factory: Callable[[object], object], shared: bool = False):
+        this.Factory = factory
+        this.Shared = shared
+        this.Instance = None # Used if shared
+        this.Name = ""
+        this._key = ""
+
+    def __set_name__(this, owner, name: str):
+        this.Name = name
+        this._key = "_lazy_" + name
+
+    def Built(this, obj) -> bool:
+        """
+        Whether the attribute has been built (and is still alive) for obj.
+        """
+        value = this.Instance if this.Shared else obj.__dict__.get(this._key)
+        return value is not None and (not isinstance(value, wx.Window) or bool(value))
+
+    def Set(this, obj, value):
+        """
+        Provide the value for obj, when it was built some other way.
+        """
+        if this.Shared:
+            this.Instance = value
+        else:
+            obj.__dict__[this._key] = value
+
+    def __get__(this, obj, owner):
+        if obj is None:
+            return this
+
+        if this.Built(obj):
+            return this.Instance if this.Shared else obj.__dict__[this._key]
+
+        start = time.perf_counter()
+        value = this.Factory(obj)
+        spent = time.perf_counter() - start
+
+        logger.debug(f"Built {owner.__name__}.{this.Name} on first use in {spent * 1000:.1f} ms")
+        Profiler.Note(f"{owner.__name__}.{this.Name} (built on first use)", spent)
+
+        this.Set(obj, value)
+        return value
@@ -0,0 +1,49 @@
+import wx
+
+from .. import _, limits
+from .editor import Editor
+
+WIDTH: int = 260 # px, of the status bar field
+
+
+class LimitsIndicator:
+    """
+    A status bar field telling that the current editor is limited (see
+    limits), which lifts the limits or sets them back when clicked.
+    """
+
+    def __init__(this, statusbar: wx.StatusBar, field: int):
+        this.StatusBar = statusbar
+        this.Field = field
+        this.Editor: Editor | None = None
+
+        widths = [-1] * statusbar.GetFieldsCount()
+        widths[field] = WIDTH
+        statusbar.SetStatusWidths(widths)
+        statusbar.Bind(wx.EVT_LEFT_UP, this.OnClick)
+
+    def Show(this, editor: wx.Window | None):
+        """
+        Follow an editor (None or another window: show nothing).
+        """
+        this.Editor = editor if isinstance(editor, Editor) else None
+
+        text = ""
+        if this.Editor and this.Editor.Level != limits.NORMAL:
+            if this.Editor.FullView:
+                text = _("Full view, may be slow (click to limit)")
+            elif this.Editor.Level == limits.LARGE:
+                text = _("Large file: light view (click for full)")
+            else:
+                text = _("Huge file: plain view (click for full)")
+        this.StatusBar.SetStatusText(text, this.Field)
+
+    """
+    Events
+    """
+
+    def OnClick(this, evt: wx.MouseEvent):
+        if this.Editor and this.Editor.Level != limits.NORMAL \
+           and this.StatusBar.GetFieldRect(this.Field).Contains(evt.GetPosition()):
+            this.Editor.SetFullView(not this.Editor.FullView) # Calls Show back
+        evt.Skip()
@@ -0,0 +1,126 @@
+import collections
+import wx
+
+from .. import _
+from ..generic import clrCall
+
+LOG_LINES: int = 10000 # Messages kept, the older ones are dropped
+REFRESH_DELAY: int = 250 # ms, the window is updated in batches
+
+LEVEL_NAMES: dict[int, str] = {wx.LOG_FatalError: _("Fatal"),
+                               wx.LOG_Error: _("Error"),
+                               wx.LOG_Warning: _("Warning"),
+                               wx.LOG_Message: _("Message"),
+                               wx.LOG_Status: _("Status"),
+                               wx.LOG_Info: _("Info"),
+                               wx.LOG_Debug: _("Debug"),
+                               wx.LOG_Trace: _("Trace")}
+
+# Filter choices: the most verbose level shown
+FILTERS: list[tuple[str, int]] = [(_("Errors"), wx.LOG_Error),
+                                  (_("Warnings"), wx.LOG_Warning),
+                                  (_("Information"), wx.LOG_Info),
+                                  (_("Everything"), wx.LOG_Trace)]
+
+
+class LogCollector(wx.Log):
+    """
+    Keeps the last LOG_LINES wx log messages for the log window.
+    Logging only appends to a ring buffer: the window reads it when shown.
+    """
+
+    def __init__(this, size: int = LOG_LINES):
+        wx.Log.__init__(this)
+        this.Lines: collections.deque[tuple[int, str]] = collections.deque(maxlen=size)
+        this.Count = 0 # Messages ever logged, tells the window about new ones
+
+    def Clear(this):
+        this.Lines.clear()
+        this.Count += 1
+
+    def DoLogTextAtLevel(this, level, msg):
+        this.Lines.append((level, msg))
+        this.Count += 1
+
+
+class LogList(wx.ListCtrl):
+    """
+    A virtual list of log messages: only the visible rows are formatted.
+    """
+
+    def __init__(this, parent: wx.Window):
+        wx.ListCtrl.__init__(this, parent, style=wx.LC_REPORT | wx.LC_VIRTUAL)
+        this.Rows: list[tuple[int, str]] = []
+
+        this.InsertColumn(0, _("Level"), width=80)
+        this.InsertColumn(1, _("Message"), width=600)
+
+    def SetRows(this, rows: list[tuple[int, str]]):
+        at_end = this.GetTopItem() + this.GetCountPerPage() >= this.GetItemCount()
+        this.Rows = rows
+        this.SetItemCount(len(rows))
+        this.Refresh()
+        if at_end and rows:
+            this.EnsureVisible(len(rows) - 1) # Follow new messages, unless scrolled up
+
+    def OnGetItemText(this, item: int, column: int) -> str:
+        level, msg = this.Rows[item]
+        match column:
+            case 0:
+                return LEVEL_NAMES.get(level, str(level))
+            case _:
+                return msg
+
+
+class LogWindow(wx.Frame):
+    """
+    Shows a LogCollector, filtered by level.
+    It's only updated while shown, every REFRESH_DELAY at most.
+    """
+
+    def __init__(this, parent: wx.Window, collector: LogCollector):
+        wx.Frame.__init__(this, parent, title=_("Log"), size=(720, 400))
+        this.Collector = collector
+        this._shown = -1 # Collector.Count when last shown
+
+        panel = wx.Panel(this)
+        this.Filter = wx.Choice(panel, choices=[name for name, level in FILTERS])
+        this.Filter.SetSelection(len(FILTERS) - 1)
+        clear = wx.Button(panel, label=_("Clear"))
+        this.List = LogList(panel)
+
+        bar = wx.BoxSizer(wx.HORIZONTAL)
+        bar.Add(wx.StaticText(panel, label=_("Show:")), 0, wx.ALIGN_CENTER_VERTICAL | wx.RIGHT, 5)
+        bar.Add(this.Filter)
+        bar.AddStretchSpacer()
+        bar.Add(clear)
+
+        sizer = wx.BoxSizer(wx.VERTICAL)
+        sizer.Add(bar, 0, wx.EXPAND | wx.ALL, 5)
+        sizer.Add(this.List, 1, wx.EXPAND)
+        panel.SetSizer(sizer)
+
+        this.Timer = wx.Timer(this)
+        this.Bind(wx.EVT_TIMER, lambda evt: this.Sync(), this.Timer)
+        this.Bind(wx.EVT_SHOW, this.OnShow)
+        this.Bind(wx.EVT_CLOSE, lambda evt: this.Hide())
+        this.Filter.Bind(wx.EVT_CHOICE, lambda evt: this.Sync(True))
+        clear.Bind(wx.EVT_BUTTON, lambda evt: this.Collector.Clear())
+
+        clrCall.configure(this)
+
+    def Sync(this, force: bool = False):
+        if not force and this.Collector.Count == this._shown:
+            return
+        this._shown = this.Collector.Count
+
+        shown = FILTERS[this.Filter.GetSelection()][1]
+        this.List.SetRows([line for line in this.Collector.Lines if line[0] <= shown])
+
+    def OnShow(this, evt):
+        if evt.IsShown():
+            this.Sync()
+            this.Timer.Start(REFRESH_DELAY)
+        else:
+            this.Timer.Stop()
+        evt.Skip()
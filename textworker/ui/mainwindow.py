@@ -3,31 +3,58 @@ import platform
 import webbrowser
 
 import wx
-import wx.html2
-import wx.lib.splitter
 import wx.xrc
 import wx.lib.agw.aui as aui
 
 from textwrap import dedent
-from wx.lib.inspection import InspectionTool
+from typing import Callable
 from libtextworker import __version__ as libver
 from libtextworker.general import ResetEveryConfig, logger
-from libtextworker.interface.wx.dirctrl import *
 from libtextworker.versioning import *
 
 from textworker import __version__ as appver, _
-from textworker.generic import global_settings, TOPLV_DIR, clrCall
-from textworker.ui import autosave, mainmenu_generated, multiview, settings, about, tabs
+from textworker.fileindex import FileIndex
+from textworker.generic import colorSettings, editorSettings, global_settings, settings, TOPLV_DIR, clrCall
+from textworker.ui import autosave, mainmenu_generated, multiview, profile, tabs
 from textworker.ui.auistyles import AuiFlatDockArt, AuiFlatTabArt
+from textworker.ui.explorer import Explorer
+from textworker.ui.findinfiles import FindInFiles
+from textworker.ui.lazy import LazyWindow
+from textworker.ui.logwindow import LogCollector, LogWindow
+from textworker.ui.opener import GetPool
+from textworker.ui.workspace import Workspace
+
+HISTORY_FILE: str = os.path.expanduser("~/.textworker_history")
+
+
+def ReadFileHistory() -> list[str]:
+    """
+    Read the recent files list, most recent first.
+    Files which do not exist anymore are left out.
+    """
+    if not os.path.isfile(HISTORY_FILE):
+        return []
+    with open(HISTORY_FILE, "r") as f:
+        return [line for line in f.read().splitlines() if os.path.isfile(line)]
 
 
 class MainFrame(mainmenu_generated.mainFrame):
     cfg = global_settings
     logfmter = wx.LogFormatter()
 
+    # Built on first use
+    wiz = LazyWindow(lambda this: this._MakeSettings())
+    autosv_cfg = LazyWindow(lambda this: autosave.AutoSaveConfig(this))
+    logwindow = LazyWindow(lambda this: this._MakeLogWindow())
+    perfwindow = LazyWindow(lambda this: this._MakePerfWindow())
+    file_history = LazyWindow(lambda this: this._MakeFileHistory())
+    quickopen_dlg = LazyWindow(lambda this: this._MakeQuickOpen())
+    find_dlg = LazyWindow(lambda this: this._MakeFindDialog())
+
     def __init__(this):
         mainmenu_generated.mainFrame.__init__(this, None)
         this.SetSize((860, 640))
+        this.CreateStatusBar(2)
 
         this._mgr = aui.AuiManager(this, aui.AUI_MGR_ALLOW_FLOATING | \
                                          aui.AUI_MGR_ALLOW_ACTIVE_PANE | \
@@ -35,6 +62,10 @@ class MainFrame(mainmenu_generated.mainFrame):
         this._mgr.SetArtProvider(AuiFlatDockArt())
         this._mgr.SetAutoNotebookTabArt(AuiFlatTabArt())
 
+        # Auto save timer, shared by all editors
+        this.autosaver = autosave.AutoSaveScheduler(this)
+        autosave.AutoSave.Scheduler = this.autosaver
+
         # Editor area
         this.notebook = tabs.Tabber(this)
 
@@ -44,22 +75,26 @@ class MainFrame(mainmenu_generated.mainFrame):
         this.multiviewer = multiview.MultiViewer(this)
 
         ## Explorer
-        this.dirs = DirCtrl(this.multiviewer.tabs, w_styles=DC_HIDEROOT | DC_EDIT)
+        this.dirs = Explorer(this.multiviewer.tabs)
         this.dirs.Bind(wx.EVT_TREE_SEL_CHANGED, lambda evt: this.OpenFileFromTree(evt, this.dirs))
         this.multiviewer.RegisterTab("Explorer", this.dirs)
 
+        ## Quick open index of the Explorer folder, see OpenDir
+        this.fileindex: FileIndex | None = None
+
+        ## Find in Files
+        this.findfiles = FindInFiles(this.multiviewer.tabs, this)
+        this.multiviewer.RegisterTab(_("Find in Files"), this.findfiles)
+
         ## Always show Explorer on startup
         this.multiviewer.tabs.SetSelection(0)
 
+        # Session (open tabs, folder, layout), restored by main.start_app
+        this.workspace = Workspace(this)
+
         # Other stuff
-        this.wiz = settings.SettingsDialog(this)
-        this.file_history = wx.FileHistory()
-        this.autosv_cfg = autosave.AutoSaveConfig(this)
-        
-        this.logwindow = wx.Frame(this, title=_("Log"))
-        this.logwindow.Bind(wx.EVT_CLOSE, lambda evt: this.logwindow.Hide())
-        this.log = wx.TextCtrl(this.logwindow, style=wx.TE_READONLY | wx.TE_MULTILINE | wx.HSCROLL)
-        wx.Log.SetActiveTarget(wx.LogTextCtrl(this.log))
+        this.logcollector = LogCollector()
+        wx.Log.SetActiveTarget(this.logcollector)
 
         # Place everything
 
@@ -71,14 +106,20 @@ class MainFrame(mainmenu_generated.mainFrame):
                                     .MaximizeButton(True).MinSize(minsz) \
                                     .PinButton(True).NotebookDockable(True)
         
-        this._mgr.AddPane(this.multiviewer.tabs, makePaneInf("Multiview").Left())
-        this._mgr.AddPane(this.notebook, makePaneInf("Notebook").CenterPane())
+        # Stable names: the layout saved by workspace.Workspace is matched by them
+        this._mgr.AddPane(this.multiviewer.tabs, makePaneInf("Multiview").Name("multiview").Left())
+        this._mgr.AddPane(this.notebook, makePaneInf("Notebook").Name("notebook").CenterPane())
         this._mgr.Update()
         
         this.Layout()
 
         # "Post init"
         this.Bind(wx.EVT_CLOSE, this.OnClose)
+        this.Bind(wx.EVT_SYS_COLOUR_CHANGED, this.OnSysColourChanged)
+
+        # Settings and theme changes are applied at once
+        profile.Watch()
+        profile.AddListener(this.OnProfileChanged)
 
         clrCall.configure(this)
         clrCall.autocolor_run(this)
@@ -92,13 +133,18 @@ class MainFrame(mainmenu_generated.mainFrame):
             wx.MessageBox(_("This will only affect to this session"),
                           parent=this)
             autosave.TOGGLE = not autosave.TOGGLE
+            if autosave.TOGGLE:
+                this.autosaver.ScheduleAll([page for page in map(this.notebook.GetPage, range(this.notebook.GetPageCount()))
+                                            if isinstance(page, autosave.AutoSave)])
             evt.Skip()
 
         # File menu
         filemenu_events = [ (this.notebook.AddTab, this.newtab),
                             (this.OpenFile, this.openf),
+                            (this.ShowQuickOpen, this.quickopen),
                             (this.notebook.SaveFileEvent, this.save),
                             (this.notebook.AskToSave, this.save_as),
+                            (this.notebook.SaveAll, this.save_all),
                             (this.CloseAllPages, this.closeall),
                             (lambda evt:
                                 wx.PostEvent(this, wx.CommandEvent(wx.wxEVT_CLOSE_WINDOW)),
@@ -107,28 +153,26 @@ class MainFrame(mainmenu_generated.mainFrame):
                             (lambda evt: this.OpenDir(evt, newwind=True), this.openfd_w) ]
 
         ## Setup wxFileHistory
-        this.file_history.UseMenu(this.recents_menu)
+        ## (loaded when a menu is opened for the first time)
         this.Bind(wx.EVT_MENU_RANGE, this.OnFileHistory, id=wx.ID_FILE1, id2=wx.ID_FILE9)
-        
-        if os.path.isfile(os.path.expanduser("~/.textworker_history")):
-            with open(os.path.expanduser("~/.textworker_history"), "r") as f:
-                for line in f.readlines():
-                    if os.path.isfile(line):
-                        this.file_history.AddFileToHistory(line)
+        this.Bind(wx.EVT_MENU_OPEN, this.OnMenuOpen)
 
         # Edit menu
-        editmenu_events = [(lambda evt: this.notebook.GetCurrentPage().Undo(), this.undo),
+        editmenu_events = [(lambda evt: this.find_dlg.Popup(), this.find),
+                           (lambda evt: this.find_dlg.Popup(True), this.replace),
+                           (this.ShowFindInFiles, this.findinfiles),
+                           (lambda evt: this.notebook.GetCurrentPage().Undo(), this.undo),
                            (lambda evt: this.notebook.GetCurrentPage().Redo(), this.redo),
                            (lambda evt: this.notebook.GetCurrentPage().Cut(), this.cut),
                            (lambda evt: this.notebook.GetCurrentPage().Copy(), this.copy),
                            (lambda evt: this.notebook.GetCurrentPage().Paste(), this.paste),
                            (lambda evt: this.notebook.GetCurrentPage().SelectAll(), this.selectall),
                            (lambda evt: this.autosv_cfg.ConfigWindow(), this.as_global),
-                           (lambda evt: this.notebook.GetCurrentPage().asDlg.ASConfig(), this.as_local),
-                           (lambda evt: this.notebook.GetCurrentPage().asDlg.Toggle(this.as_local_tg.IsChecked()), this.as_local_tg),
+                           (lambda evt: this.notebook.GetCurrentPage().ASConfig(), this.as_local),
+                           (lambda evt: this.notebook.GetCurrentPage().Toggle(this.as_local_tg.IsChecked()), this.as_local_tg),
                            (ToggleAutoSave, this.as_global_tg)]
 
-        if autosave.enabled in global_settings.yes_values:
+        if settings.AutoSave:
             this.as_global_tg.Check(True)
             this.as_local_tg.Check(True)
 
@@ -139,17 +183,13 @@ class MainFrame(mainmenu_generated.mainFrame):
                            (lambda evt: this.notebook.GetCurrentPage().SetIndentationGuides(this.showguides.IsChecked()), this.showguides),
                            (this.ShowMarkdown, this.preview)]
 
-        this.wrap.Check(
-            this.notebook.GetCurrentPage().cfg.Get(
-                "editor", "wordwrap", True, True, True
-            ) in global_settings.yes_values
-        )
+        this.wrap.Check(editorSettings.WordWrap)
 
         if this.notebook.GetCurrentPage().GetIndentationGuides():
             this.showguides.Check()
 
         # Settings menu
-        cfgmenu_events = [(lambda evt: this.wiz.ShowModal(), this.settings),
+        cfgmenu_events = [(this.ShowSettings, this.settings),
                           (this.ResetCfgs, this.reset),
                           (lambda evt: this.OpenDir(evt, TOPLV_DIR, True), this.opencfg)]
 
@@ -157,6 +197,7 @@ class MainFrame(mainmenu_generated.mainFrame):
         helpmenu_events = [(this.ShowAbout, this.about),
                            (this.SysInf_Show, this.sysspecs),
                            (lambda evt: this.logwindow.Show(), this.logs),
+                           (lambda evt: this.perfwindow.Show(), this.perf),
                            (this.OpenInspector, this.showinsp),
                            (lambda evt: webbrowser.open("https://gitlab.com/textworker/legacy-python/textworker/issues"), this.report),
                            (lambda evt: webbrowser.open("https://lebao3105.gitbook.io/texteditor_doc"), this.docs)]
@@ -167,18 +208,88 @@ class MainFrame(mainmenu_generated.mainFrame):
         BindMenuEvents(cfgmenu_events)
         BindMenuEvents(helpmenu_events)
 
+    # Built on first use, see the LazyWindow attributes above
+    def _MakeSettings(this):
+        from textworker.ui.settings import SettingsDialog
+        return SettingsDialog(this)
+
+    def _MakeLogWindow(this) -> LogWindow:
+        return LogWindow(this, this.logcollector)
+
+    def _MakePerfWindow(this):
+        from textworker.ui.performance import PerformanceWindow
+        return PerformanceWindow(this)
+
+    def _MakeFileHistory(this, paths: list[str] | None = None) -> wx.FileHistory:
+        file_history = wx.FileHistory()
+        file_history.UseMenu(this.recents_menu)
+
+        # AddFileToHistory puts the file on top
+        for path in reversed(ReadFileHistory() if paths is None else paths):
+            file_history.AddFileToHistory(path)
+
+        return file_history
+
+    def _MakeQuickOpen(this):
+        from textworker.ui.quickopen import QuickOpen
+        return QuickOpen(this)
+
+    def _MakeFindDialog(this):
+        from textworker.ui.editor import Editor
+        from textworker.ui.find import FindDialog
+
+        def current():
+            page = this.notebook.GetCurrentPage()
+            return page if isinstance(page, Editor) else None
+
+        return FindDialog(this, current)
+
+    def PrewarmFileHistory(this):
+        """
+        Read (and check) the recent files list in the background,
+        then fill the menu with it.
+        """
+        def done(future):
+            if this and not MainFrame.file_history.Built(this) and not future.exception():
+                MainFrame.file_history.Set(this, this._MakeFileHistory(future.result()))
+
+        GetPool().submit(ReadFileHistory).add_done_callback(lambda future: wx.CallAfter(done, future))
+
     """
     Event callbacks
     """
 
+    def OnMenuOpen(this, evt):
+        this.file_history # Fill the recent files menu
+        evt.Skip()
+
     def OnClose(this, evt):
+        this.workspace.Write(wait=True)
+        this.findfiles.Stop()
+        if this.fileindex:
+            this.fileindex.Close()
+        profile.RemoveListener(this.OnProfileChanged)
         this._mgr.UnInit()
-        if this.file_history.GetCount() > 0:
-            with open(os.path.expanduser("~/.textworker_history"), "w") as f:
+        if MainFrame.file_history.Built(this) and this.file_history.GetCount() > 0:
+            with open(HISTORY_FILE, "w") as f:
                 for i in range(this.file_history.GetCount()):
                     f.write(this.file_history.GetHistoryFile(i) + "\n")
         evt.Skip()
 
+    def OnSysColourChanged(this, evt):
+        if colorSettings.Auto:
+            profile.Schedule() # Follows the system theme
+        evt.Skip()
+
+    def OnProfileChanged(this, new: profile.EditorProfile, previous: profile.EditorProfile | None):
+        # Within profile.Recompile: this is frozen
+        if previous and new.Styles == previous.Styles:
+            return
+        this._mgr.SetArtProvider(AuiFlatDockArt())
+        this._mgr.SetAutoNotebookTabArt(AuiFlatTabArt())
+        this.notebook.SetArtProvider(AuiFlatTabArt())
+        this._mgr.Update()
+
     def OpenDir(this, evt, path: str = "", newwind: bool = False):
         if not path:
             ask = wx.DirDialog(this, _("Select a folder to start"))
@@ -191,42 +302,51 @@ class MainFrame(mainmenu_generated.mainFrame):
 
         if not newwind:
             this.dirs.SetFolder(selected_dir)
+            this.workspace.SetFolder(selected_dir)
+            this.IndexFolder(selected_dir)
         else:
             new = wx.Frame(this)
-            newctrl = DirCtrl(new, w_styles = DC_MULTIPLE | DC_ONEROOT | DC_HIDEROOT)
+            newctrl = Explorer(new, wx.TR_DEFAULT_STYLE | wx.TR_HIDE_ROOT | wx.TR_MULTIPLE)
             newctrl.SetFolder(selected_dir)
             newctrl.Bind(wx.EVT_TREE_SEL_CHANGED, lambda evt: this.OpenFileFromTree(evt, newctrl))
             new.Show()
 
-    def OpenFileFromTree(this, evt, tree: DirCtrl):
-        path = tree.GetFullPath()
-        import os
-        if not os.path.isdir(path): this.notebook.OpenFile(path)
-        else: evt.Skip()
+    def IndexFolder(this, path: str):
+        """
+        Index a folder for Quick open, in the background.
+        """
+        if this.fileindex:
+            if this.fileindex.Root == os.path.abspath(path):
+                return
+            this.fileindex.Close()
+        this.fileindex = FileIndex(path, lambda: wx.CallAfter(this.OnIndexChanged))
+
+    def OnIndexChanged(this):
+        if this and MainFrame.quickopen_dlg.Built(this):
+            this.quickopen_dlg.OnIndexChanged()
 
-    def ShowMarkdown(this, evt): # vNext: Open in a new tab
-        def autorefresh(event):
-            nonlocal wind, content, newwind
-            if not wind:
-                return  # Window closed
-            content = markdown(this.notebook.GetCurrentPage().GetText())
-            newwind.SetPage(content, "")
-            wind.Refresh()
-            event.Skip()
+    def ShowFindInFiles(this, evt):
+        this.multiviewer.tabs.SetSelection(this.multiviewer.tabs.FindPage(this.findfiles))
+        this.findfiles.Entry.SetFocus()
 
-        from markdown2 import markdown
+    def ShowQuickOpen(this, evt):
+        this.quickopen_dlg.Popup(this.fileindex, this.notebook.OpenFile)
 
-        content = markdown(this.notebook.GetCurrentPage().GetText())
+    def OpenFileFromTree(this, evt, tree: Explorer):
+        item = evt.GetItem()
+        if item.IsOk() and not tree.IsDir(item): this.notebook.OpenFile(tree.GetFullPath(item))
+        else: evt.Skip()
 
-        wind = wx.Panel(this.notebook)
-        newwind = wx.html2.WebView.New(wind)
-        newwind.SetPage(content, "")
+    def ShowMarkdown(this, evt):
+        from textworker.ui.editor import Editor
+        from textworker.ui.preview import MarkdownPreview
 
-        wind.Show()
-        this.notebook.AddPage(wind, this.notebook.GetPageText(this.notebook.GetSelection()), True)
-        newwind.Show(True)
+        editor = this.notebook.GetCurrentPage()
+        if not isinstance(editor, Editor):
+            return
 
-        this.notebook.GetCurrentPage().Bind(wx.EVT_CHAR, autorefresh)
+        preview = MarkdownPreview(this.notebook, editor)
+        this.notebook.AddPage(preview, this.notebook.GetPageText(this.notebook.GetSelection()), True)
 
     def ResetCfgs(this, evt):
         ask = wx.MessageBox(_("Are you sure want to reset every settings?\n"
@@ -237,10 +357,18 @@ class MainFrame(mainmenu_generated.mainFrame):
 
         if ask == wx.YES:
             logger.info("App reset requested.")
+            for cfg in [settings, editorSettings, colorSettings]:
+                cfg.Flush() # Before, not over the reset files
             ResetEveryConfig()
 
+    def ShowSettings(this, evt):
+        for cfg in [settings, editorSettings, colorSettings]:
+            cfg.Refresh() # Edited by hand meanwhile?
+        this.wiz.ShowModal()
+
     def ShowAbout(this, evt):
-        aboutdlg = about.AboutDialog(this)
+        from textworker.ui.about import AboutDialog
+        aboutdlg = AboutDialog(this)
         aboutdlg.ShowModal()
 
     def SysInf_Show(this, evt):
@@ -274,10 +402,9 @@ class MainFrame(mainmenu_generated.mainFrame):
         this.file_history.AddFileToHistory(path)
 
     def OpenFile(this, evt):
-        this.notebook.AskToOpen(evt)
-        this.file_history.AddFileToHistory(
-            this.notebook.GetPageText(this.notebook.GetSelection())
-        )
+        path = this.notebook.AskToOpen(evt)
+        if path:
+            this.file_history.AddFileToHistory(path)
 
     def CloseAllPages(this, evt):
         for i in range(this.notebook.GetPageCount()):
@@ -288,4 +415,6 @@ class MainFrame(mainmenu_generated.mainFrame):
     def OpenInspector(this, evt):
         wnd = wx.FindWindowAtPointer()
         if not wnd: wnd = this
+
+        from wx.lib.inspection import InspectionTool
         InspectionTool().Show(wnd, True)
\ No newline at end of file
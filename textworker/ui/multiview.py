@@ -1,13 +1,11 @@
 import wx
 from .. import _
-from ..generic import global_settings, clrCall
+from ..generic import settings, clrCall
 
 
 class MultiViewer:
     def __init__(this, parent):
-        location = global_settings.Get(
-            "extensions.textwkr.multiview", "notebook_location", needed=True
-        )
+        location = settings.NotebookLocation
         nbside = getattr(wx, f"NB_{location.upper()}")
 
         this.tabs = wx.Notebook(parent, -1, style=nbside)
@@ -0,0 +1,196 @@
+import os
+import threading
+import wx
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from .. import _
+from ..generic import logger
+from ..profiling import Counters
+from ..sniff import FileFormat, Read
+from ..watcher import Signature
+from .largeview import IsLarge
+
+BATCH_DELAY: int = 50 # ms
+
+_pool: ThreadPoolExecutor | None = None
+
+
+def GetPool() -> ThreadPoolExecutor:
+    """
+    The thread pool used to read files.
+    """
+    global _pool
+    if _pool is None:
+        _pool = ThreadPoolExecutor(max_workers=min(8, (os.cpu_count() or 1) + 2),
+                                   thread_name_prefix="textworker-open")
+    return _pool
+
+
+def ReadFile(path: str) -> tuple[bytes | None, FileFormat | None, tuple | None]:
+    """
+    Read a file for the editor, as UTF-8 with its format (see sniff) and
+    its watcher.Signature from right before reading.
+    Runs on a worker thread.
+    Data and format are None for files that should be opened in large file mode.
+    """
+    if IsLarge(path):
+        return None, None, Signature(path)
+
+    with Counters.Time("open: read"), open(path, "rb") as f:
+        st = os.fstat(f.fileno())
+        return *Read(f), (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+class FileOpener:
+    """
+    Opens files without blocking the GUI.
+
+    Files are read and decoded on a thread pool. Results are collected and
+    placed into the notebook in their original order, a batch at a time,
+    inside a single Freeze()/Thaw(). Progress is shown in the status bar,
+    with a button to cancel.
+    """
+
+    def __init__(this, notebook: wx.Window, place: Callable[[str, bytes | None, FileFormat | None, tuple | None], None]):
+        this.Notebook = notebook
+        this.Place = place
+
+        this._lock = threading.Lock()
+        this._futures = []
+        this._results: dict[int, tuple[str, tuple | None, Exception | None]] = {}
+        this._paths: list[str] = []
+        this._next = 0 # Index of the next path to place
+        this._errors: list[str] = []
+        this._scheduled = False
+        this._cancelbtn: wx.Button | None = None
+        this._idle: list[Callable[[], None]] = []
+
+    @property
+    def Busy(this) -> bool:
+        return this._next < len(this._paths)
+
+    def Open(this, paths: list[str]):
+        """
+        Queue files to be opened.
+        """
+        if not paths:
+            return
+
+        with this._lock:
+            first = len(this._paths)
+            this._paths += paths
+
+        for index, path in enumerate(paths, first):
+            future = GetPool().submit(ReadFile, path)
+            future.add_done_callback(lambda future, index=index, path=path: this._Done(index, path, future))
+            this._futures.append(future)
+
+        this._ShowProgress()
+
+    def WhenIdle(this, callback: Callable[[], None]):
+        """
+        Call callback (on the GUI thread) once every queued file is placed.
+        """
+        if this.Busy:
+            this._idle.append(callback)
+        else:
+            wx.CallAfter(callback)
+
+    def _RunIdle(this):
+        if not this.Busy:
+            callbacks, this._idle = this._idle, []
+            for callback in callbacks:
+                callback()
+
+    def Cancel(this, evt=None):
+        """
+        Stop opening the files which are not placed yet.
+        """
+        with this._lock:
+            for future in this._futures:
+                future.cancel()
+            logger.info(f"Cancelled opening {len(this._paths) - this._next} file(s)")
+            this._Reset()
+        this._ShowProgress()
+        this._RunIdle()
+
+    def _Reset(this):
+        this._futures = []
+        this._results = {}
+        this._paths = []
+        this._next = 0
+
+    def _Done(this, index: int, path: str, future):
+        if future.cancelled():
+            return
+
+        error = future.exception()
+        with this._lock:
+            if index >= len(this._paths) or this._paths[index] != path:
+                return # Cancelled meanwhile
+            this._results[index] = (path, None if error else future.result(), error)
+            if this._scheduled:
+                return
+            this._scheduled = True
+
+        wx.CallAfter(wx.CallLater, BATCH_DELAY, this._Flush)
+
+    def _Flush(this):
+        with this._lock:
+            this._scheduled = False
+            batch = []
+            while this._next in this._results:
+                batch.append(this._results.pop(this._next))
+                this._next += 1
+            if not this.Busy:
+                this._Reset()
+
+        if not this.Notebook:
+            return
+
+        if batch:
+            this.Notebook.Freeze()
+            try:
+                for path, loaded, error in batch:
+                    if error:
+                        logger.warning(f"Unable to open {path}: {error}")
+                        this._errors.append(f"{path}: {error}")
+                    else:
+                        with Counters.Time("open: place"):
+                            this.Place(path, *loaded)
+            finally:
+                this.Notebook.Thaw()
+
+        this._ShowProgress()
+        this._RunIdle()
+
+        if this._errors and not this.Busy:
+            errors, this._errors = this._errors, []
+            wx.MessageBox(_("Unable to open these files:\n") + "\n".join(errors),
+                          _("Error"), wx.OK | wx.ICON_ERROR,
+                          wx.GetTopLevelParent(this.Notebook))
+
+    def _ShowProgress(this):
+        frame = wx.GetTopLevelParent(this.Notebook)
+        statusbar = frame.GetStatusBar() if frame else None
+        if not statusbar:
+            return
+
+        if not this.Busy:
+            statusbar.SetStatusText("")
+            if this._cancelbtn:
+                this._cancelbtn.Destroy()
+                this._cancelbtn = None
+            return
+
+        statusbar.SetStatusText(_("Opening files: %d/%d") % (this._next, len(this._paths)))
+
+        if not this._cancelbtn:
+            this._cancelbtn = wx.Button(statusbar, label=_("Cancel"), style=wx.BU_EXACTFIT)
+            this._cancelbtn.Bind(wx.EVT_BUTTON, this.Cancel)
+
+        rect = statusbar.GetFieldRect(statusbar.GetFieldsCount() - 1)
+        width = this._cancelbtn.GetBestSize().GetWidth()
+        this._cancelbtn.SetSize(rect.GetRight() - width, rect.GetY(), width, rect.GetHeight())
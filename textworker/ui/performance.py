@@ -0,0 +1,198 @@
+import time
+import tracemalloc
+import wx
+import wx.stc
+
+from .. import _
+from ..generic import clrCall, logger
+from ..profiling import Counters, Export, Session
+from .inputtrace import TraceRecorder
+
+LAG_INTERVAL: int = 100 # ms between event loop lag measures
+REFRESH_DELAY: int = 1000 # ms between updates of the window
+
+
+class LagMonitor(wx.Timer):
+    """
+    Measures how late a repeating timer fires: the time the event loop was
+    kept busy by something else (a slow handler, a long layout...).
+    """
+
+    def __init__(this):
+        wx.Timer.__init__(this)
+        this._last = 0.0
+
+    def Begin(this):
+        this._last = time.perf_counter()
+        this.Start(LAG_INTERVAL)
+
+    def Notify(this):
+        now = time.perf_counter()
+        Counters.Add("event loop lag", max(0.0, now - this._last - LAG_INTERVAL / 1000))
+        this._last = now
+
+
+class TimingList(wx.ListCtrl):
+    """
+    The operation counters, in a virtual list.
+    """
+
+    COLUMNS: list[tuple[str, str]] = [(_("Operation"), "name"), (_("Count"), "count"),
+                                      (_("Mean (ms)"), "mean_ms"), (_("p50 (ms)"), "p50_ms"),
+                                      (_("p99 (ms)"), "p99_ms"), (_("Max (ms)"), "max_ms")]
+
+    def __init__(this, parent: wx.Window):
+        wx.ListCtrl.__init__(this, parent, style=wx.LC_REPORT | wx.LC_VIRTUAL | wx.LC_SINGLE_SEL)
+        this.Records: list[dict] = []
+
+        for index, (title, key) in enumerate(this.COLUMNS):
+            this.InsertColumn(index, title, wx.LIST_FORMAT_LEFT if index == 0 else wx.LIST_FORMAT_RIGHT,
+                              width=160 if index == 0 else 80)
+
+    def SetRecords(this, records: list[dict]):
+        this.Records = records
+        this.SetItemCount(len(records))
+        this.Refresh()
+
+    def OnGetItemText(this, item: int, column: int) -> str:
+        value = this.Records[item][this.COLUMNS[column][1]]
+        return f"{value:.1f}" if isinstance(value, float) else str(value)
+
+
+class PerformanceWindow(wx.Frame):
+    """
+    Help -> Performance: operation timings (see profiling.Counters), the
+    event loop lag, and switches for cProfile and tracemalloc.
+    Everything can be exported as JSON lines, to be attached to a report.
+    """
+
+    def __init__(this, parent: wx.Window):
+        wx.Frame.__init__(this, parent, title=_("Performance"), size=(640, 420))
+        this.Lag = LagMonitor()
+        this.Recorder: TraceRecorder | None = None
+
+        panel = wx.Panel(this)
+        this.ProfileBox = wx.CheckBox(panel, label=_("Profile the GUI thread (cProfile)"))
+        this.TracingBox = wx.CheckBox(panel, label=_("Track allocations (tracemalloc)"))
+        this.LagBox = wx.CheckBox(panel, label=_("Measure the event loop lag"))
+        this.RecordBox = wx.CheckBox(panel, label=_("Record the input in the current tab (for replaying)"))
+        this.Memory = wx.StaticText(panel)
+        this.List = TimingList(panel)
+
+        this.ProfileBox.SetValue(Session.Profiling)
+        this.TracingBox.SetValue(Session.Tracing)
+
+        switches = wx.BoxSizer(wx.VERTICAL)
+        for box in [this.ProfileBox, this.TracingBox, this.LagBox, this.RecordBox]:
+            switches.Add(box, 0, wx.BOTTOM, 5)
+        switches.Add(this.Memory)
+
+        buttons = wx.BoxSizer(wx.HORIZONTAL)
+        for label, handler in [(_("Save profile..."), this.OnSaveProfile),
+                               (_("Save allocations..."), this.OnSaveTracing),
+                               (_("Export..."), this.OnExport),
+                               (_("Reset"), this.OnReset)]:
+            button = wx.Button(panel, label=label)
+            button.Bind(wx.EVT_BUTTON, handler)
+            buttons.Add(button, 0, wx.RIGHT, 5)
+
+        sizer = wx.BoxSizer(wx.VERTICAL)
+        sizer.Add(switches, 0, wx.EXPAND | wx.ALL, 5)
+        sizer.Add(this.List, 1, wx.EXPAND | wx.LEFT | wx.RIGHT, 5)
+        sizer.Add(buttons, 0, wx.ALL, 5)
+        panel.SetSizer(sizer)
+
+        this.Timer = wx.Timer(this)
+        this.Bind(wx.EVT_TIMER, lambda evt: this.Sync(), this.Timer)
+        this.Bind(wx.EVT_SHOW, this.OnShow)
+        this.Bind(wx.EVT_CLOSE, lambda evt: this.Hide())
+        this.Bind(wx.EVT_WINDOW_DESTROY, this.OnDestroy)
+        this.ProfileBox.Bind(wx.EVT_CHECKBOX, lambda evt: Session.ToggleProfile(evt.IsChecked()))
+        this.TracingBox.Bind(wx.EVT_CHECKBOX, lambda evt: (Session.ToggleTracing(evt.IsChecked()), this.Sync()))
+        this.LagBox.Bind(wx.EVT_CHECKBOX, this.OnLagBox)
+        this.RecordBox.Bind(wx.EVT_CHECKBOX, this.OnRecordBox)
+
+        clrCall.configure(this)
+
+    def Sync(this):
+        this.List.SetRecords(list(Counters.Records()))
+        if Session.Tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            this.Memory.SetLabel(_(f"Traced memory: {current / 2**20:.1f} MiB (peak {peak / 2**20:.1f} MiB)"))
+        else:
+            this.Memory.SetLabel("")
+
+    def Ask(this, message: str, name: str, wildcard: str) -> str:
+        dlg = wx.FileDialog(this, message, defaultFile=name, wildcard=wildcard,
+                            style=wx.FD_SAVE | wx.FD_OVERWRITE_PROMPT)
+        path = dlg.GetPath() if dlg.ShowModal() == wx.ID_OK else ""
+        dlg.Destroy()
+        return path
+
+    def Write(this, what: str, write, path: str):
+        if not path:
+            return
+        try:
+            write(path)
+            logger.info(f"{what} written to {path}")
+        except (OSError, ValueError) as e:
+            wx.MessageBox(_(f"Unable to write {path}: {e}"), _("Error"), wx.OK | wx.ICON_ERROR, this)
+
+    """
+    Events
+    """
+
+    def OnShow(this, evt):
+        if evt.IsShown():
+            this.Sync()
+            this.Timer.Start(REFRESH_DELAY)
+        else:
+            this.Timer.Stop()
+        evt.Skip()
+
+    def OnLagBox(this, evt):
+        if evt.IsChecked():
+            this.Lag.Begin()
+        else:
+            this.Lag.Stop()
+
+    def OnRecordBox(this, evt):
+        if evt.IsChecked():
+            editor = this.GetParent().notebook.GetCurrentPage()
+            if not isinstance(editor, wx.stc.StyledTextCtrl):
+                this.RecordBox.SetValue(False)
+                return
+            this.Recorder = TraceRecorder(editor)
+            return
+
+        recorder, this.Recorder = this.Recorder, None
+        events = recorder.Stop()
+        this.Write(_(f"Input trace ({len(events)} events)"), recorder.Save,
+                   this.Ask(_("Save the input trace"), "textworker.twtrace", "Input trace (*.twtrace)|*.twtrace"))
+
+    def OnReset(this, evt):
+        Counters.Reset()
+        this.Sync()
+
+    def OnSaveProfile(this, evt):
+        this.Write(_("Profile"), Session.DumpProfile,
+                   this.Ask(_("Save the profile"), "textworker.prof", "cProfile (*.prof)|*.prof"))
+
+    def OnSaveTracing(this, evt):
+        this.Write(_("Allocations"), Session.DumpTracing,
+                   this.Ask(_("Save the allocations"), "textworker.tracemalloc", "tracemalloc (*.tracemalloc)|*.tracemalloc"))
+
+    def OnExport(this, evt):
+        def write(path: str):
+            with open(path, "w", encoding="utf-8") as f:
+                Export(f)
+
+        this.Write(_("Performance report"), write,
+                   this.Ask(_("Export"), f"textworker-{time.strftime('%Y%m%d-%H%M%S')}.jsonl", "JSON lines (*.jsonl)|*.jsonl"))
+
+    def OnDestroy(this, evt):
+        if evt.GetEventObject() is this:
+            this.Lag.Stop()
+            if this.Recorder:
+                this.Recorder.Stop()
+        evt.Skip()
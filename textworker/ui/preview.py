@@ -0,0 +1,227 @@
+import hashlib
+import json
+import re
+import wx
+import wx.html2
+import wx.stc
+
+from concurrent.futures import ThreadPoolExecutor
+from difflib import SequenceMatcher
+from markdown2 import markdown
+
+from ..generic import clrCall, get_setting
+from ..profiling import Counters
+
+DELAY: int = get_setting("extensions.textwkr.preview", "delay", 300) # ms
+
+LINKDEF = re.compile(r"^ {0,3}\[[^\]]+\]:\s*\S") # Reference link or footnote definition
+FENCE = re.compile(r"^ {0,3}(```|~~~)")
+LISTITEM = re.compile(r"^ {0,3}([*+-]|\d+[.)])\s")
+
+PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8">
+<style>body {{ background: {bg}; color: {fg}; }}</style>
+<script>
+function twPatch(ops, lines) {{
+    var body = document.body;
+    for (const [start, end, blocks] of ops) {{
+        for (let i = start; i < end; i++) body.removeChild(body.children[start]);
+        var ref = body.children[start] || null;
+        for (const html of blocks) {{
+            var div = document.createElement("div");
+            div.innerHTML = html;
+            body.insertBefore(div, ref);
+        }}
+    }}
+    for (let i = 0; i < lines.length; i++) body.children[i].dataset.line = lines[i];
+}}
+function twScroll(line) {{
+    var target = null;
+    for (const div of document.body.children) {{
+        if (Number(div.dataset.line) > line) break;
+        target = div;
+    }}
+    if (target) target.scrollIntoView();
+}}
+</script>
+</head><body>{body}</body></html>
+"""
+
+
+def SplitBlocks(text: str) -> list[tuple[int, str]]:
+    """
+    Split a Markdown document into blocks which render on their own.
+    Blocks are separated by blank lines, except inside fenced code, before
+    indented (continuation) lines and between the items of a loose list.
+    Link and footnote definitions are used all over the document: with
+    any of them, the whole document is one block.
+    Returns [(first line, block text)].
+    """
+    lines = text.splitlines()
+    if any(LINKDEF.match(line) for line in lines):
+        return [(0, text.rstrip())] if text.strip() else []
+
+    blocks = []
+    current = []
+    start = 0
+    fenced = False
+    listing = False # current is a list
+
+    for number, line in enumerate(lines):
+        if fenced:
+            current.append(line)
+            fenced = not FENCE.match(line)
+            continue
+
+        if not line.strip():
+            if current:
+                current.append(line)
+            continue
+
+        item = bool(LISTITEM.match(line))
+        if current and not current[-1].strip() and not line[:1].isspace() and not (listing and item):
+            blocks.append((start, "\n".join(current).rstrip()))
+            current = []
+
+        if not current:
+            start = number
+            listing = False
+        listing = listing or item
+        current.append(line)
+        fenced = bool(FENCE.match(line))
+
+    if current:
+        blocks.append((start, "\n".join(current).rstrip()))
+
+    return blocks
+
+
+class MarkdownPreview(wx.Panel):
+    """
+    Live Markdown preview of an editor.
+
+    Rendering is debounced (DELAY ms after the last change) and happens on
+    a worker thread. Rendered HTML is cached per top-level block, keyed by
+    the block's hash, so only changed blocks are rendered again and patched
+    into the page. The preview follows the editor's scroll position.
+    """
+
+    _pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="textworker-preview")
+
+    def __init__(this, parent: wx.Window, editor: wx.stc.StyledTextCtrl):
+        wx.Panel.__init__(this, parent)
+
+        this.Editor = editor
+        this.Cache: dict[bytes, str] = {}
+        this.Shown: list[bytes] = [] # Hashes of the blocks in the page
+        this.Generation = 0
+        this.TopLine = -1
+        this.Loaded = False
+
+        this.View = wx.html2.WebView.New(this)
+        this.View.Bind(wx.html2.EVT_WEBVIEW_LOADED, this.OnLoaded)
+        sizer = wx.BoxSizer(wx.VERTICAL)
+        sizer.Add(this.View, 1, wx.EXPAND)
+        this.SetSizer(sizer)
+
+        this.Timer = wx.CallLater(DELAY, this.Render)
+        this.Timer.Stop()
+
+        editor.Bind(wx.stc.EVT_STC_MODIFIED, this.OnEditorModified)
+        editor.Bind(wx.stc.EVT_STC_UPDATEUI, this.OnEditorUpdateUI)
+        this.Bind(wx.EVT_WINDOW_DESTROY, this.OnDestroy)
+
+        this.Render()
+
+    def Render(this):
+        if not this.Editor:
+            return # Closed (or hibernated), keep the last render
+        this.Generation += 1
+        generation = this.Generation
+        text = this.Editor.GetText()
+
+        timed = Counters.Started("preview render")
+        future = this._pool.submit(this._RenderBlocks, text)
+        future.add_done_callback(
+            lambda future: wx.CallAfter(this._Show, generation, future.result(), timed))
+
+    def _RenderBlocks(this, text: str) -> list[tuple[bytes, int, str]]:
+        # Worker thread
+        result = []
+
+        for line, block in SplitBlocks(text):
+            key = hashlib.blake2b(block.encode("utf-8"), digest_size=16).digest()
+            html = this.Cache.get(key)
+            if html is None:
+                html = this.Cache[key] = markdown(block)
+            result.append((key, line, html))
+
+        # Forget blocks which are gone
+        if len(this.Cache) > 2 * len(result) + 64:
+            alive = {key for key, line, html in result}
+            for key in list(this.Cache):
+                if key not in alive:
+                    del this.Cache[key]
+
+        return result
+
+    def _Show(this, generation: int, blocks: list[tuple[bytes, int, str]], timed=None):
+        if not this or generation != this.Generation:
+            return # Closed, or a newer render is coming
+
+        keys = [key for key, line, html in blocks]
+        lines = [line for key, line, html in blocks]
+
+        if not this.Loaded:
+            bg, fg = clrCall.GetColor()
+            body = "".join(f'<div data-line="{line}">{html}</div>' for key, line, html in blocks)
+            this.View.SetPage(PAGE.format(bg=bg, fg=fg, body=body), "")
+        else:
+            ops = []
+            matcher = SequenceMatcher(None, this.Shown, keys, autojunk=False)
+            for tag, i1, i2, j1, j2 in reversed(matcher.get_opcodes()):
+                if tag != "equal":
+                    ops.append((i1, i2, [html for key, line, html in blocks[j1:j2]]))
+            this.View.RunScript(f"twPatch({json.dumps(ops)}, {json.dumps(lines)});")
+
+        this.Shown = keys
+        this.SyncScroll()
+        if timed:
+            timed()
+
+    def SyncScroll(this):
+        if not this.Loaded or not this.Editor:
+            return
+        top = this.Editor.GetFirstVisibleLine()
+        if top != this.TopLine:
+            this.TopLine = top
+            this.View.RunScript(f"twScroll({this.Editor.DocLineFromVisible(top)});")
+
+    """
+    Events.
+    """
+
+    def OnLoaded(this, evt):
+        this.Loaded = True
+        this.TopLine = -1
+        this.SyncScroll()
+        evt.Skip()
+
+    def OnEditorModified(this, evt: wx.stc.StyledTextEvent):
+        if evt.GetModificationType() & (wx.stc.STC_MOD_INSERTTEXT | wx.stc.STC_MOD_DELETETEXT):
+            this.Timer.Start(DELAY) # Restarts the countdown
+        evt.Skip()
+
+    def OnEditorUpdateUI(this, evt: wx.stc.StyledTextEvent):
+        if evt.GetUpdated() & wx.stc.STC_UPDATE_V_SCROLL:
+            this.SyncScroll()
+        evt.Skip()
+
+    def OnDestroy(this, evt):
+        if evt.GetWindow() is this:
+            this.Timer.Stop()
+            this.Generation += 1
+            if this.Editor:
+                this.Editor.Unbind(wx.stc.EVT_STC_MODIFIED, handler=this.OnEditorModified)
+                this.Editor.Unbind(wx.stc.EVT_STC_UPDATEUI, handler=this.OnEditorUpdateUI)
+        evt.Skip()
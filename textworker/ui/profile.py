@@ -0,0 +1,269 @@
+"""
+Editor profiles: the theme and the editor settings, compiled once.
+
+Setting up an editor used to read both configurations again, and compute
+the colors (which may ask the system for its theme), for each new tab.
+Compile() does that once, into an immutable EditorProfile, and Configure()
+sets an editor up from it with a handful of Scintilla calls.
+
+When the settings or the theme change, a new profile is compiled and
+applied to every open window at once, see Recompile.
+
+Big documents and long lines get a lighter profile (Restrict), see limits.
+"""
+import os
+import time
+import typing
+import wx
+import wx.stc
+
+from .. import limits
+from ..generic import clrCall, colorSettings, editorSettings, find_resource, logger, settings
+
+LINE_NUMBERS_WIDTH: int = 40 # px, enough for 4 digits
+LINE_NUMBERS_PADDING: int = 4 # px, after more digits
+
+
+class EditorProfile(typing.NamedTuple):
+    Background: str # "#rrggbb"
+    Foreground: str
+    Styles: tuple[tuple[int, str], ...] # StyleSetSpec arguments, the default style first
+    LineNumbers: bool
+    UseTabs: bool
+    Indent: int
+    IndentGuides: bool
+    BackspaceUnindents: bool
+    ViewWhitespace: bool
+    ViewEOL: bool
+    WordWrap: bool
+    Menu: bool
+    DragAndDrop: bool
+    Lexing: bool
+    Folding: bool
+    BraceMatching: bool # For whatever highlights braces: Scintilla doesn't by itself
+    LayoutCache: int # wx.stc.STC_CACHE_*
+    Thresholds: limits.Thresholds
+
+
+Listener = typing.Callable[[EditorProfile, EditorProfile | None], None] # (new, previous)
+
+_current: EditorProfile | None = None
+_listeners: list[Listener] = []
+_scheduled = False
+_watching = False
+
+
+def Compile() -> EditorProfile:
+    bg, fg = clrCall.GetColor()
+    spec = f"fore:{fg},back:{bg}"
+
+    indent = editorSettings.IndentSize
+    if not 0 < indent <= 8:
+        logger.warning(f"Invalid indentation size {indent}, must be from 1 to 8")
+        indent = 4
+
+    return EditorProfile(Background=bg, Foreground=fg,
+                         Styles=((wx.stc.STC_STYLE_DEFAULT, spec), (wx.stc.STC_STYLE_LINENUMBER, spec)),
+                         LineNumbers=editorSettings.LineCount,
+                         UseTabs=editorSettings.IndentType.lower() == "tabs",
+                         Indent=indent,
+                         IndentGuides=editorSettings.ShowGuide,
+                         BackspaceUnindents=editorSettings.BackspaceUnindents,
+                         ViewWhitespace=editorSettings.ViewWhitespaces,
+                         ViewEOL=editorSettings.ViewEOL,
+                         WordWrap=editorSettings.WordWrap,
+                         Menu=editorSettings.Menu,
+                         DragAndDrop=editorSettings.DragAndDrop,
+                         Lexing=True, Folding=True, BraceMatching=True,
+                         LayoutCache=wx.stc.STC_CACHE_PAGE,
+                         Thresholds=limits.Thresholds(Large=editorSettings.LargeSize << 20,
+                                                      Huge=editorSettings.HugeSize << 20,
+                                                      LongLine=editorSettings.LongLine << 10,
+                                                      VeryLongLine=editorSettings.VeryLongLine << 10))
+
+
+def Current() -> EditorProfile:
+    global _current
+    if _current is None:
+        _current = Compile()
+    return _current
+
+
+def Restrict(profile: EditorProfile, level: int) -> EditorProfile:
+    """
+    What of a profile a document of a limits level can afford.
+    """
+    if level >= limits.LARGE:
+        profile = profile._replace(WordWrap=False, ViewWhitespace=False, ViewEOL=False,
+                                   IndentGuides=False, BraceMatching=False)
+    if level >= limits.HUGE:
+        profile = profile._replace(Lexing=False, Folding=False, LayoutCache=wx.stc.STC_CACHE_CARET)
+    return profile
+
+
+def LineNumbersWidth(editor: wx.stc.StyledTextCtrl) -> int:
+    """
+    Width of the line numbers margin for the editor's line count (and
+    zoom), as libtextworker's StyledTextControl.OnUIUpdate did.
+    """
+    digits = len(str(editor.GetLineCount()))
+    if digits <= 4:
+        return LINE_NUMBERS_WIDTH
+    return editor.TextWidth(wx.stc.STC_STYLE_LINENUMBER, "9" * digits) + LINE_NUMBERS_PADDING
+
+
+def Configure(editor: wx.stc.StyledTextCtrl, profile: EditorProfile, previous: EditorProfile | None = None):
+    """
+    Set an editor up from a profile.
+    With previous (the profile it was set up from), only what differs is
+    changed: what was changed in the tab itself (View -> Word wrap...) stays.
+    """
+    def changed(field: str) -> bool:
+        return previous is None or getattr(profile, field) != getattr(previous, field)
+
+    if changed("Styles"):
+        (style, spec), *others = profile.Styles
+        editor.StyleSetSpec(style, spec)
+        editor.StyleClearAll() # Every style from the default one
+        for style, spec in others:
+            editor.StyleSetSpec(style, spec)
+
+    if changed("LineNumbers"):
+        if profile.LineNumbers:
+            editor.SetMarginType(0, wx.stc.STC_MARGIN_NUMBER)
+            editor.SetMarginMask(0, 0)
+        else:
+            editor.SetMarginWidth(0, 0)
+    if profile.LineNumbers and (changed("LineNumbers") or changed("Styles")): # The font may have changed
+        editor.SetMarginWidth(0, LineNumbersWidth(editor))
+
+    if changed("UseTabs"):
+        editor.SetUseTabs(profile.UseTabs)
+    if changed("Indent"):
+        editor.SetIndent(profile.Indent)
+    if changed("IndentGuides"):
+        editor.SetIndentationGuides(wx.stc.STC_IV_LOOKBOTH if profile.IndentGuides else wx.stc.STC_IV_NONE)
+    if changed("BackspaceUnindents"):
+        editor.SetBackSpaceUnIndents(profile.BackspaceUnindents)
+    if changed("ViewWhitespace"):
+        editor.SetViewWhiteSpace(wx.stc.STC_WS_VISIBLEALWAYS if profile.ViewWhitespace else wx.stc.STC_WS_INVISIBLE)
+    if changed("ViewEOL"):
+        editor.SetViewEOL(profile.ViewEOL)
+    if changed("WordWrap"):
+        editor.SetWrapMode(wx.stc.STC_WRAP_WORD if profile.WordWrap else wx.stc.STC_WRAP_NONE)
+    if changed("Lexing"):
+        editor.SetLexer(wx.stc.STC_LEX_CONTAINER if profile.Lexing else wx.stc.STC_LEX_NULL)
+    if changed("Folding"):
+        editor.SetProperty("fold", "1" if profile.Folding else "0")
+    if changed("BraceMatching") and not profile.BraceMatching:
+        editor.BraceHighlight(wx.stc.STC_INVALID_POSITION, wx.stc.STC_INVALID_POSITION)
+    if changed("LayoutCache"):
+        editor.SetLayoutCache(profile.LayoutCache)
+
+
+def Restyle(window: wx.Window, profile: EditorProfile):
+    """
+    Apply a profile to the editors in window.
+    """
+    if hasattr(window, "ApplyProfile"):
+        window.ApplyProfile(profile)
+        return
+    for child in window.GetChildren():
+        Restyle(child, profile)
+
+
+def Recompile() -> bool:
+    """
+    Compile the profile again, and apply it to every window if it changed.
+    Top level windows are frozen meanwhile, so they are drawn once, and
+    editors only change what differs (mostly 3 calls for a new theme).
+    Returns whether anything changed.
+    """
+    global _current, _scheduled
+    _scheduled = False
+
+    if hasattr(clrCall.GetColor, "cache_clear"): # Memoized, see generic.ready
+        clrCall.GetColor.cache_clear()
+
+    previous, _current = _current, Compile()
+    if _current == previous:
+        return False
+
+    started = time.perf_counter()
+    colors = previous is None or previous.Styles != _current.Styles
+    windows = [window for window in wx.GetTopLevelWindows() if window]
+    for window in windows:
+        window.Freeze()
+    try:
+        for window in windows:
+            if colors:
+                clrCall.configure(window) # Cheap, the colors are memoized
+            Restyle(window, _current)
+        for listener in list(_listeners):
+            listener(_current, previous)
+    finally:
+        for window in windows:
+            window.Thaw()
+
+    logger.debug(f"Editor profile applied in {(time.perf_counter() - started) * 1000:.1f} ms")
+    return True
+
+
+def Schedule(*args):
+    """
+    Recompile once the current event is handled: changing a setting often
+    changes others along (see settings.SettingsDialog.apply_color).
+    Takes and ignores Settings listener arguments.
+    """
+    global _scheduled
+    if not _scheduled:
+        _scheduled = True
+        wx.CallAfter(Recompile)
+
+
+def LoadTheme():
+    """
+    Read the theme file the settings point to, if it's another one.
+    """
+    path = find_resource("ui")
+    if path == colorSettings.Path:
+        return
+    if not os.path.isfile(path):
+        logger.warning(f"Theme file {path} not found")
+        return
+
+    colorSettings.Flush() # Changes to the previous theme go to its file
+    clrCall.read(path, encoding="utf-8")
+    colorSettings.Path = path
+    colorSettings.Reset() # Schedules a recompile
+
+
+def OnAppSettingChanged(section: str | None, option: str | None):
+    if section in (None, "config-paths.ui"):
+        LoadTheme()
+
+
+def Watch():
+    """
+    Follow changes of the settings and the theme, once.
+    """
+    global _watching
+    if _watching:
+        return
+    _watching = True
+    settings.AddListener(OnAppSettingChanged)
+    editorSettings.AddListener(Schedule)
+    colorSettings.AddListener(Schedule)
+
+
+"""
+Change notifications
+"""
+
+def AddListener(listener: Listener):
+    _listeners.append(listener)
+
+
+def RemoveListener(listener: Listener):
+    if listener in _listeners:
+        _listeners.remove(listener)
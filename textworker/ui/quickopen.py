@@ -0,0 +1,116 @@
+import os
+import wx
+
+from .. import _
+from ..fileindex import FileIndex, Search
+
+STEP_DELAY: int = 1 # ms between two steps of a long search, to let keystrokes in
+
+
+class QuickOpen(wx.Dialog):
+    """
+    Type some characters of a file path (in order, not necessarily
+    together), pick one of the Explorer folder files to open it.
+    """
+
+    def __init__(this, parent: wx.Window):
+        wx.Dialog.__init__(this, parent, title=_("Quick open"), size=(560, 380),
+                           style=wx.DEFAULT_DIALOG_STYLE | wx.RESIZE_BORDER)
+
+        this.Index: FileIndex | None = None
+        this.Search: Search | None = None
+        this.Opener = None
+
+        this.Entry = wx.TextCtrl(this, style=wx.TE_PROCESS_ENTER)
+        this.Results = wx.ListBox(this, style=wx.LB_SINGLE)
+        this.Status = wx.StaticText(this)
+
+        sizer = wx.BoxSizer(wx.VERTICAL)
+        sizer.Add(this.Entry, 0, wx.EXPAND | wx.ALL, 5)
+        sizer.Add(this.Results, 1, wx.EXPAND | wx.LEFT | wx.RIGHT, 5)
+        sizer.Add(this.Status, 0, wx.EXPAND | wx.ALL, 5)
+        this.SetSizer(sizer)
+
+        this.Entry.Bind(wx.EVT_TEXT, this.OnText)
+        this.Entry.Bind(wx.EVT_TEXT_ENTER, this.OnOpen)
+        this.Entry.Bind(wx.EVT_KEY_DOWN, this.OnKeyDown)
+        this.Results.Bind(wx.EVT_LISTBOX_DCLICK, this.OnOpen)
+
+    def Popup(this, index: FileIndex | None, opener):
+        """
+        Show the dialog for an index.
+        opener is called with the full path of the chosen file.
+        """
+        this.Index = index
+        this.Opener = opener
+        this.Entry.ChangeValue("")
+        this.Query()
+        this.Show()
+        this.Raise()
+        this.Entry.SetFocus()
+
+    def Query(this):
+        text = this.Entry.GetValue()
+        this.Search = this.Index.Query(text) if this.Index and this.Index.Ready.is_set() else None
+        this.ShowResults()
+        if this.Search and not this.Search.Done:
+            wx.CallLater(STEP_DELAY, this.Continue, this.Search)
+
+    def Continue(this, search: Search):
+        if not this or search is not this.Search:
+            return # Typed something else meanwhile
+        search.Step()
+        this.ShowResults()
+        if not search.Done:
+            wx.CallLater(STEP_DELAY, this.Continue, search)
+
+    def ShowResults(this):
+        results = this.Search.Results if this.Search else []
+        if results != this.Results.GetItems():
+            this.Results.Set(results)
+            if results:
+                this.Results.SetSelection(0)
+
+        if not this.Index:
+            this.Status.SetLabel(_("Open a folder first"))
+        elif not this.Index.Ready.is_set():
+            this.Status.SetLabel(_("Indexing..."))
+        elif not this.Index.Complete.is_set():
+            this.Status.SetLabel(_(f"{len(this.Index)} files (updating...)"))
+        else:
+            this.Status.SetLabel(_(f"{len(this.Index)} files"))
+
+    def OnIndexChanged(this):
+        """
+        The index got new content. Called from the GUI thread.
+        """
+        if this and this.IsShown():
+            this.Query()
+
+    """
+    Events
+    """
+
+    def OnText(this, evt):
+        this.Query()
+
+    def OnKeyDown(this, evt: wx.KeyEvent):
+        count = this.Results.GetCount()
+        selection = this.Results.GetSelection()
+
+        match evt.GetKeyCode():
+            case wx.WXK_DOWN if count:
+                this.Results.SetSelection(min(selection + 1, count - 1))
+            case wx.WXK_UP if count:
+                this.Results.SetSelection(max(selection - 1, 0))
+            case wx.WXK_ESCAPE:
+                this.Hide()
+            case _:
+                evt.Skip()
+
+    def OnOpen(this, evt):
+        selection = this.Results.GetSelection()
+        if selection == wx.NOT_FOUND or not this.Index:
+            return
+        this.Hide()
+        this.Opener(os.path.join(this.Index.Root, this.Results.GetString(selection)))
@@ -0,0 +1,167 @@
+import os
+import threading
+import wx
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable
+
+from .. import _
+from ..fileio import AtomicWrite
+from ..generic import logger
+from ..profiling import Counters
+from ..sniff import Encoded
+from ..watcher import Signature
+from .tracker import RawBuffer
+
+
+class ChangedOnDisk(OSError):
+    """
+    Raised by a guarded save (auto save) when another program changed the
+    file since it was loaded or saved. See diskwatch.DiskWatcher.
+    """
+
+
+def Snapshot(editor: wx.stc.StyledTextCtrl) -> bytes:
+    """
+    Copy the editor's document as raw UTF-8 bytes.
+    This is a single copy of Scintilla's buffer - no str is ever made.
+    """
+    return bytes(RawBuffer(editor))
+
+
+class SaveEngine:
+    """
+    Saves documents on worker threads.
+
+    The document is snapshotted on the GUI thread, then streamed to a
+    temporary file which atomically replaces the target (see
+    fileio.AtomicWrite). A crash in the middle of a save leaves the old
+    file untouched.
+    """
+
+    def __init__(this, workers: int = 4):
+        this._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="textworker-save")
+        this._locks: dict[str, threading.Lock] = {}
+        this._saving: dict[str, int] = {} # path: saves not done yet (GUI thread only)
+
+    def _Lock(this, path: str) -> threading.Lock:
+        # Saves of the same file must not race each other
+        return this._locks.setdefault(os.path.abspath(path), threading.Lock())
+
+    def Saving(this, path: str) -> bool:
+        """
+        Whether a write of path is queued or running, or its end not handled yet.
+        """
+        return os.path.abspath(path) in this._saving
+
+    def Save(this, editor: wx.stc.StyledTextCtrl, path: str = "",
+             callback: Callable[[str, Exception | None], None] | None = None,
+             guard: bool = False) -> Future | None:
+        """
+        Save an editor's content in the background.
+        @param path: Target, defaults to editor.FileLoaded
+        @param callback: Called on the GUI thread as callback(path, error)
+        @param guard: Fail with ChangedOnDisk rather than overwrite a file
+                      another program changed (compared with editor.Disk)
+        @return A Future, or None if there is no path to save to
+        """
+        path = path or editor.FileLoaded
+        if not path:
+            return None
+
+        generation = editor.Tracker.Generation
+        expected = editor.Disk
+
+        large = editor.Large # Kept: the editor may be destroyed before the save ends
+        if large:
+            large.Commit()
+            large.Saving = True
+            document = large.Document
+            write = lambda: document.Save(path)
+        else:
+            data, format = Snapshot(editor), editor.Format
+            write = lambda: AtomicWrite(path, Encoded(data, format))
+
+        signature = None
+
+        def work():
+            nonlocal signature
+            if guard and Signature(path) != expected:
+                raise ChangedOnDisk(_(f"{path} was changed by another program"))
+            write()
+            signature = Signature(path)
+
+        timed = Counters.Started("save")
+
+        def done(error: Exception | None):
+            timed()
+            this._Done(editor, large, path, generation, signature, error, callback)
+
+        return this.Run(path, work, done)
+
+    def Run(this, path: str, work: Callable[[], None], done: Callable[[Exception | None], None]) -> Future:
+        """
+        Run work() (which writes path) on the pool, never at the same time as
+        another write of the same file. done(error) is called on the GUI thread.
+        """
+        def run():
+            with this._Lock(path):
+                work()
+
+        key = os.path.abspath(path)
+        this._saving[key] = this._saving.get(key, 0) + 1
+
+        def finished(error: Exception | None):
+            this._saving[key] -= 1
+            if not this._saving[key]:
+                del this._saving[key]
+            done(error)
+
+        future = this._pool.submit(run)
+        future.add_done_callback(lambda future: wx.CallAfter(finished, future.exception()))
+        return future
+
+    def _Done(this, editor, large, path: str, generation: int, signature: tuple | None,
+              error: Exception | None, callback):
+        if large and not this.Saving(path): # Else the last save reloads it
+            large.Reload()
+
+        if error:
+            logger.error(f"Unable to save {path}: {error}")
+        elif editor:
+            editor.FileLoaded = path
+            editor.Disk = signature
+            editor.Tracker.MarkSaved(generation)
+
+        if callback:
+            callback(path, error)
+
+    def SaveAll(this, editors: list, callback: Callable[[list[tuple[str, Exception | None]]], None]):
+        """
+        Save every given (dirty) editor concurrently, using their SaveFile
+        method (hibernated tabs have one too, see ui.hibernate).
+        callback gets a list of (path, error) once everything is done.
+        Editors without a file name are reported with a ValueError.
+        """
+        results = []
+        pending = 0
+
+        def one_done(path: str, error: Exception | None):
+            nonlocal pending
+            results.append((path, error))
+            pending -= 1
+            if pending == 0:
+                callback(results)
+
+        for editor in editors:
+            if not editor.FileLoaded:
+                results.append((_("(new file)"), ValueError(_("No file name, use Save as"))))
+                continue
+            pending += 1
+            editor.SaveFile(callback=one_done)
+
+        if pending == 0:
+            callback(results)
+
+
+Engine = SaveEngine()
@@ -1,17 +1,12 @@
 import json
 import os
-import requests
 
 import wx
-import wx.html2
-import wx.lib.agw.cubecolourdialog
 import wx.xrc
 
 from libtextworker.general import CraftItems
 from libtextworker.interface.manager import AUTOCOLOR, ColorManager
 
-from markdown2 import markdown
-
 from .. import _
 from .. import __version__, branch
 from ..generic import *
@@ -22,29 +17,26 @@ class SettingsDialog(preferences.StDialog):
     A WIP settings page for text worker.
     """
 
-    AUTOUPDATE: bool = global_settings["base"]["autoupdate"] in global_settings.yes_values
-    NB_LOC: str = global_settings['extensions.textwkr.multiview']['notebook_location']
-
-    AUTOCOLOR_CHANGE: bool = clrCall["color"]["auto"] in clrCall.yes_values
-    CURRTHEME: str = global_settings["config-paths.ui"]["theme"]
-
+    # Changes are written by config.Settings, once they stop coming
 
     def __init__(this, parent: wx.Window):
         preferences.StDialog.__init__(this, parent)
 
         # General page
-        this.m_checkBox1.SetValue(this.AUTOUPDATE)
-        this.m_choice2.SetStringSelection(this.NB_LOC.capitalize())
+        this.m_checkBox1.SetValue(settings.AutoUpdate)
+        this.m_choice2.SetStringSelection(settings.NotebookLocation.capitalize())
 
         this.Bind(wx.EVT_CHECKBOX,
-                  lambda evt: global_settings.set_and_update(
-                        "base", "autoupdate", this.m_checkBox1.IsChecked()
-                  ),
+                  lambda evt: setattr(settings, "AutoUpdate", this.m_checkBox1.IsChecked()),
                   this.m_checkBox1)
 
         this.Bind(wx.EVT_BUTTON, this.check_updates, this.m_button3)
 
         def showchangelog(evt):
+            import requests
+            import wx.html2
+            from markdown2 import markdown
+
             new = wx.Dialog(this)
             try:
                 text = json.loads(
@@ -62,18 +54,15 @@ class SettingsDialog(preferences.StDialog):
 
         this.Bind(wx.EVT_BUTTON, showchangelog, this.m_button4)
 
-        this.Bind(wx.EVT_CHOICE, lambda evt: global_settings.set_and_update(
-                    "extensions.textwkr.multiview",
-                    "notebook_location",
-                    this.m_choice2.GetStringSelection().lower()
-                  ),
+        this.Bind(wx.EVT_CHOICE,
+                  lambda evt: setattr(settings, "NotebookLocation", this.m_choice2.GetStringSelection().lower()),
                   this.m_choice2)
 
         # Colors page
         colors = {_("Dark"): 1, _("Light"): 2} # Corresponding to the XRC file
 
-        this.m_radioBox1.SetSelection(0 if this.AUTOCOLOR_CHANGE
-                                        else colors[_(clrCall.Get("color", "background").capitalize())])
+        this.m_radioBox1.SetSelection(0 if colorSettings.Auto
+                                        else colors[_(colorSettings.Background.capitalize())])
         
 
         this.Bind(wx.EVT_RADIOBOX, lambda evt: this.apply_color(this.m_radioBox1.GetStringSelection()), this.m_radioBox1)
@@ -82,10 +71,9 @@ class SettingsDialog(preferences.StDialog):
             this.m_choice3.Append(i.removesuffix(".ini"))
 
         def setTheme(evt):
-            global_settings.set_and_update("config-paths.ui", "theme", this.m_choice3.GetStringSelection().lower())
-            wx.MessageBox(_("Restart the application to get the effect"), _("Completed"), parent=this)
+            settings.Theme = this.m_choice3.GetStringSelection().lower() # Applied at once, see ui.profile
 
-        this.m_choice3.SetStringSelection(this.CURRTHEME)
+        this.m_choice3.SetStringSelection(settings.Theme)
         this.Bind(wx.EVT_CHOICE, setTheme, this.m_choice3)
 
         def target_type() -> str:
@@ -96,7 +84,7 @@ class SettingsDialog(preferences.StDialog):
         def getandsetcolor(kind: str):
             result = this.ShowAndSetColourIfAbleTo()
             if result:
-                clrCall.set_and_update("color", kind + target_type(), result)
+                colorSettings.Set("color", kind + target_type(), result)
 
         this.m_button5.Bind(wx.EVT_BUTTON, lambda evt: getandsetcolor("background"))
         this.m_button6.Bind(wx.EVT_BUTTON, lambda evt: getandsetcolor("foreground"))
@@ -122,43 +110,40 @@ class SettingsDialog(preferences.StDialog):
 
         indentationTypes = ["tabs", "spaces"]
 
-        this.m_choice1.SetSelection(indentationTypes.index(editorCfg.Get("indentation", "type").lower()))
-        this.m_comboBox1.SetValue(editorCfg.Get("indentation", "size"))
-        this.m_checkBox3.SetValue(editorCfg.Get("indentation", "backspace_unindents"))
-        this.m_checkBox6.SetValue(editorCfg.Get("indentation", "show_guide"))
-        this.m_checkBox4.SetValue(editorCfg.Get("editor", "view_whitespaces"))
-        this.m_checkBox5.SetValue(editorCfg.Get("editor", "viewEOL"))
-        this.m_checkBox7.SetValue(editorCfg.Get("editor", "line_count"))
+        this.m_choice1.SetSelection(indentationTypes.index(editorSettings.IndentType.lower()))
+        this.m_comboBox1.SetValue(str(editorSettings.IndentSize))
+        this.m_checkBox3.SetValue(editorSettings.BackspaceUnindents)
+        this.m_checkBox6.SetValue(editorSettings.ShowGuide)
+        this.m_checkBox4.SetValue(editorSettings.ViewWhitespaces)
+        this.m_checkBox5.SetValue(editorSettings.ViewEOL)
+        this.m_checkBox7.SetValue(editorSettings.LineCount)
 
         for item in os.listdir(EDITOR_DIR):
             this.m_choice31.Append(item)
 
         this.Bind(wx.EVT_CHOICE,
-                  lambda evt: editorCfg.set_and_update(
-                      "indentation", "type", indentationTypes[this.m_choice1.GetSelection()]
-                  ),
+                  lambda evt: setattr(editorSettings, "IndentType", indentationTypes[this.m_choice1.GetSelection()]),
                   this.m_choice1)
 
-        this.Bind(wx.EVT_TEXT,
-                  lambda evt: editorCfg.set_and_update("indentation", "size", evt.GetString()),
-                  this.m_comboBox1)
+        def setIndentSize(evt):
+            if evt.GetString().isdigit():
+                editorSettings.IndentSize = int(evt.GetString())
+
+        this.Bind(wx.EVT_TEXT, setIndentSize, this.m_comboBox1)
 
         # Lazy bind
         # Because checkbox numbers are not correctly listed,
         # so we have this
-        editorSettings = {3: "backspace_unindents",
-                          4: "view_whitespaces",
-                          5: "view_EOL",
-                          6: "show_guide",
-                          7: "line_count"}
-        
-        for i in range(3, 8):
+        checkboxes = {3: "BackspaceUnindents",
+                      4: "ViewWhitespaces",
+                      5: "ViewEOL",
+                      6: "ShowGuide",
+                      7: "LineCount"}
+
+        for i, name in checkboxes.items():
             checkbox = getattr(this, f"m_checkBox{str(i)}")
-            this.Bind(wx.EVT_COMBOBOX,
-                      lambda evt: editorCfg.set_and_update(
-                          "indentation" if i in [3, 6] else "editor",
-                          editorSettings[i], checkbox.IsChecked()
-                      ),
+            this.Bind(wx.EVT_CHECKBOX,
+                      lambda evt, name=name, checkbox=checkbox: setattr(editorSettings, name, checkbox.IsChecked()),
                       checkbox)
         
         clrCall.configure(this)
@@ -186,6 +171,9 @@ class SettingsDialog(preferences.StDialog):
                     if wx.MessageBox(_(f"Your editor is outdated: new {result[0]} from branch {branch}.\n"
                                        f"Get via: {result[2]}" if result[2] else ""),
                                      _("Update available"), wx.YES_NO, this) == wx.YES:
+                        import wx.html2
+                        from markdown2 import markdown
+
                         new = wx.Frame(this)
                         text = wx.html2.WebView.New(new)
                         text.SetPage(markdown(result[1]), f"{result[0]} changelog")
@@ -196,13 +184,14 @@ class SettingsDialog(preferences.StDialog):
 
     def apply_color(this, string):
         if string != _("Automatic"):
-            clrCall.set_and_update("color", "background", string.lower())
-            clrCall.set_and_update("color", "auto", "no")
+            colorSettings.Background = string.lower()
+            colorSettings.Auto = False
         else:
-            clrCall.set_and_update("color", "background", "light")
-            clrCall.set_and_update("color", "auto", "yes")
+            colorSettings.Background = "light"
+            colorSettings.Auto = True
 
     def ShowAndSetColourIfAbleTo(this) -> str | None:
+        import wx.lib.agw.cubecolourdialog
         dlg = wx.lib.agw.cubecolourdialog.CubeColourDialog(this)
         clrCall.configure(dlg)
         clrCall.autocolor_run(dlg)
@@ -3,15 +3,24 @@ import wx
 import wx.lib.agw.aui as aui
 import wx.stc
 
-from hashlib import md5
 from libtextworker.interface.wx.editor import DragNDropTarget
 
+from typing import Callable
+
 from .. import _
+from .diskwatch import DiskWatcher
 from .editor import Editor
-from ..generic import global_settings, clrCall
+from .hibernate import Hibernator, TabStub
+from .limitsbar import LimitsIndicator
+from .opener import FileOpener
+from .saver import Engine
+from ..generic import settings, clrCall
+from ..profiling import Counters, Profiler
+from ..sniff import FileFormat
 from .auistyles import AuiFlatTabArt
+from .lazy import LazyWindow
 
-searchdir = global_settings.Get("editor", "searchdir", noraiseexp=True, make=True)
+searchdir = settings.SearchDir
 if not os.path.isdir(searchdir):
     searchdir = os.path.expanduser("~/Documents")
 
@@ -23,8 +32,7 @@ class Tabber(aui.AuiNotebook, DragNDropTarget):
     SetStatus: bool = False
     NewTabTitle: str = _("Untitled")
 
-    file_dialog = wx.FileDialog(None, defaultDir=searchdir)
-    message = wx.MessageDialog(None, "")
+    file_dialog = LazyWindow(lambda this: wx.FileDialog(None, defaultDir=searchdir), shared=True)
 
     def __init__(this, *args, **kwds):
         kwds["style"] = kwds.get("style", 0) | aui.AUI_NB_WINDOWLIST_BUTTON | aui.AUI_NB_TAB_SPLIT | aui.AUI_NB_DRAW_DND_TAB | aui.AUI_NB_HIDE_ON_SINGLE_TAB | aui.AUI_NB_TAB_FIXED_WIDTH
@@ -33,126 +41,279 @@ class Tabber(aui.AuiNotebook, DragNDropTarget):
         # AUI_NB_CLOSE_ON_ALL_TABS : Close button on all tabs (disabled by default)
         # AUI_NB_MIDDLE_CLICK_CLOSE : Use middle click to close tabs
         # AUI_NB_TAB_MOVE : Move tab
-        movetabs = global_settings['editor.tabs']["move_tabs"]
-        middle_close = global_settings['editor.tabs']["middle_close"]
-        this.close_on_no_tab = global_settings['editor.tabs']["close_on_no_tab"]
+        this.close_on_no_tab = settings.CloseOnNoTab
 
-        if movetabs in global_settings.yes_values: kwds["style"] |= aui.AUI_NB_TAB_MOVE
+        if settings.MoveTabs: kwds["style"] |= aui.AUI_NB_TAB_MOVE
 
-        if middle_close in global_settings.yes_values: kwds["style"] |= aui.AUI_NB_MIDDLE_CLICK_CLOSE
+        if settings.MiddleClose: kwds["style"] |= aui.AUI_NB_MIDDLE_CLICK_CLOSE
 
-        if this.close_on_no_tab in global_settings.yes_values: kwds["style"] |= aui.AUI_NB_CLOSE_ON_ALL_TABS
+        if this.close_on_no_tab: kwds["style"] |= aui.AUI_NB_CLOSE_ON_ALL_TABS
         else: kwds["style"] |= aui.AUI_NB_CLOSE_ON_ACTIVE_TAB
 
         aui.AuiNotebook.__init__(this, *args, **kwds)
         this.SetArtProvider(AuiFlatTabArt())
+        this.Opener = FileOpener(this, this.PlaceFile)
+        this.Hibernator = Hibernator(this, this.MakeEditor)
+        this.DiskWatch = DiskWatcher(this)
+        this.Waiting: dict[str, Callable[[Editor], None]] = {} # File being loaded: what to do then
 
+        # Second field of the window's status bar, if it has one
+        statusbar = wx.GetTopLevelParent(this).GetStatusBar()
+        this.Limits = LimitsIndicator(statusbar, 1) if statusbar and statusbar.GetFieldsCount() > 1 else None
 
-        this.AddTab()
+        with Profiler.Phase("first Tabber.AddTab"):
+            this.AddTab()
 
         this.Bind(aui.EVT_AUINOTEBOOK_PAGE_CHANGED, this.OnPageChanged)
         this.Bind(aui.EVT_AUINOTEBOOK_PAGE_CLOSED, this.OnPageClosed)
         this.Bind(wx.EVT_WINDOW_DESTROY, this.OnSelfDestroy)
 
-    def AddTab(this, evt=None, tabname: str = _("New file")):
-        newte = Editor(this, style=wx.TE_MULTILINE | wx.EXPAND | wx.HSCROLL | wx.VSCROLL)
-        newte.SetZoom(3)
-
-        newte.Bind(wx.EVT_WINDOW_DESTROY, this.OnEditorDestroy)
-        newte.Bind(wx.EVT_CHAR, this.OnEditorModify)
+    def MakeEditor(this) -> Editor:
+        """
+        Create an editor for this notebook (without adding a page for it).
+        """
+        with Counters.Time("tab creation"):
+            newte = Editor(this, style=wx.TE_MULTILINE | wx.EXPAND | wx.HSCROLL | wx.VSCROLL)
+            newte.SetZoom(3)
 
-        clrCall.configure(newte)
-        clrCall.autocolor_run(newte)
-        newte.StyleClearAll()
+            newte.Bind(wx.EVT_WINDOW_DESTROY, this.OnEditorDestroy)
+            newte.Tracker.AddListener(this.OnEditorModify)
+            newte.LimitsListener = this.OnEditorLimits
+        return newte
 
+    def AddTab(this, evt=None, tabname: str = _("New file")):
+        newte = this.MakeEditor()
         this.AddPage(newte, tabname, select=True)
         this.SetTitle(tabname)
 
+    def AddLazyTab(this, path: str, state: dict | None = None, select: bool = False) -> TabStub:
+        """
+        Add a tab for a file without reading it: the editor is made and the
+        file loaded when the tab is selected for the first time.
+        @param state: View state to restore, see hibernate.Capture
+        """
+        stub = TabStub(this, path, state)
+        this.AddPage(stub, path or this.NewTabTitle, select=select)
+        this.DiskWatch.Schedule()
+        if select:
+            this.Hibernator.Realize(stub)
+        return stub
+
     def SetTitle(this, title):
         return wx.GetTopLevelParent(this).SetTitle(title)
     
-    def AskToOpen(this, evt=None):
+    def AskToOpen(this, evt=None) -> str:
         this.file_dialog.SetName(_("Open a file"))
         if this.file_dialog.ShowModal() == wx.ID_OK:
             this.OpenFile(this.file_dialog.GetPath())
+            return this.file_dialog.GetPath()
+        return ""
 
-    def AskToSave(this, evt=None):
+    def AskToSave(this, evt=None, page: Editor | None = None):
+        """
+        Ask where to save a page (defaults to the current one), and save it.
+        """
         this.file_dialog.SetName(_("Save this to..."))
 
         if this.file_dialog.ShowModal() == wx.ID_OK:
-            this.GetCurrentPage().SaveFile(this.file_dialog.GetPath())
+            page = page or this.GetCurrentPage()
+
+            def saved(path: str, error: Exception | None):
+                if not error and page:
+                    this.SetPageText(this.GetPageIndex(page), path)
+                    this.SetTitle(path)
+                    this.DiskWatch.Schedule()
+
+            page.SaveFile(this.file_dialog.GetPath(), saved)
 
     def SaveFileEvent(this, evt=None):
-        tablabel = this.GetPageText(this.GetSelection())
-        if not os.path.isfile(tablabel):
+        path = this.GetCurrentPage().FileLoaded
+        if not path:
             return this.AskToSave()
         else:
-            return this.SaveFile(tablabel)
+            return this.SaveFile(path)
 
     def OpenFile(this, path: str):
-        if this.GetCurrentPage().IsModified:
+        this.OpenFiles([path])
+
+    def OpenFiles(this, paths: list[str]):
+        """
+        Open files in new tabs. They are read in the background (see FileOpener).
+        """
+        this.Opener.Open(paths)
+
+    def ShowFileAt(this, path: str, line: int, column: int = 0, length: int = 0):
+        """
+        Select a file's tab, opening it if needed, and show a line of it.
+        See Editor.ShowMatch.
+        """
+        show = lambda editor: editor.ShowMatch(line, column, length)
+
+        for index, page in enumerate(map(this.GetPage, range(this.GetPageCount()))):
+            if isinstance(page, (Editor, TabStub)) and page.FileLoaded == path:
+                this.SetSelection(index)
+                if isinstance(page, Editor):
+                    return show(page)
+                break # Realized by OnPageChanged
+        else:
+            this.OpenFile(path)
+
+        this.Waiting[path] = show
+
+    def Loaded(this, editor: Editor):
+        """
+        Called once a file is loaded in an editor.
+        """
+        this.DiskWatch.Check(editor) # Changed while being read, or while hibernated
+        callback = this.Waiting.pop(editor.FileLoaded, None)
+        if callback:
+            callback(editor)
+
+    def PlaceFile(this, path: str, data: bytes | None = b"", format: FileFormat | None = None,
+                  signature: tuple | None = None):
+        """
+        Show a file in a tab: the current one if it's an untouched new file,
+        else a new one.
+        @param data: File content as UTF-8, None to use large file mode
+        @param format: How the file is written, see sniff.Read
+        @param signature: The file's watcher.Signature when it was read
+        """
+        page = this.GetCurrentPage()
+        if not isinstance(page, Editor) or page.FileLoaded or page.Tracker.Dirty:
             this.AddTab()
+            page = this.GetCurrentPage()
 
-        this.GetCurrentPage().LoadFile(path) # Load the content
-        this.GetCurrentPage().FileLoaded = path
+        if data is None:
+            page.LoadLargeFile(path)
+        else:
+            page.LoadRaw(data, format)
+        page.FileLoaded = path
+        page.Disk = signature
+        this.DiskWatch.Schedule()
 
         this.SetPageText(this.GetSelection(), path) # Set tab title
-        wx.GetTopLevelParent(this).SetTitle(path) # Set the window title
+        this.SetTitle(path) # Set the window title
+        this.Hibernator.Schedule()
+        this.Loaded(page)
 
     def SaveFile(this, path: str):
-        return this.GetCurrentPage().SaveFile(path)
+        return this.GetCurrentPage().SaveFile(path, this.OnSaved)
+
+    def SaveAll(this, evt=None):
+        """
+        Save every modified tab at once.
+        """
+        editors = [page for page in map(this.GetPage, range(this.GetPageCount()))
+                   if (isinstance(page, Editor) and page.Tracker.Dirty) or
+                      (isinstance(page, TabStub) and page.Dirty)]
+        Engine.SaveAll(editors, this.OnSavedAll)
 
     """
     Events.
     """
 
+    def OnSaved(this, path: str, error: Exception | None):
+        if error:
+            wx.MessageBox(_("Unable to save %s:\n%s") % (path, error),
+                          _("Error"), wx.OK | wx.ICON_ERROR, this)
+
+    def OnSavedAll(this, results: list[tuple[str, Exception | None]]):
+        failed = [(path, error) for path, error in results if error]
+        statusbar = wx.GetTopLevelParent(this).GetStatusBar()
+        if statusbar:
+            statusbar.SetStatusText(_("Saved %d of %d file(s)") % (len(results) - len(failed), len(results)))
+
+        if not failed:
+            return
+
+        dlg = wx.Dialog(this, title=_("Save all"), style=wx.DEFAULT_DIALOG_STYLE | wx.RESIZE_BORDER)
+        box = wx.BoxSizer(wx.VERTICAL)
+        report = wx.ListCtrl(dlg, style=wx.LC_REPORT | wx.SUNKEN_BORDER)
+        report.InsertColumn(0, _("File"))
+        report.InsertColumn(1, _("Result"))
+
+        for index, (path, error) in enumerate(results):
+            report.InsertItem(index, path)
+            report.SetItem(index, 1, str(error) if error else _("Saved"))
+
+        for i in range(0, 2): report.SetColumnWidth(i, wx.LIST_AUTOSIZE_USEHEADER)
+
+        box.Add(report, 1, wx.EXPAND | wx.ALL, 5)
+        box.Add(dlg.CreateStdDialogButtonSizer(wx.OK), 0, wx.EXPAND | wx.ALL, 5)
+        dlg.SetSizer(box)
+        clrCall.configure(dlg)
+        dlg.ShowModal()
+        dlg.Destroy()
+
     def OnPageChanged(this, evt):
+        page = this.GetPage(evt.GetSelection())
+        if isinstance(page, TabStub):
+            wx.CallAfter(lambda: page and not page.Realizing and this.Hibernator.Realize(page))
+        elif isinstance(page, Editor):
+            this.Hibernator.Touch(page)
+            wx.CallAfter(this.DiskWatch.Check, page)
+
+        if this.Limits:
+            this.Limits.Show(page)
+
         tabname = this.GetPageText(evt.GetSelection())
         if this.SetStatus: wx.GetTopLevelParent(this).SetStatusText(tabname)
         this.SetTitle(tabname)
 
     def OnPageClosed(this, evt):
+        this.DiskWatch.Schedule()
         if this.GetPageCount() - 1 == 0:
-            match this.close_on_no_tab in global_settings.yes_values:
+            match this.close_on_no_tab:
                 case True: wx.GetApp().ExitMainLoop()
                 case _: this.AddTab()
 
     def OnSelfDestroy(this, evt):
+        this.DiskWatch.Stop()
         for i in range(this.GetPageCount()):
             this.GetPage(i).SendDestroyEvent()
         evt.Skip()
 
     def OnDropFiles(this, x, y, filenames):
-        
-        for i in range(0, len(filenames)):
-            this.AddTab()
-            this.OpenFile(filenames[i])
-        
+        this.OpenFiles(list(filenames))
         return True
     
     def OnEditorDestroy(this, evt):
         curreditor = evt.GetWindow()
+        this.Hibernator.Forget(curreditor)
+        if curreditor.Hibernating: # Its text is kept by a TabStub
+            return evt.Skip()
+
         path = curreditor.FileLoaded if curreditor.FileLoaded else "this new file"
 
-        if curreditor.IsModified:
+        if curreditor.Tracker.Dirty:
             match wx.MessageBox(_(f"Save {path}? It has unsaved changes."),
                                 _("Not saved"), wx.YES_NO | wx.CANCEL | wx.YES_DEFAULT):
             
                 case wx.YES:
-                    if curreditor.FileLoaded != path: this.AskToSave()
-                    else: this.SaveFile(path)
+                    if not curreditor.FileLoaded: this.AskToSave(page=curreditor)
+                    else: curreditor.SaveFile(path, this.OnSaved)
 
                 case wx.CANCEL:
                     return
 
+        if curreditor.Large:
+            curreditor.Large.Close() # Waits for the saves in progress
+
         evt.Skip()
     
-    def OnEditorModify(this, evt: wx.KeyEvent):
-        editor = evt.GetEventObject()
-
-        editor.Hash = md5(editor.GetText().encode("utf-8"))
-        if editor.FileLoaded:
-            if not this.GetPageText(this.GetPageIndex(editor)).endswith(" *"):
-                this.SetPageText(this.GetPageIndex(editor), editor.FileLoaded + " *")
-
-        evt.Skip()
\ No newline at end of file
+    def OnEditorModify(this, editor: Editor, dirty: bool):
+        """
+        Called by the editor's ChangeTracker when it leaves/reaches its save point.
+        """
+        index = this.GetPageIndex(editor)
+        if index == wx.NOT_FOUND or not editor.FileLoaded:
+            return
+
+        this.SetPageText(index, editor.FileLoaded + (" *" if dirty else ""))
+
+    def OnEditorLimits(this, editor: Editor):
+        """
+        Called when an editor's limits change, see Editor.SetLevel.
+        """
+        if this.Limits and editor is this.GetCurrentPage():
+            this.Limits.Show(editor)
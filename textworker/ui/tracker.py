@@ -0,0 +1,146 @@
+import hashlib
+import os
+import threading
+import wx
+import wx.stc
+
+from typing import Callable
+
+from ..generic import logger
+
+HASH_CHUNK: int = 1 << 20 # 1 MiB
+
+
+def RawBuffer(editor: wx.stc.StyledTextCtrl):
+    """
+    Get the editor's document as UTF-8 bytes without making a Python str.
+    GetCharacterPointer() returns a view of Scintilla's own buffer, which
+    is only valid until the next modification: copy it (bytes(view)) before
+    handing it to another thread.
+    """
+    try:
+        return editor.GetCharacterPointer()
+    except (AttributeError, NotImplementedError):
+        return editor.GetTextRaw()
+
+
+def Digest(data) -> bytes:
+    """
+    Hash a bytes-like object chunk by chunk.
+    """
+    view = memoryview(data)
+    hasher = hashlib.blake2b(digest_size=16)
+
+    for start in range(0, len(view), HASH_CHUNK):
+        hasher.update(view[start:start + HASH_CHUNK])
+
+    return hasher.digest()
+
+
+def FileDigest(path: str) -> bytes | None:
+    """
+    Hash a file on disk the same way Digest() does.
+    Returns None if the file can't be read.
+    """
+    hasher = hashlib.blake2b(digest_size=16)
+    try:
+        with open(path, "rb") as f:
+            while chunk := f.read(HASH_CHUNK):
+                hasher.update(chunk)
+    except OSError as e:
+        logger.warning(f"Unable to hash {path}: {e}")
+        return None
+    return hasher.digest()
+
+
+class ChangeTracker:
+    """
+    Save point based change tracking for a StyledTextCtrl.
+
+    Scintilla already knows whether the document is at its save point, so
+    instead of hashing the whole text on every key press we listen to its
+    save point events and count modifications (Generation).
+    Content hashing only happens in Changed(), on a worker thread.
+    """
+
+    MODIFY_FLAGS = wx.stc.STC_MOD_INSERTTEXT | wx.stc.STC_MOD_DELETETEXT
+
+    def __init__(this, editor: wx.stc.StyledTextCtrl):
+        this.Editor = editor
+        this.Generation: int = 0
+        this.SavedGeneration: int = 0
+        this.SavedDigest: bytes | None = None
+        this.Dirty: bool = False
+        this.Listeners: list[Callable[[wx.stc.StyledTextCtrl, bool], None]] = []
+
+        editor.Bind(wx.stc.EVT_STC_MODIFIED, this.OnModified)
+        editor.Bind(wx.stc.EVT_STC_SAVEPOINTLEFT, this.OnSavePointLeft)
+        editor.Bind(wx.stc.EVT_STC_SAVEPOINTREACHED, this.OnSavePointReached)
+
+    def AddListener(this, callback: Callable[[wx.stc.StyledTextCtrl, bool], None]):
+        """
+        Call callback(editor, dirty) each time the dirty state flips.
+        """
+        this.Listeners.append(callback)
+
+    def MarkSaved(this, generation: int | None = None, digest: bytes | None = None):
+        """
+        Tell the tracker that the content of the given generation is now on disk.
+        If the document has been modified since that generation (e.g a save
+        made in the background), the editor stays dirty.
+        """
+        if generation is None:
+            generation = this.Generation
+
+        this.SavedDigest = digest
+        this.SavedGeneration = generation
+
+        if generation == this.Generation:
+            this.Editor.SetSavePoint()
+
+    def Changed(this, callback: Callable[[bool], None]):
+        """
+        Answer "is the content really different from the saved one?".
+        Unlike Dirty this ignores edits that were reverted by hand.
+        The result is delivered on the GUI thread.
+        """
+        if not this.Dirty:
+            return callback(False)
+
+        data = bytes(RawBuffer(this.Editor))
+        saved = this.SavedDigest
+        path = getattr(this.Editor, "FileLoaded", "")
+
+        def work():
+            if saved is None:
+                reference = FileDigest(path) if path and os.path.isfile(path) else Digest(b"")
+            else:
+                reference = saved
+            wx.CallAfter(callback, Digest(data) != reference)
+
+        threading.Thread(target=work, daemon=True).start()
+
+    """
+    Events.
+    """
+
+    def OnModified(this, evt: wx.stc.StyledTextEvent):
+        if evt.GetModificationType() & this.MODIFY_FLAGS:
+            this.Generation += 1
+        evt.Skip()
+
+    def OnSavePointLeft(this, evt: wx.stc.StyledTextEvent):
+        this._SetDirty(True)
+        evt.Skip()
+
+    def OnSavePointReached(this, evt: wx.stc.StyledTextEvent):
+        this.SavedGeneration = this.Generation
+        this._SetDirty(False)
+        evt.Skip()
+
+    def _SetDirty(this, dirty: bool):
+        if this.Dirty == dirty:
+            return
+        this.Dirty = dirty
+        for callback in this.Listeners:
+            callback(this.Editor, dirty)
@@ -0,0 +1,189 @@
+import os
+import wx
+import wx.stc
+import wx.lib.agw.aui as aui
+
+from typing import Callable
+
+from .. import generic
+from ..fileio import AtomicWrite
+from ..generic import get_setting, logger
+from ..session import Encode, EncodeTab, Load, Session, SessionError
+from .editor import Editor
+from .hibernate import Capture, TabStub
+from .opener import GetPool
+
+RESTORE: bool = get_setting("base", "restore_session", True)
+WRITE_DELAY: int = 2000 # ms
+PANES: tuple[str, ...] = ("multiview", "notebook") # AUI pane names, see mainwindow.MainFrame
+
+
+def SessionFile() -> str:
+    return os.path.join(generic.TOPLV_DIR, "session.bin")
+
+
+class Workspace:
+    """
+    Keeps a snapshot of the open tabs (with caret and scroll positions),
+    the Explorer folder and the pane layout, and restores it on startup.
+
+    The snapshot is written in the background a little after something
+    changes, and right away when the window closes. Tabs are encoded once
+    and cached until they change, so writing it again is cheap.
+    """
+
+    def __init__(this, frame: wx.Frame):
+        this.Frame = frame
+        this.Notebook = frame.notebook
+        this.Folder = ""
+        this.Records: dict[wx.Window, tuple[str, bytes]] = {} # tab: (path, encoded)
+        this.Restoring = False
+
+        this.Timer = wx.CallLater(WRITE_DELAY, this.Write)
+        this.Timer.Stop()
+
+        this.Notebook.Bind(aui.EVT_AUINOTEBOOK_PAGE_CHANGED, this.OnTabsChanged)
+        this.Notebook.Bind(aui.EVT_AUINOTEBOOK_PAGE_CLOSED, this.OnTabsChanged)
+        this.Notebook.Bind(aui.EVT_AUINOTEBOOK_END_DRAG, this.OnTabsChanged)
+        this.Notebook.Bind(wx.stc.EVT_STC_UPDATEUI, this.OnEditorUpdateUI) # Sent up by every editor
+
+    def Touch(this, page: wx.Window | None = None):
+        """
+        Note that something changed, and write the snapshot a bit later.
+        @param page: The tab which changed, if it's about a single one
+        """
+        if page is not None:
+            this.Records.pop(page, None)
+        if not this.Restoring:
+            this.Timer.Start(WRITE_DELAY)
+
+    def SetFolder(this, folder: str):
+        this.Folder = folder
+        this.Touch()
+
+    def Snapshot(this) -> bytes:
+        tabs = []
+        selected = -1
+        current = this.Notebook.GetCurrentPage()
+
+        for page in map(this.Notebook.GetPage, range(this.Notebook.GetPageCount())):
+            if not isinstance(page, (Editor, TabStub)) or not page.FileLoaded:
+                continue # Nothing to restore
+
+            path, record = this.Records.get(page, ("", None))
+            if record is None or path != page.FileLoaded: # Saved as something else meanwhile
+                state = page.State if isinstance(page, TabStub) else Capture(page)
+                record = EncodeTab(page.FileLoaded, state)
+                this.Records[page] = (page.FileLoaded, record)
+
+            if page is current:
+                selected = len(tabs)
+            tabs.append(record)
+
+        # Forget closed tabs
+        alive = set(map(this.Notebook.GetPage, range(this.Notebook.GetPageCount())))
+        for page in [page for page in this.Records if page not in alive]:
+            del this.Records[page]
+
+        return Encode(tabs, selected, this.Folder, this.Frame._mgr.SavePerspective())
+
+    def Write(this, wait: bool = False):
+        """
+        Write the snapshot, in the background unless wait is set.
+        """
+        this.Timer.Stop()
+        if not this.Notebook or this.Restoring:
+            return # Don't replace a session which is not restored yet
+
+        data = this.Snapshot()
+        path = SessionFile()
+
+        def write():
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            AtomicWrite(path, [data])
+
+        if wait:
+            write()
+        else:
+            GetPool().submit(write).add_done_callback(
+                lambda future: future.exception() and logger.warning(f"Unable to write the session: {future.exception()}"))
+
+    def Restore(this, callback: Callable[[], None] | None = None):
+        """
+        Read the snapshot and check its files on a worker thread, then
+        add the tabs, lazily (see Tabber.AddLazyTab).
+        callback is called once done, whether there was a session or not.
+        """
+        if not RESTORE:
+            return callback and wx.CallAfter(callback)
+
+        this.Restoring = True
+
+        def load() -> tuple[Session | None, set[str]]:
+            session = Load(SessionFile())
+            if session is None:
+                return None, set()
+            return session, {path for path, state in session.Tabs if os.path.isfile(path)}
+
+        def done(future):
+            try:
+                if this.Notebook:
+                    this._Apply(*future.result())
+            except (OSError, SessionError) as e:
+                logger.warning(f"Unable to restore the session: {e}")
+            finally:
+                this.Restoring = False
+                if callback:
+                    callback()
+
+        GetPool().submit(load).add_done_callback(lambda future: wx.CallAfter(done, future))
+
+    def _Apply(this, session: Session | None, existing: set[str]):
+        if session is None:
+            return
+
+        notebook = this.Notebook
+        first = notebook.GetPage(0) if notebook.GetPageCount() == 1 else None
+        untouched = isinstance(first, Editor) and not first.FileLoaded and not first.Tracker.Dirty
+
+        selected = None
+        notebook.Freeze()
+        try:
+            for index, (path, state) in enumerate(session.Tabs):
+                if path not in existing:
+                    logger.info(f"Not restoring {path}: not found")
+                    continue
+                stub = notebook.AddLazyTab(path, state)
+                if index == session.Selected:
+                    selected = stub
+
+            if untouched and notebook.GetPageCount() > 1:
+                notebook.DeletePage(notebook.GetPageIndex(first))
+
+            if selected:
+                notebook.SetSelection(notebook.GetPageIndex(selected))
+        finally:
+            notebook.Thaw()
+
+        if selected and notebook.GetCurrentPage() is selected:
+            notebook.Hibernator.Realize(selected)
+
+        # Layouts saved before the panes had stable names would hide them all
+        if session.Perspective and all(f"name={name};" in session.Perspective for name in PANES):
+            this.Frame._mgr.LoadPerspective(session.Perspective)
+
+        if session.Folder and os.path.isdir(session.Folder):
+            this.Frame.OpenDir(None, session.Folder)
+
+    """
+    Events.
+    """
+
+    def OnTabsChanged(this, evt):
+        this.Touch()
+        evt.Skip()
+
+    def OnEditorUpdateUI(this, evt: wx.stc.StyledTextEvent):
+        if evt.GetUpdated() & (wx.stc.STC_UPDATE_SELECTION | wx.stc.STC_UPDATE_V_SCROLL | wx.stc.STC_UPDATE_H_SCROLL):
+            this.Touch(evt.GetEventObject())
+        evt.Skip()
@@ -0,0 +1,225 @@
+"""
+File system change notifications.
+
+inotify is used on Linux. Elsewhere (or once inotify runs out of
+watches) paths are polled with os.stat, all of them from the same thread.
+"""
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import threading
+
+from typing import Callable
+
+from .generic import logger
+
+POLL_INTERVAL: float = 2.0 # seconds
+BATCH_DELAY: float = 0.1 # seconds, to group events
+
+IN_MODIFY = 0x2
+IN_ATTRIB = 0x4
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_MOVE_SELF = 0x800
+IN_Q_OVERFLOW = 0x4000
+IN_IGNORED = 0x8000
+IN_ONLYDIR = 0x1000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+DIR_MASK = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_CLOSE_WRITE | IN_ATTRIB | \
+           IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+
+EVENT = struct.Struct("iIII") # wd, mask, cookie, name length
+
+
+def Signature(path: str) -> tuple[int, int, int] | None:
+    """
+    (mtime in ns, size, inode) of a path, None if it does not exist.
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+
+def _LoadInotify():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+class Watcher:
+    """
+    Watches directories, and files through their directory.
+
+    callback(changes) is called on the watcher thread with a set of
+    (directory, name) pairs. name is the entry which changed, or "" when
+    only "something changed in the directory" is known (polling, or
+    an event queue overflow): the directory should then be scanned again.
+    """
+
+    def __init__(this, callback: Callable[[set[tuple[str, str]]], None]):
+        this.Callback = callback
+        this._lock = threading.Lock()
+        this._dirs: dict[str, int] = {} # Watched directory: users
+        this._files: dict[str, tuple | None] = {} # Polled files: signature
+        this._polled: dict[str, tuple | None] = {} # Polled directories: signature
+        this._wds: dict[int, str] = {} # inotify watch: directory
+        this._stop = threading.Event()
+
+        this._libc = _LoadInotify()
+        this._fd = -1
+        if this._libc:
+            this._fd = this._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+            if this._fd < 0:
+                logger.warning(f"inotify unavailable ({os.strerror(ctypes.get_errno())}), polling instead")
+
+        this._thread = threading.Thread(target=this._Run, name="textworker-watcher", daemon=True)
+        this._thread.start()
+
+    @property
+    def UsesInotify(this) -> bool:
+        return this._fd >= 0
+
+    def WatchDir(this, directory: str):
+        directory = os.path.abspath(directory)
+        with this._lock:
+            this._dirs[directory] = this._dirs.get(directory, 0) + 1
+            if this._dirs[directory] > 1:
+                return
+
+            if this._fd >= 0:
+                wd = this._libc.inotify_add_watch(this._fd, os.fsencode(directory), DIR_MASK)
+                if wd >= 0:
+                    this._wds[wd] = directory
+                    return
+                error = ctypes.get_errno()
+                if error != errno.ENOSPC:
+                    logger.debug(f"Unable to watch {directory}: {os.strerror(error)}")
+                    return
+                # Out of inotify watches: poll this one
+
+            this._polled[directory] = Signature(directory)
+
+    def UnwatchDir(this, directory: str):
+        directory = os.path.abspath(directory)
+        with this._lock:
+            users = this._dirs.get(directory, 0) - 1
+            if users > 0:
+                this._dirs[directory] = users
+                return
+
+            this._dirs.pop(directory, None)
+            this._polled.pop(directory, None)
+            for wd, path in list(this._wds.items()):
+                if path == directory:
+                    this._libc.inotify_rm_watch(this._fd, wd)
+                    del this._wds[wd]
+
+    def WatchFile(this, path: str):
+        """
+        Report changes of a file: writes, attribute changes, replacement
+        or removal. It's reported as (its directory, its name).
+        """
+        path = os.path.abspath(path)
+        this.WatchDir(os.path.dirname(path))
+        with this._lock:
+            this._files[path] = Signature(path)
+
+    def UnwatchFile(this, path: str):
+        path = os.path.abspath(path)
+        with this._lock:
+            if this._files.pop(path, False) is False:
+                return
+        this.UnwatchDir(os.path.dirname(path))
+
+    def Stop(this):
+        this._stop.set() # The thread closes the inotify descriptor
+
+    def _Read(this) -> set[tuple[str, str]]:
+        changes = set()
+        while True:
+            try:
+                data = os.read(this._fd, 64 * 1024)
+            except BlockingIOError:
+                return changes
+
+            offset = 0
+            while offset < len(data):
+                wd, mask, cookie, length = EVENT.unpack_from(data, offset)
+                offset += EVENT.size
+                name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+                offset += length
+
+                with this._lock:
+                    if mask & IN_Q_OVERFLOW:
+                        changes.update((directory, "") for directory in this._dirs)
+                        continue
+                    directory = this._wds.get(wd)
+                    if mask & IN_IGNORED:
+                        this._wds.pop(wd, None)
+                if directory:
+                    changes.add((directory, name))
+
+    def _Poll(this) -> set[tuple[str, str]]:
+        changes = set()
+        with this._lock:
+            polled = list(this._polled.items())
+            files = list(this._files.items()) if this._fd < 0 else []
+
+        for directory, signature in polled:
+            new = Signature(directory)
+            if new != signature:
+                changes.add((directory, ""))
+                with this._lock:
+                    if directory in this._polled:
+                        this._polled[directory] = new
+
+        for path, signature in files:
+            new = Signature(path)
+            if new != signature:
+                changes.add(os.path.split(path))
+                with this._lock:
+                    if path in this._files:
+                        this._files[path] = new
+
+        return changes
+
+    def _Run(this):
+        while not this._stop.is_set():
+            changes = set()
+            if this._fd >= 0:
+                ready, _w, _x = select.select([this._fd], [], [], POLL_INTERVAL)
+                if ready and not this._stop.is_set():
+                    this._stop.wait(BATCH_DELAY) # Let related events come too
+                    changes = this._Read()
+            else:
+                this._stop.wait(POLL_INTERVAL)
+
+            changes |= this._Poll()
+            if changes and not this._stop.is_set():
+                try:
+                    this.Callback(changes)
+                except Exception as e:
+                    logger.exception(f"File system watcher callback failed: {e}")
+
+        if this._fd >= 0:
+            os.close(this._fd)
+            this._fd = -1